@@ -56,10 +56,40 @@ Usgae:
 
 import struct           # used to convert binary data to usabel data
 import pandas as pd     # to export data as .csv
-import datetime         # used for date and time properties
+import numpy as np      # compact packet index arrays
+import mmap             # memory-maps the .bin file for fast header scanning
+import os               # file size without reading the file
+from array import array # growable typed buffers used while scanning
+from concurrent.futures import ProcessPoolExecutor, as_completed  # parse(workers=...) and batchParse() process pools
+from concurrent.futures.process import BrokenProcessPool
+import glob             # batchParse() file patterns
+import argparse         # command line interface
+import sys
+import time             # follow() polling interval
+import hashlib          # content hash of the .bin file for the parse cache
+import json             # parse cache manifest
+import shutil           # removes evicted parse cache entries
+import tempfile         # parse cache entries are written to a temporary directory first
+import gzip, bz2, lzma  # compressed export(fileFormat='csv')
+import contextlib       # phase timers of parseStats
+import cProfile, pstats # parse(profile=True)
+import asyncio          # parseAsync() and iterFramesAsync()
+import threading
+import inspect
+import functools
+import sqlite3         # LogCatalog
+from multiprocessing import shared_memory, resource_tracker    # publish() and attach()
 
 class ArduPilotLog:
-    def __init__(self, file):
+    GATHER_CHUNK = 65536    # packets copied per step when gathering a message type out of the memory-map
+    STREAM_BLOCK = 4194304  # bytes read per step by iterMessages() and iterFrames()
+    SYNC_DEPTH = 4          # packets in a row that must line up before a worker trusts a packet header
+    SHARDS_PER_WORKER = 4   # byte ranges per worker process for parse(workers=...)
+    PARALLEL_CHUNK = 262144 # packets per decode task for parse(workers=...)
+    CACHE_MAX_BYTES = 10*1024**3    # size the parse cache directory is trimmed back to, least recently used first
+    PROGRESS_BYTES = 16777216   # bytes scanned between two calls of the parse(progress=...) callback
+
+    def __init__(self, file, cacheDir=None):
         '''
         This class takes a ardupilot bin filename. When the parse() method is run it will
         open and parse all logde messages into a list of message objects, one object per
@@ -68,6 +98,8 @@ class ArduPilotLog:
 
         Args:
             file (string): Filepath to the .bin file to use.
+            cacheDir (string): (Optional) Directory, can be shared by many logs, where parse() saves the
+                               decoded log and later reopens it from, default None does not cache.
         modifies:
             Initializes class properties
         Return:
@@ -75,11 +107,69 @@ class ArduPilotLog:
         '''
         self.fileName = file
         self.fileSize = None
+        self.cacheDir = cacheDir
         self.ARDU_TO_STRUCT = self.__loadDataFieldFormats() 
         self.packetHeader = b'\xa3\x95'
         self.FMT2ID = {'FMT':128}
         self.msgFormat = {128:[128,89,'FMT','BBnNZ','Type,Length,Name,Format,Columns']} #{msgTypeID:[msgTypeID, packetLength, msgType, ardupilot format, column headers]}
-        self.messages = []  # will be a list Message objects
+        self.__messages = []    # MessageStore of every message, see the messages property
+        self.packetOffsets = None   # np.int64 array, byte offset of every packet in file order
+        self.packetTypes = None     # np.uint8 array, Message Type ID of every packet in file order
+        self.packetIndex = {}       # {msgTypeID: np.int64 array of packet offsets for that message type}
+        self.__binMap = None        # mmap of the .bin file, open once the index is built
+        self.__columns = {}         # {msgTypeID: [np.ndarray per data field]} decoded column data, filled on demand
+        self.__textCodes = {}       # {msgTypeID: {field index: (column, codes, categories)}} of decoded text fields, see __typeTextCodes()
+        self.__timestamps = {}      # {msgTypeID: datetime64[ns] array} estimated UTC time stamps, filled on demand
+        self.__timeIndex = {}       # {msgTypeID: np.uint64 TimeUS array} run times of message types that are not decoded, filled on demand
+        self.parseStats = {'seconds': None, 'phases': {}, 'typeSeconds': {}, 'profile': None}    # see parse()
+        self.__progress = None      # progress callback of the running parse()
+        self.__allFormats = False   # True once every FMT message in the file is registered, see seekTime()
+        self.__published = []       # shared memory blocks created by publish()
+        self.__attached = None      # shared memory block of a log opened with attach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Releases the memory-map of the .bin file. The decoded data stays available, except on a
+        log opened with attach(): its arrays live in the shared memory block, which is unmapped too.
+        On the log that published the block, the block is freed, see unpublish().
+        Args:
+            None
+        Modifies:
+            self.__binMap: Closes the memory-map and sets it to None.
+            self.packetOffsets, self.packetTypes, self.packetIndex, self.messages, self.__columns, self.__timestamps, self.__textCodes:
+                Emptied on an attached log, they point into the shared memory block.
+        Return:
+            None
+        '''
+        self.__closeFile()
+        self.unpublish()
+        if self.__attached is not None:    #drop every view into the block before unmapping it
+            self.packetOffsets = self.packetTypes = None
+            self.packetIndex, self.__columns, self.__timestamps, self.__textCodes = {}, {}, {}, {}
+            self.__messages = []
+            try:
+                self.__attached.close()
+            except BufferError:
+                raise BufferError('arrays of the attached log are still in use, delete them before close()') from None
+            self.__attached = None
+
+    @property
+    def messages(self):
+        '''MessageStore of Message objects of every message in file order, see parse(). A full parse()
+        builds it, after parse(lazy=True) or parse(types=...) it is built on first access, which decodes
+        every message type. Empty until the log is parsed.'''
+        if not self.__messages and self.packetOffsets is not None and len(self.packetOffsets):
+            self.__buildMessages()
+        return self.__messages
+
+    @messages.setter
+    def messages(self, messages):
+        self.__messages = messages
 
     class Message:  #ArduPilotLog.Message
         def __init__(self):
@@ -98,29 +188,110 @@ class ArduPilotLog:
             self.data = ''
             self.containsRuntime = False
 
-    def __processMessage(self, msgTypeID, rawMessage):
-        '''
-        This is where the all hard work happends of converting the binary into
-        usable data. A message object is created for every raw binary message
-        sent to this method. This method uses the ARDU_TO_STRUCT dictionary to 
-        know how to conver the binary data into the correct usable data. This 
-        method is what populated the self.messages list.
+    class MessageStore:  #ArduPilotLog.MessageStore
+        CHUNK = 65536   # Message objects created per step while iterating
+
+        def __init__(self, msgFormat, packetTypes, columns, timestamps):
+            '''Compact stand-in for a list of Message objects. The data fields and time stamps stay in
+            the arrays of their message type, shared with the log, and the file order is kept as the
+            Message Type ID and row of every message. Message objects are only created while indexing
+            or iterating, so the store itself costs a few bytes per message.
+
+            Args:
+                msgFormat (dict): Message formats of the log.
+                packetTypes (np.ndarray): Message Type ID of each message, in file order.
+                columns (dict): {msgTypeID: [np.ndarray per data field]} for every Message Type ID in packetTypes.
+                timestamps (dict): {msgTypeID: datetime64[ns] array} for every Message Type ID in packetTypes.
+            Modifies:
+                Initializes message store properties
+            Returns:
+                None
+            '''
+            self.msgFormat = msgFormat
+            self.columns = columns
+            self.timestamps = timestamps
+            self.typeIDs = np.empty(0, dtype=np.uint8)  # Message Type ID of every message in file order
+            self.rows = np.empty(0, dtype=np.int64)     # row of every message in the arrays of its message type
+            self.typeCounts = np.zeros(256, dtype=np.int64) # messages of each Message Type ID in the store
+            self.extend(packetTypes)
+
+        def extend(self, packetTypes):
+            '''Appends messages whose data fields and time stamps were appended to the arrays of their message type.
+            Args:
+                packetTypes (np.ndarray): Message Type ID of each new message, in file order.
+            Modifies:
+                self.typeIDs, self.rows, self.typeCounts: Extended with the new messages.
+            Returns:
+                None
+            '''
+            packetTypes = np.asarray(packetTypes, dtype=np.uint8)
+            order = np.argsort(packetTypes, kind='stable')
+            counts = np.bincount(packetTypes, minlength=256)
+            rows = np.empty(len(packetTypes), dtype=np.int64)
+            rows[order] = np.arange(len(packetTypes)) - (np.cumsum(counts)-counts)[packetTypes[order]]  #rank within the message type
+            self.typeIDs = np.concatenate((self.typeIDs, packetTypes))
+            self.rows = np.concatenate((self.rows, rows + self.typeCounts[packetTypes]))
+            self.typeCounts += counts
+
+        def __len__(self):
+            return len(self.typeIDs)
+
+        def __getitem__(self, index):
+            if isinstance(index, slice):
+                return list(self.__messages(np.arange(len(self))[index]))
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError('message index out of range')
+            return next(self.__messages(np.array([index])))
+
+        def __iter__(self):
+            for start in range(0, len(self), self.CHUNK):
+                yield from self.__messages(np.arange(start, min(start+self.CHUNK, len(self))))
+
+        def __messages(self, positions):
+            '''Creates the Message objects of the messages at the given positions.
+            Args:
+                positions (np.ndarray): Positions of the messages in file order.
+            Modifies:
+                None
+            Yields:
+                (Message): One Message object per position.
+            '''
+            typeIDs = self.typeIDs[positions]
+            rows = self.rows[positions]
+            rowData = {}
+            for msgTypeID in np.unique(typeIDs).tolist():
+                typeRows = rows[typeIDs == msgTypeID]
+                columns = [column[typeRows] for column in self.columns[msgTypeID]]
+                if self.msgFormat[msgTypeID][3][0] == 'Q':
+                    columns[0] = columns[0]*1e-6     #TimeUS is reported in seconds
+                datetimes = self.timestamps[msgTypeID][typeRows].astype('datetime64[us]').tolist()  #datetime objects, None for NaT
+                dates = [d_t.date() if d_t else 'No Data' for d_t in datetimes]
+                times = [d_t.time() if d_t else 'No Data' for d_t in datetimes]
+                rowData[msgTypeID] = zip(dates, times, zip(*(column.tolist() for column in columns)))
+            for msgTypeID in typeIDs.tolist():
+                msg=ArduPilotLog.Message()
+                msg.typeID=msgTypeID
+                msg.type=self.msgFormat[msgTypeID][2]
+                msg.date, msg.timeUTC, msgData = next(rowData[msgTypeID])
+                msg.data=list(msgData)
+                msg.containsRuntime = (self.msgFormat[msgTypeID][3][0]=='Q')
+                yield msg
+
+    def __decodePacket(self, msgTypeID, rawMessage):
+        '''Converts the binary payload of a single packet into a list of usable values using the
+        ARDU_TO_STRUCT dictionary.
 
         Args:
-            msgTypeID (int): Integer representation of the Message Type ID for the message being processed.
-            rawMessage (byte string): The message, in a string of bytes, to be process. 
+            msgTypeID (int): Integer representation of the Message Type ID for the message being decoded.
+            rawMessage (byte string): The message payload, without packet header and Message Type ID.
         Modifies:
-            self.messages: Appends Message objects to this list.
-            self.msgFormat: Updates the msgFormat dictionnary with additional message formats
-            self.FMT2ID: Updates the FMT2ID dictionary with additional Message Type Name: Mssage Type ID pairs.
-        Return: 
             None
+        Return:
+            (list): The decoded data fields of the message.
         '''
-        msg=ArduPilotLog.Message()
-        msg.typeID=msgTypeID
-        msg.type=self.msgFormat[msg.typeID][2]
-        arduByte_format=self.msgFormat[msg.typeID][3]
-        msg.containsRuntime = (arduByte_format[0]=='Q')
+        arduByte_format=self.msgFormat[msgTypeID][3]
         structByte_format='<'
         data_multiplier=[]
         #Convert arduByte_format to structByte_format
@@ -135,46 +306,33 @@ class ArduPilotLog:
                 msgData[indx]=self.__bytes2str(element)
             elif isinstance(element,int):
                 msgData[indx]=element*data_multiplier[indx]
-        msg.data=msgData
-        if msg.type == 'FMT':
-            self.FMT2ID.update({msgData[2]:msgData[0]})
-            self.msgFormat.update({msgData[0]:msgData.copy()}) #msgData[0] = the message Type ID for the message format being added. msgData[0] != msg.typeID
-        self.messages.append(msg)
+        return msgData
+
+    def __registerFormat(self, fmtData):
+        '''Adds the format defined by a decoded FMT message to the format lookups.
+        Args:
+            fmtData (list): Decoded FMT message data, [msgTypeID, packetLength, msgType, ardupilot format, column headers].
+        Modifies:
+            self.msgFormat: Updates the msgFormat dictionnary with the message format.
+            self.FMT2ID: Updates the FMT2ID dictionary with the Message Type Name: Mssage Type ID pair.
+        Return:
+            None
+        '''
+        self.FMT2ID.update({fmtData[2]:fmtData[0]})
+        self.msgFormat.update({fmtData[0]:fmtData.copy()}) #fmtData[0] = the message Type ID for the message format being added. fmtData[0] != FMT's own msgTypeID
     
-    def __updateDateTime(self):  
-        '''Populates the date and time properties for each message. This is done by estimating the 
-        time and date based on the nearest previouse GPS message.
-
-        Args:
-            None
-        Modifies: 
-            self.messages: This method updates the date and timeUTC properties of all message objects 
-            that are stored in self.messages.
-        Return:
-            None
-        '''
-        date='No Data'
-        time='No Data'
-        lastTimeUpdate=''
-        GPS_datum=''
-        firstGPS=True
-        for msg in self.messages:
-            if msg.containsRuntime: msg.data[0]*=1e-6    
-            if msg.type=='GPS': 
-                lastTimeUpdate = msg.data[0]  #Get TimeUS, time in milisceonds since power-on
-                GPS_datum=self.__gps2utc(msg.data[4],msg.data[3]/1000)  #input GWK & GMS, convert GPS time to UTC
-                if firstGPS==True:
-                    self.__backfillDateTime(lastTimeUpdate,GPS_datum)
-                    firstGPS=False
-                date = GPS_datum.date()
-                time = GPS_datum.time()
-            elif msg.containsRuntime:
-                if time != "No Data":  # If this is a message comes after the first GPS time stamp
-                    timeDiff=msg.data[0]-lastTimeUpdate #new time - old time
-                    time = (GPS_datum + datetime.timedelta(seconds=timeDiff)).time()   # "+" because we are adding the time past since the last GPS time update.
-            msg.date = date
-            msg.timeUTC = time
-               
+    def __validFormat(self, fmtData):
+        '''Checks that a decoded FMT message describes a usable format: every data field identifier is
+        known and the data fields add up to the packet length.
+        Args:
+            fmtData (list): Decoded FMT message data, see __registerFormat().
+        Modifies:
+            None
+        Return:
+            (bool): True if the format can be registered.
+        '''
+        return bool(fmtData[3]) and all(i in self.ARDU_TO_STRUCT for i in fmtData[3]) and \
+               struct.calcsize('<'+''.join(self.ARDU_TO_STRUCT[i][0] for i in fmtData[3]))+3 == fmtData[1]
 
     def __bytes2str(self,byteString):
         '''Convert bytes to string characters
@@ -185,53 +343,49 @@ class ArduPilotLog:
         Return:
             (string): Unicode string representation of the given byteString.
         '''
-        string=''
-        for byte in byteString:
-            if byte!=0:
-                string=string+chr(byte)
-        return string
-    
-    def __gps2utc(self,GWk,GMS,leapSecond=18):
-        '''Input GPS weeks and Week seconds, convertse the gps time to utc time.
+        return byteString.replace(b'\x00', b'').decode('latin-1')  #latin-1 maps every byte to the character chr(byte)
+
+    def __decodeStrings(self, column):
+        '''Dictionary encodes a column of fixed width byte strings. Names, labels and messages repeat
+        heavily, e.g. PARM names, so only the distinct values are decoded, and categories[codes] is an
+        object column in which every message of the same value shares one string object. NumPy already
+        drops the trailing NUL padding of each value.
+
         Args:
-            GWK (int): GWK component from the timestamp in the GPS message.
-            GMS (int): GMS component from the timestamp in the GPS message.
-            leapSeconds (int): (Optional) Look it up if you don't know what leapseconds are.
+            column (np.ndarray): Byte string ('S') column of a n, N, Z or a data field.
         Modifies:
             None
-        Returns:
-            (datetime): DateTime object in UTC corresponding to the given method inputs.
+        Return:
+            (tuple): (codes, categories), the category of each value and the sorted distinct strings, ready
+                     for pd.Categorical.from_codes().
         '''
-        GPS_epoch = datetime.datetime(year=1980,month=1,day=6)
-        elapsed = datetime.timedelta(weeks=GWk,seconds=(GMS-leapSecond))   #utc=gps-leapseconds
-        return GPS_epoch+elapsed
+        codes, values = pd.factorize(column)
+        decoded = np.array([self.__bytes2str(value) for value in values.tolist()], dtype=object)
+        categoryCodes, categories = pd.factorize(decoded, sort=True)    #sorted as by pd.Categorical, merges values that differ only by NULs
+        return self.__compactCodes(categoryCodes[codes], len(categories)), np.asarray(categories, dtype=object)
 
-    def __backfillDateTime(self,lastRunTimeUpdate,GPS_datum):
-        '''The only real world time stamps we get are from the GPS, however, ardupilot logs data even before
-        it recieves it's first GPS ping, so we need to retroactively calculate the date and time for all pre-GPS
-        messages. This is done by taking the fiest GPS timestamp and subtracting the run time timesatmp (seconds) 
-        for each previouse message to get an estimated log time for that message.
+    def __compactCodes(self, codes, numCategories):
+        '''Returns the category codes in the smallest signed integer type that holds them.'''
+        return codes.astype(np.min_scalar_type(-max(numCategories, 1)))
+    
+    def __gps2utc(self,GWk,GMS,leapSecond=18):
+        '''Input GPS weeks and Week seconds, convertse the gps time to utc time. Works on single
+        values or on whole NumPy arrays of GPS time stamps at once.
 
         Args:
-            lastRunTimeUpdate (int): The run time since start found in the GPS message. This will be in microSeconds.
-            GPS_datum (datetime): datetime object representing the GPS timestamp.
+            GWK (int): GWK component from the timestamp in the GPS message.
+            GMS (float): GMS component from the timestamp in the GPS message, in seconds.
+            leapSeconds (int): (Optional) Look it up if you don't know what leapseconds are.
         Modifies:
-            self.messages: Modifies the date and time UTC properties of the message objects in self.messages.
-        Return:
             None
+        Returns:
+            (np.datetime64): datetime64[ns] in UTC corresponding to the given method inputs.
         '''
-        #datetimeformat = "%m-%d-%Y %H:%M:%S.%f"
-        date ='No Date'
-        time ='No Time'
-        for msg in reversed(self.messages): #the first message will be the most recent message before the GPS message.
-            if msg.containsRuntime and (msg.date=='No DATA' or msg.timeUTC=='NO DATA'):
-                timeDiff=lastRunTimeUpdate-msg.data[0]
-                d_t=GPS_datum - datetime.timedelta(seconds=timeDiff)  #we are subtracting the time in seconds that this message occured prior to the first GPS time stamp.
-                date = d_t.date()
-                time = d_t.time()
-            msg.date = date
-            msg.timeUTC = time
-    
+        GPS_epoch = np.datetime64('1980-01-06', 'ns')
+        weeks = np.asarray(GWk, dtype=np.int64)*np.timedelta64(7*24*3600*10**9, 'ns')
+        seconds = np.round((np.asarray(GMS, dtype=np.float64)-leapSecond)*1e9).astype(np.int64).astype('timedelta64[ns]')   #utc=gps-leapseconds
+        return GPS_epoch+weeks+seconds
+
     def __loadDataFieldFormats(self):
         '''This is the key to translating between ArduPilot format and struct format.
         ardu_format: (struct_format)
@@ -267,121 +421,2849 @@ class ArduPilotLog:
                 "Q": ("Q", 1, long),  # Backward compat
             }
         
-    def parse(self, verbose=False):
-        '''This decodes the binary into usable data and stores all the messages in a list of message objects. 
-        The list of messages will include both FMT messages and non-FMT messages.
+    def __mapFile(self):
+        '''Memory-maps the .bin file read only. Empty files can not be memory-mapped, for those
+        self.__binMap stays None.
+
+        Args:
+            None
+        Modifies:
+            self.fileSize: Set to the number of bytes in the file.
+            self.__binMap: Set to the memory-map of the file.
+        Return:
+            None
+        '''
+        with open(self.fileName,'rb') as binFile:
+            self.fileSize=os.fstat(binFile.fileno()).st_size  #Get the number of bytes in file
+            if self.fileSize > 0:
+                self.__binMap = mmap.mmap(binFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __closeFile(self):
+        '''Closes the memory-map of the .bin file, if it is open. Unlike close(), shared memory blocks
+        published or attached stay as they are, the parse paths call this before they map the file again.'''
+        if self.__binMap is not None:
+            self.__binMap.close()
+            self.__binMap = None
 
-        Because reading from disk is a relatively time expensive process, the open() function is set
-        to buffer a portion of the file in memory to make reading request quicker. A buffer size of
-        1 MB has shown to reduce the processing time, however a larger buffersize can be used if desired.
+    def __buffer(self, buffer=None):
+        '''Returns the given block of bytes, or the memory-map of the file when no block is given.
+        The memory-map is reopened if close() has been called.'''
+        if buffer is not None:
+            return buffer
+        if self.__binMap is None:
+            self.__mapFile()
+        return self.__binMap
+
+    def __messageDtype(self, msgTypeID):
+        '''Converts the ardupilot format of a message type into a NumPy structured dtype that
+        lays over the message payload byte for byte. The fields are named f0, f1, ... in the order
+        of the format since column headers are not guaranteed to be valid or unique field names.
 
         Args:
-            verbose (bool): (Optional) Set to True if you want parsing progress to be printed to terminal, default False.
+            msgTypeID (int): Integer representation of the Message Type ID.
+        Modifies:
+            None
+        Return:
+            (np.dtype): Little endian, unaligned structured dtype for the message payload.
+        '''
+        fields = []
+        for indx, i in enumerate(self.msgFormat[msgTypeID][3]):
+            structFormat = self.ARDU_TO_STRUCT[i][0]
+            if structFormat.endswith('s'):     #struct '64s' is NumPy 'S64'
+                structFormat = 'S' + structFormat[:-1]
+            fields.append((f'f{indx}', '<' + structFormat))
+        return np.dtype(fields)
+
+    def __gatherPackets(self, msgTypeID, offsets, buffer=None, fields=None):
+        '''Copies the payloads of the packets at the given offsets out of the memory-map into one
+        contiguous structured array. The copy is done in chunks so the temporary byte index never
+        grows past GATHER_CHUNK packets. When only some data fields are wanted, only the bytes of those
+        fields are copied, found from the byte offset of each field in the message format.
+
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID of all the packets.
+            offsets (np.ndarray): Byte offsets of the packets to gather.
+            buffer (bytes): (Optional) Block of the file to gather from, default None uses the memory-map.
+            fields (list): (Optional) Indices of the data fields to gather, default None gathers the whole payload.
+        Modifies:
+            None
+        Return:
+            (np.ndarray): Structured array with one record per packet, see __messageDtype(). Only the
+                          requested fields, with their f<index> names, if fields is given.
+        '''
+        payloadLength = self.msgFormat[msgTypeID][1]-3
+        messageDtype = self.__messageDtype(msgTypeID)
+        if messageDtype.itemsize != payloadLength:
+            raise struct.error(f'{self.msgFormat[msgTypeID][2]} format {self.msgFormat[msgTypeID][3]} is '
+                               f'{messageDtype.itemsize} bytes but the packet holds {payloadLength} bytes')
+        if fields is None:
+            byteRange = np.arange(3, payloadLength+3)
+        else:
+            fieldDtypes = [(f'f{indx}', messageDtype.fields[f'f{indx}']) for indx in fields]
+            byteRange = np.concatenate([np.empty(0, dtype=np.int64)]+[np.arange(3+offset, 3+offset+dtype.itemsize) for name, (dtype, offset) in fieldDtypes]).astype(np.int64)
+            messageDtype = np.dtype([(name, dtype) for name, (dtype, offset) in fieldDtypes])
+        records = np.empty(len(offsets), dtype=messageDtype)
+        if len(offsets) == 0 or len(byteRange) == 0:
+            return records
+        binView = np.frombuffer(self.__buffer(buffer), dtype=np.uint8)
+        rawRecords = records.view(np.uint8).reshape(len(offsets), messageDtype.itemsize)
+        for start in range(0, len(offsets), ArduPilotLog.GATHER_CHUNK):
+            chunk = offsets[start:start+ArduPilotLog.GATHER_CHUNK]
+            np.take(binView, chunk[:,None]+byteRange, out=rawRecords[start:start+len(chunk)])
+        return records
+
+    def __decodeColumns(self, msgTypeID, offsets, buffer=None, fields=None, textCodes=None):
+        '''Decodes every packet of one message type at once. The payloads are gathered into a
+        structured array and the ARDU_TO_STRUCT multipliers are applied to whole columns.
+
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID of all the packets.
+            offsets (np.ndarray): Byte offsets of the packets to decode.
+            buffer (bytes): (Optional) Block of the file to decode from, default None uses the memory-map.
+            fields (list): (Optional) Indices of the data fields to decode, default None decodes every data field.
+            textCodes (dict): (Optional) Filled with data field index: (codes, categories) of the text fields, see
+                              __decodeStrings(), default None.
+        Modifies:
+            textCodes
+        Return:
+            (list): One np.ndarray per data field, in the order of the message format, or of fields if given.
+        '''
+        records = self.__gatherPackets(msgTypeID, offsets, buffer, fields)
+        fmt = self.msgFormat[msgTypeID][3]
+        columns = []
+        for indx in (range(len(fmt)) if fields is None else fields):
+            i = fmt[indx]
+            column = records[f'f{indx}']
+            multiplier = self.ARDU_TO_STRUCT[i][1]
+            if column.dtype.kind == 'S':
+                codes, categories = self.__decodeStrings(column)
+                column = categories[codes]
+                if textCodes is not None:
+                    textCodes[indx] = (codes, categories)
+            elif multiplier != 1:   #c, C, e, E and L are scaled integers
+                column = column*multiplier
+            columns.append(np.ascontiguousarray(column))
+        return columns
+
+    def buildIndex(self):
+        '''Scans the .bin file once and records the byte offset and Message Type ID of every packet
+        without decoding the message data. The file is memory-mapped and the packet headers are found
+        with bulk byte searching, so the scan never makes a Python level read call per packet. FMT
+        messages are decoded as they are found since their packet lengths are needed to step over
+        the packets that follow them.
+
+        Args:
+            None
         Modifies:
-            self.messages: Appends Message objects to this list and updates their date and time properties.
+            self.fileSize: Set to the number of bytes in the file.
+            self.packetOffsets: np.int64 array holding the byte offset of every packet, in file order.
+            self.packetTypes: np.uint8 array holding the Message Type ID of every packet, in file order.
+            self.packetIndex: Dictionary of Message Type ID: np.int64 array of the offsets of that message type.
             self.msgFormat: Updates the msgFormat dictionnary with additional message formats
             self.FMT2ID: Updates the FMT2ID dictionary with additional Message Type Name: Mssage Type ID pairs.
-        Return: 
+        Return:
             None
         '''
-        with open(self.fileName,'rb', buffering=1000000) as binFile:
-            binFile.seek(0,2) #move curser to end of file
-            self.fileSize=binFile.tell()  #Get the number of bytes in file
-            binFile.seek(0)   #move curser back to begining of file
-            endOfFile = False if self.fileSize > 0 else True
-            tenPercent=self.fileSize*0.1
-            if verbose: print(f'\rParsing: {0.0}%', end='')
-            while not endOfFile:
-                nextBytes = binFile.read(2)
-                while nextBytes!=self.packetHeader and not endOfFile:
-                   nextBytes = nextBytes[1:] + binFile.read(1)
-                   endOfFile = True if len(nextBytes) < 2 else False
-                if not endOfFile:
-                    msgTypeID = ord(binFile.read(1))  #converts byte to int
-                    packetLength = self.msgFormat[msgTypeID][1]
-                    rawMessage = binFile.read(packetLength-3)
-                    if len(rawMessage) == (packetLength-3): 
-                        self.__processMessage(msgTypeID, rawMessage)
-                if (binFile.tell()%tenPercent) < 100 and verbose:
-                    print(f'\rParsing: {round(binFile.tell()/self.fileSize*100,1)}%', end='')
-        if verbose: print(f'\rParsing: {100.0}%')
-        self.__updateDateTime()
-
-
-    def filter(self, msgFilterType: str, csv: bool = False) -> pd.DataFrame:
-        '''Creates a dataframe consisting of only the specified message type. The column 
-        headers of the dataframe will be defined by the column headers found in the FMT
-        message. If csv is specified, the dataFrame will be exported and saved as a .csv.
-        CSV is saved to same directory as .bin file.
+        self.__closeFile()
+        self.__columns = {}
+        self.__textCodes = {}
+        self.__timestamps = {}
+        self.__timeIndex = {}
+        self.__mapFile()
+        offsets = array('q')
+        types = array('B')
+        tic = time.perf_counter()
+        progress = None
+        if self.__progress is not None:
+            progress = lambda pos, packets: self.__reportProgress('scan', pos, self.fileSize, packets, tic)
+        if self.__binMap is not None:
+            self.__scanPackets(self.__binMap, offsets, types, progress=progress)
+        self.__setIndex(np.frombuffer(offsets, dtype=np.int64).copy(), np.frombuffer(types, dtype=np.uint8).copy())
+        self.__reportProgress('scan', self.fileSize, self.fileSize, len(self.packetOffsets), tic)
 
+    def __setIndex(self, packetOffsets, packetTypes):
+        '''Stores the packet index and groups the packet offsets by message type.
         Args:
-            msgFilterType (string): The Message Type Name of the messages you want displayed
-                                    in the dataFrame.
-            csv (bool): (Optional) Set to True if you want the resulting dataFrame to be exported 
-                        and saved as a .csv, default False.
+            packetOffsets (np.ndarray): np.int64 byte offset of every packet, in file order.
+            packetTypes (np.ndarray): np.uint8 Message Type ID of every packet, in file order.
         Modifies:
+            self.packetOffsets, self.packetTypes, self.packetIndex: See buildIndex().
+        Return:
             None
-        Returns:
-            (DataFrame): A dataFrame consisting of messages beloning only to the specified message type.
-                         Each row is an indivitual message. 
         '''
-        msgTypeID = self.FMT2ID.get(msgFilterType)
-        if msgTypeID is None:
-            return pd.DataFrame()
-        columnHeaders=["Date", "UTC", "MsgType", *self.msgFormat[msgTypeID][4].split(",")]
-        #loop through each message in the self.messages list and checks if the message type matches the specified msgFilterType, if so add data to the filteredData list.
-        filteredData = [[msg.date.strftime('%Y-%m-%d'), msg.timeUTC.strftime('%H:%M:%S.%f'), msg.type, *msg.data] for msg in self.messages if msg.type == msgFilterType]
-        df=pd.DataFrame(data=filteredData, columns=columnHeaders)
-        if csv:
-            filename=f"{self.fileName[0:-4]}_{msgFilterType}.csv"
-            df.to_csv(filename,index=False)
-            print(f'CSV saved to {filename}.')
-        return df
+        self.packetOffsets = packetOffsets
+        self.packetTypes = packetTypes
+        #group the offsets by message type, a stable sort keeps each group in file order
+        order = np.argsort(self.packetTypes, kind='stable')
+        sortedTypes = self.packetTypes[order]
+        typeIDs, starts = np.unique(sortedTypes, return_index=True)
+        self.packetIndex = {int(typeID): offsetGroup for typeID, offsetGroup in 
+                            zip(typeIDs, np.split(self.packetOffsets[order], starts[1:]))}
 
-    
-    def all(self, csv=False):
-        '''Creates a dataframe of all messages in the self.messages property. 
-        Returns dataframe. Saves dataFrame as .csv if csv is set True. CSV is
-        saved to same directory as .bin file.
+    def __scanPackets(self, binMap, offsets, types, start=0, stop=None, progress=None, inChain=False, endOfFile=True):
+        '''Walks the packets in the memory-mapped file. After each packet the next packet header is
+        expected right away, if it is not there binMap.find() jumps straight to the next header.
+        Header bytes found this way can just as well be part of damaged data, so such a packet is only
+        kept if its Message Type ID is known and another packet header follows it. Rejected headers are
+        skipped over, see damageReport(). A scan that resumes where an earlier scan stopped has to pass
+        the packet chain on with inChain, or it keeps different packets than one scan of the whole file.
 
         Args:
-            csv (bool): (Optional) Set to True if you want the resulting dataFrame to be exported 
-                        and saved as a .csv, default False.
+            binMap (mmap): Memory-map of the .bin file, or a block of bytes read from it.
+            offsets (array): Appends the byte offset of each packet to this array.
+            types (array): Appends the Message Type ID of each packet to this array.
+            start (int): (Optional) Offset to start searching for a packet header at, default 0.
+            stop (int): (Optional) Only packets starting before this offset are scanned, default None scans to the end.
+            progress (function): (Optional) Called as progress(offset, packets) every PROGRESS_BYTES bytes, default None.
+            inChain (bool): (Optional) True if start is the end of a kept packet, see __chainEnd(), default False.
+            endOfFile (bool): (Optional) False if binMap is a block that the file continues after, default True.
+        Modifies:
+            self.msgFormat: Updates the msgFormat dictionnary with additional message formats
+            self.FMT2ID: Updates the FMT2ID dictionary with additional Message Type Name: Mssage Type ID pairs.
+        Return:
+            (int): Offset where scanning stopped, the start of the next packet. Any packet starting there
+                   is either at or past stop, or cut off by the end of binMap.
+        '''
+        header = self.packetHeader
+        fmtTypeID = self.FMT2ID['FMT']
+        msgFormat = self.msgFormat
+        fileSize = len(binMap)
+        stop = fileSize if stop is None else min(stop, fileSize)
+        inChain = inChain and binMap[start:start+2] == header   #True while each packet ends right on the header of the next one
+        pos = start if inChain else binMap.find(header, start)
+        nextReport = pos+ArduPilotLog.PROGRESS_BYTES if progress is not None else fileSize
+        while pos != -1 and pos < stop and pos+3 <= fileSize:
+            msgTypeID = binMap[pos+2]
+            fmt = msgFormat.get(msgTypeID)
+            if fmt is None:     #unknown or garbage Message Type ID
+                pos = binMap.find(header, pos+1)
+                inChain = False
+                continue
+            end = pos+fmt[1]
+            if end > fileSize:  #truncated final packet
+                break
+            if not inChain and end+2 > fileSize and not endOfFile:    #the next header is in the next block
+                break
+            if not inChain and binMap[end:end+2] != header[:fileSize-end]:  #not followed by a packet header
+                pos = binMap.find(header, pos+1)
+                continue
+            if msgTypeID == fmtTypeID:
+                fmtData = self.__decodePacket(msgTypeID, binMap[pos+3:end])
+                if not self.__validFormat(fmtData):
+                    pos = binMap.find(header, pos+1)
+                    inChain = False
+                    continue
+                self.__registerFormat(fmtData)
+            offsets.append(pos)
+            types.append(msgTypeID)
+            pos = end
+            inChain = binMap[pos:pos+2] == header
+            if not inChain:
+                pos = binMap.find(header, pos)
+            if pos >= nextReport:
+                progress(pos, len(offsets))
+                nextReport = pos+ArduPilotLog.PROGRESS_BYTES
+        if pos == -1:   #the last byte could still be the first half of a packet header
+            pos = max(fileSize-1, 0)
+        return min(pos, fileSize)
+
+    def __chainEnd(self, offsets, types):
+        '''Returns the offset right after the last of the scanned packets, -1 if there are none.'''
+        if len(offsets) == 0:
+            return -1
+        return int(offsets[-1]) + self.msgFormat[int(types[-1])][1]
+
+    def __findFormats(self, binMap):
+        '''Finds the FMT messages anywhere in the file without walking the packets, by searching for
+        the packet header followed by the FMT Message Type ID. A match only counts if it decodes to a
+        valid format and the packet is followed by another packet header or the end of the file.
+
+        Args:
+            binMap (mmap): Memory-map of the .bin file.
         Modifies:
+            self.msgFormat: Updates the msgFormat dictionnary with the message formats found.
+            self.FMT2ID: Updates the FMT2ID dictionary with the Message Type Name: Mssage Type ID pairs found.
+        Return:
             None
-        Returns:
-            (DataFrame): A dataFrame consisting of messages beloning only to the specified message type.
-                         Each row is an indivitual message. 
+        '''
+        fmtTypeID = self.FMT2ID['FMT']
+        fmtPattern = self.packetHeader + bytes([fmtTypeID])
+        packetLength = self.msgFormat[fmtTypeID][1]
+        fileSize = len(binMap)
+        pos = binMap.find(fmtPattern)
+        while pos != -1 and pos+packetLength <= fileSize:
+            nextHeader = binMap[pos+packetLength:pos+packetLength+2]
+            if nextHeader == self.packetHeader or pos+packetLength == fileSize:
+                fmtData = self.__decodePacket(fmtTypeID, binMap[pos+3:pos+packetLength])
+                if self.__validFormat(fmtData):
+                    self.__registerFormat(fmtData)
+            pos = binMap.find(fmtPattern, pos+1)
+
+    def __syncPosition(self, binMap, start, stop):
+        '''Finds the first packet header at or after start whose packet length, taken from msgFormat,
+        lands on another packet header for SYNC_DEPTH packets in a row. This resynchronises a scan
+        that starts in the middle of the file, where header bytes can also show up inside message data.
 
+        Args:
+            binMap (mmap): Memory-map of the .bin file.
+            start (int): Offset to start searching at.
+            stop (int): Headers at or past this offset are not checked.
+        Modifies:
+            None
+        Return:
+            (int): Offset of the first confirmed packet header, or stop if there is none before stop.
         '''
-        metaHeaders = ['Date','UTC','MsgType']
-        fmtHeaders = self.msgFormat[self.FMT2ID['FMT']][4].split(",")
-        data = [[msg.date.strftime('%Y-%m-%d'), msg.timeUTC.strftime('%H:%M:%S.%f'), msg.type, *msg.data] for msg in self.messages]
-        df=pd.DataFrame(data=data)
-        columnHeaders = df.columns.tolist()
-        columnHeaders[0:(len(metaHeaders)+len(fmtHeaders))]=metaHeaders+fmtHeaders
-        df.columns=columnHeaders
-        if csv:
-            filename=self.fileName[0:-4]+"_ALL.csv"
-            df.to_csv(filename,index=False)
-            print(f'CSV saved to {filename}.')
-        return df
-    
-    def getMessageTypes(self):
-        '''Returns a list of all Message Type Names what are present in the log.
+        header = self.packetHeader
+        fileSize = len(binMap)
+        pos = binMap.find(header, start)
+        while pos != -1 and pos < stop:
+            chainPos = pos
+            for i in range(ArduPilotLog.SYNC_DEPTH):
+                fmt = self.msgFormat.get(binMap[chainPos+2]) if chainPos+3 <= fileSize else None
+                if fmt is None:
+                    break
+                chainPos += fmt[1]
+                if chainPos >= fileSize or binMap[chainPos:chainPos+2] != header:
+                    break
+            else:
+                return pos
+            if fmt is not None and chainPos >= fileSize:    #chain ran into the end of the file
+                return pos
+            pos = binMap.find(header, pos+1)
+        return stop
+
+    @staticmethod
+    def _scanShard(fileName, msgFormat, start, stop):
+        '''Process pool entry point for parse(workers=...). Scans the packets that start in one byte
+        range of the file.
+
         Args:
+            fileName (string): Filepath to the .bin file.
+            msgFormat (dict): Message formats of the whole log, see __findFormats().
+            start (int): Offset the byte range starts at.
+            stop (int): Offset the byte range ends at.
+        Modifies:
             None
+        Return:
+            (tuple): (packet offsets bytes, Message Type IDs bytes, offset of the first packet after the range)
+        '''
+        log = ArduPilotLog(fileName)
+        log.msgFormat = msgFormat
+        log.FMT2ID = {fmt[2]: msgTypeID for msgTypeID, fmt in msgFormat.items()}
+        offsets, types = array('q'), array('B')
+        log.__mapFile()
+        with log:
+            pos = log.__syncPosition(log.__binMap, start, stop) if start > 0 else 0
+            nextPos = log.__scanPackets(log.__binMap, offsets, types, pos, stop)
+        return offsets.tobytes(), types.tobytes(), nextPos
+
+    @staticmethod
+    def _decodeShard(fileName, msgFormat, msgTypeID, offsets):
+        '''Process pool entry point for parse(workers=...). Decodes packets of one message type.
+        Args:
+            fileName (string): Filepath to the .bin file.
+            msgFormat (dict): Message formats of the whole log.
+            msgTypeID (int): Integer representation of the Message Type ID of all the packets.
+            offsets (np.ndarray): Byte offsets of the packets to decode.
         Modifies:
             None
         Return:
-            (list): List of Message Type Names present in the log
+            (list): One np.ndarray per data field, see __decodeColumns().
         '''
-        return list(self.FMT2ID.keys())
-    
+        log = ArduPilotLog(fileName)
+        log.msgFormat = msgFormat
+        with log:
+            return log.__decodeColumns(msgTypeID, offsets)
+
+    def __buildIndexParallel(self, executor, workers):
+        '''Builds the same packet index as buildIndex() with a process pool. The FMT messages are
+        found first so every worker knows all packet lengths, then the file is split into byte ranges
+        that are scanned in parallel. Each range picks up where the packet chain of the range before
+        it ends; if a worker resynchronised on a different packet, that range is rescanned here,
+        carrying the packet chain over from the range before it.
+
+        Args:
+            executor (ProcessPoolExecutor): Process pool to scan with.
+            workers (int): Number of worker processes.
+        Modifies:
+            See buildIndex().
+        Return:
+            None
+        '''
+        self.__closeFile()
+        self.__columns = {}
+        self.__textCodes = {}
+        self.__timestamps = {}
+        self.__timeIndex = {}
+        self.__mapFile()
+        if self.__binMap is None:
+            self.__setIndex(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8))
+            return
+        knownFMT2ID, knownFormat = dict(self.FMT2ID), dict(self.msgFormat)
+        self.__findFormats(self.__binMap)
+        numShards = workers*ArduPilotLog.SHARDS_PER_WORKER
+        bounds = [self.fileSize*i//numShards for i in range(numShards+1)]
+        shards = list(executor.map(ArduPilotLog._scanShard, [self.fileName]*numShards, [self.msgFormat]*numShards, bounds[:-1], bounds[1:]))
+        allOffsets, allTypes = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.uint8)]
+        pos = self.__binMap.find(self.packetHeader)
+        pos = self.fileSize if pos == -1 else pos
+        tic = time.perf_counter()
+        numPackets = 0
+        chainEnd = -1
+        for (offsetBytes, typeBytes, nextPos), stop in zip(shards, bounds[1:]):
+            self.__reportProgress('scan', stop, self.fileSize, numPackets, tic)
+            if pos >= stop:     #a packet of the ranges before already reaches past this range
+                continue
+            offsets = np.frombuffer(offsetBytes, dtype=np.int64)
+            types = np.frombuffer(typeBytes, dtype=np.uint8)
+            if len(offsets) == 0 or offsets[0] != pos:     #out of step with the range before it
+                offsets, types = array('q'), array('B')
+                nextPos = self.__scanPackets(self.__binMap, offsets, types, pos, stop, inChain=pos == chainEnd)
+                offsets, types = np.frombuffer(offsets, dtype=np.int64), np.frombuffer(types, dtype=np.uint8)
+            allOffsets.append(offsets)
+            allTypes.append(types)
+            numPackets += len(offsets)
+            chainEnd = self.__chainEnd(offsets, types) if len(offsets) else chainEnd
+            pos = nextPos
+        self.__setIndex(np.concatenate(allOffsets), np.concatenate(allTypes))
+        #register the formats from the FMT packets actually in the packet chain, the same as a serial scan
+        self.FMT2ID, self.msgFormat = knownFMT2ID, knownFormat
+        fmtTypeID = self.FMT2ID['FMT']
+        for offset in self.__typeOffsets(fmtTypeID).tolist():
+            self.__registerFormat(self.__decodePacket(fmtTypeID, self.__binMap[offset+3:offset+self.msgFormat[fmtTypeID][1]]))
+
+    def __decodeParallel(self, executor, msgTypeIDs):
+        '''Decodes message types with a process pool, splitting large message types into chunks of
+        PARALLEL_CHUNK packets, and joins the chunks back together in file order.
+
+        Args:
+            executor (ProcessPoolExecutor): Process pool to decode with.
+            msgTypeIDs (list): Message Type IDs to decode.
+        Modifies:
+            self.__columns: Caches the decoded columns of each message type.
+        Return:
+            None
+        '''
+        tasks = [(msgTypeID, self.__typeOffsets(msgTypeID)[start:start+ArduPilotLog.PARALLEL_CHUNK])
+                 for msgTypeID in msgTypeIDs if msgTypeID not in self.__columns
+                 for start in range(0, max(len(self.__typeOffsets(msgTypeID)), 1), ArduPilotLog.PARALLEL_CHUNK)]
+        totalBytes = sum(len(offsets)*self.msgFormat[msgTypeID][1] for msgTypeID, offsets in tasks)
+        decodedBytes = decodedPackets = 0
+        tic = time.perf_counter()
+        with self.__phase('decode'):
+            results = executor.map(ArduPilotLog._decodeShard, [self.fileName]*len(tasks), [self.msgFormat]*len(tasks),
+                                   [msgTypeID for msgTypeID, offsets in tasks], [offsets for msgTypeID, offsets in tasks])
+            chunks = {}
+            for (msgTypeID, offsets), columns in zip(tasks, results):
+                chunks.setdefault(msgTypeID, []).append(columns)
+                decodedBytes += len(offsets)*self.msgFormat[msgTypeID][1]
+                decodedPackets += len(offsets)
+                self.__reportProgress('decode', decodedBytes, totalBytes, decodedPackets, tic)
+            for msgTypeID, typeChunks in chunks.items():
+                self.__columns[msgTypeID] = [np.concatenate(fieldChunks) for fieldChunks in zip(*typeChunks)]
+
+    def __cachePath(self):
+        '''Returns the parse cache entry directory of this log, one per absolute file path.'''
+        return os.path.join(self.cacheDir, hashlib.sha1(os.path.abspath(self.fileName).encode()).hexdigest())
+
+    def __fileHash(self):
+        '''Returns the BLAKE2 hash of the content of the .bin file.'''
+        fileHash = hashlib.blake2b(digest_size=20)
+        binMap = self.__buffer()
+        if binMap is not None:
+            fileHash.update(binMap)
+        return fileHash.hexdigest()
+
+    def __writeCache(self):
+        '''Saves the packet index, the decoded columns and time stamps of every message type, and
+        msgFormat/FMT2ID to the cache entry of this log. Each array is its own .npy file so it can be
+        memory-mapped on reopen, text columns are saved as fixed width strings. The entry is written to
+        a temporary directory and renamed into place, so other processes sharing the cache never see
+        half an entry. Does nothing without a cacheDir.
+
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            None
+        '''
+        if self.cacheDir is None:
+            return
+        os.makedirs(self.cacheDir, exist_ok=True)
+        stat = os.stat(self.fileName)
+        manifest = {'fileName': os.path.abspath(self.fileName), 'fileSize': stat.st_size, 'mtime': stat.st_mtime_ns,
+                    'hash': self.__fileHash(), 'FMT2ID': self.FMT2ID, 'msgFormat': list(self.msgFormat.values()), 'types': {}}
+        tempPath = tempfile.mkdtemp(dir=self.cacheDir, prefix='.tmp')
+        try:
+            np.save(os.path.join(tempPath, 'packetOffsets.npy'), self.packetOffsets)
+            np.save(os.path.join(tempPath, 'packetTypes.npy'), self.packetTypes)
+            for msgTypeID in self.packetIndex:
+                for indx, column in enumerate(self.__typeColumns(msgTypeID)):
+                    if column.dtype == object:
+                        column = column.astype(str) if len(column) else column.astype('U1')
+                    np.save(os.path.join(tempPath, f'{msgTypeID}_{indx}.npy'), column)
+                np.save(os.path.join(tempPath, f'{msgTypeID}_time.npy'), self.__typeTimestamps(msgTypeID))
+                np.save(os.path.join(tempPath, f'{msgTypeID}_offsets.npy'), self.__typeOffsets(msgTypeID))
+                manifest['types'][msgTypeID] = len(self.msgFormat[msgTypeID][3])
+            with open(os.path.join(tempPath, 'manifest.json'), 'w') as manifestFile:
+                json.dump(manifest, manifestFile)
+            entryPath = self.__cachePath()
+            shutil.rmtree(entryPath, ignore_errors=True)
+            os.replace(tempPath, entryPath)
+        except OSError:
+            shutil.rmtree(tempPath, ignore_errors=True)
+            return
+        self.__evictCache(keep=entryPath)
+
+    def __loadCache(self):
+        '''Reopens the log from its cache entry. The entry is only used if the file size and
+        modification time still match, or, when only the modification time changed, the content
+        hash still matches. The arrays are memory-mapped so nothing is read until it is used.
+
+        Args:
+            None
+        Modifies:
+            self.fileSize, self.msgFormat, self.FMT2ID: Set from the cache manifest.
+            self.packetOffsets, self.packetTypes, self.packetIndex: See buildIndex().
+            self.__columns, self.__timestamps: Set to the memory-mapped arrays of every message type.
+        Return:
+            (bool): True if the log was loaded from the cache.
+        '''
+        if self.cacheDir is None:
+            return False
+        entryPath = self.__cachePath()
+        try:
+            with open(os.path.join(entryPath, 'manifest.json')) as manifestFile:
+                manifest = json.load(manifestFile)
+            stat = os.stat(self.fileName)
+            if manifest['fileSize'] != stat.st_size:
+                return False
+            if manifest['mtime'] != stat.st_mtime_ns:   #touched or copied, check the content is unchanged
+                self.__closeFile()
+                self.__mapFile()
+                if manifest['hash'] != self.__fileHash():
+                    return False
+                manifest['mtime'] = stat.st_mtime_ns
+                with open(os.path.join(entryPath, 'manifest.json'), 'w') as manifestFile:
+                    json.dump(manifest, manifestFile)
+            self.__closeFile()
+            self.packetOffsets = np.load(os.path.join(entryPath, 'packetOffsets.npy'), mmap_mode='r')
+            self.packetTypes = np.load(os.path.join(entryPath, 'packetTypes.npy'), mmap_mode='r')
+            self.packetIndex, self.__columns, self.__timestamps, self.__timeIndex = {}, {}, {}, {}
+            for msgTypeID, numFields in manifest['types'].items():
+                msgTypeID = int(msgTypeID)
+                self.packetIndex[msgTypeID] = np.load(os.path.join(entryPath, f'{msgTypeID}_offsets.npy'), mmap_mode='r')
+                self.__columns[msgTypeID] = [np.load(os.path.join(entryPath, f'{msgTypeID}_{indx}.npy'), mmap_mode='r') for indx in range(numFields)]
+                self.__timestamps[msgTypeID] = np.load(os.path.join(entryPath, f'{msgTypeID}_time.npy'), mmap_mode='r')
+            os.utime(os.path.join(entryPath, 'manifest.json'))     #marks the entry as recently used
+        except (OSError, ValueError, KeyError):
+            return False
+        self.fileSize = stat.st_size
+        self.FMT2ID = manifest['FMT2ID']
+        self.msgFormat = {fmt[0]: fmt for fmt in manifest['msgFormat']}
+        return True
+
+    def __evictCache(self, keep=None):
+        '''Removes the least recently used cache entries until the cache directory is no larger than
+        CACHE_MAX_BYTES. Entries that disappear while this runs, e.g. evicted by another process, are skipped.
+
+        Args:
+            keep (string): (Optional) Entry directory that is never removed, default None.
+        Modifies:
+            None
+        Return:
+            None
+        '''
+        entries = []
+        for entry in os.scandir(self.cacheDir):
+            try:
+                if entry.is_dir() and not entry.name.startswith('.tmp'):
+                    lastUsed = os.stat(os.path.join(entry.path, 'manifest.json')).st_mtime
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((lastUsed, size, entry.path))
+            except OSError:
+                continue
+        totalSize = sum(size for lastUsed, size, path in entries)
+        for lastUsed, size, path in sorted(entries):
+            if totalSize <= ArduPilotLog.CACHE_MAX_BYTES:
+                break
+            if path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+                totalSize -= size
+
+    def publish(self, types=None):
+        '''Copies the decoded columns, time stamps and packet index of the log into one shared memory
+        block, so other processes can attach() to them without parsing the log again or receiving a
+        pickled copy. Text columns are stored as fixed width strings, the same as the parse cache.
+        The block stays until unpublish() or close() is called, or the with block of the log ends.
+
+        Args:
+            types (list): (Optional) Message Type Names to publish, default None publishes every message type.
+                          Message types left out are decoded from the .bin file by the attached processes on request.
+        Modifies:
+            self.__columns, self.__timestamps: Decodes the published message types if they are not decoded yet.
+        Return:
+            (dict): Small, picklable descriptor to hand to ArduPilotLog.attach() in the other processes: the
+                    shared memory name, fileName, FMT2ID, msgFormat and the (offset, dtype, shape) of every array.
+        '''
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        msgTypeIDs = list(self.packetIndex) if types is None else [self.FMT2ID[msgType] for msgType in types if self.FMT2ID.get(msgType) in self.packetIndex]
+        arrays = {'packetOffsets': self.packetOffsets, 'packetTypes': self.packetTypes}
+        arrays.update({f'{msgTypeID}_offsets': offsets for msgTypeID, offsets in self.packetIndex.items()})
+        for msgTypeID in msgTypeIDs:
+            for indx, column in enumerate(self.__typeColumns(msgTypeID)):
+                if column.dtype == object:
+                    column = column.astype(str) if len(column) else column.astype('U1')
+                arrays[f'{msgTypeID}_{indx}'] = column
+            arrays[f'{msgTypeID}_time'] = self.__typeTimestamps(msgTypeID)
+        layout = {}
+        size = 0
+        for key, values in arrays.items():
+            layout[key] = (size, values.dtype.str, values.shape)
+            size += -(-values.nbytes//64)*64    #each array starts on a 64 byte boundary
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, values in arrays.items():
+            offset, dtype, shape = layout[key]
+            np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = values
+        self.__published.append(block)
+        return {'name': block.name, 'fileName': self.fileName, 'fileSize': self.fileSize, 'FMT2ID': dict(self.FMT2ID),
+                'msgFormat': list(self.msgFormat.values()), 'types': {msgTypeID: len(self.msgFormat[msgTypeID][3]) for msgTypeID in msgTypeIDs},
+                'arrays': layout}
+
+    def unpublish(self):
+        '''Frees the shared memory blocks created by publish(). Processes still attached keep their
+        mapping until they close() their log or exit, the memory is released after that. close()
+        calls this too.
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            None
+        '''
+        for block in self.__published:
+            block.close()
+            block.unlink()
+        self.__published = []
+
+    @staticmethod
+    def attach(descriptor):
+        '''Opens a log published by another process, see publish(). The columns, time stamps and packet
+        index are read only NumPy arrays laid over the shared memory, nothing is copied or parsed, and
+        filter(), align(), all() and the rest work right away. Message types that were not published
+        are decoded from the .bin file on request. close() the log, or use it in a with block, to
+        unmap the block again once done.
+
+        Args:
+            descriptor (dict): Returned by publish().
+        Modifies:
+            None
+        Return:
+            (ArduPilotLog): The attached log.
+        '''
+        log = ArduPilotLog(descriptor['fileName'])
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=descriptor['name'], track=False)
+        else:   #before 3.13 attaching registers the block to be freed at exit, only the publishing process may free it
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                block = shared_memory.SharedMemory(name=descriptor['name'])
+            finally:
+                resource_tracker.register = register
+        def view(key):
+            offset, dtype, shape = descriptor['arrays'][key]
+            #frombuffer holds the buffer of the block, so close() fails instead of unmapping arrays still in use
+            values = np.frombuffer(block.buf, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+            values.flags.writeable = False
+            return values
+        log.__attached = block
+        log.fileSize = descriptor['fileSize']
+        log.FMT2ID = dict(descriptor['FMT2ID'])
+        log.msgFormat = {fmt[0]: list(fmt) for fmt in descriptor['msgFormat']}
+        log.packetOffsets = view('packetOffsets')
+        log.packetTypes = view('packetTypes')
+        log.packetIndex = {int(key.split('_')[0]): view(key) for key in descriptor['arrays'] if key.endswith('_offsets')}
+        for msgTypeID, numFields in descriptor['types'].items():
+            log.__columns[int(msgTypeID)] = [view(f'{msgTypeID}_{indx}') for indx in range(numFields)]
+            log.__timestamps[int(msgTypeID)] = view(f'{msgTypeID}_time')
+        return log
+
+    def arrays(self, msgType):
+        '''Returns the decoded columns of one message type as NumPy arrays, without building a
+        dataFrame or copying them, e.g. the shared memory arrays of an attached log. Unlike filter(),
+        TimeUS is in microseconds, as logged, and text fields of a published log are fixed width strings.
+        The arrays of an attached log point into shared memory, delete them before close().
+
+        Args:
+            msgType (string): Message Type Name.
+        Modifies:
+            self.__columns, self.__timestamps: Decodes the message type if it is not decoded yet.
+        Return:
+            (dict): Column header: np.ndarray, plus datetime_UTC, an empty dict if the message type is not in the log.
+        '''
+        msgTypeID = self.FMT2ID.get(msgType)
+        if msgTypeID is None:
+            return {}
+        columns = dict(zip(self.msgFormat[msgTypeID][4].split(','), self.__typeColumns(msgTypeID)))
+        return {'datetime_UTC': self.__typeTimestamps(msgTypeID), **columns}
+
+    def parse(self, verbose=False, lazy=False, types=None, workers=None, progress=None, profile=False):
+        '''This decodes the binary into usable data and stores all the messages in a list of message objects. 
+        The list of messages will include both FMT messages and non-FMT messages.
+
+        Reading from disk one packet at a time is a relatively time expensive process, so the packet
+        offsets are first found with buildIndex(), which memory-maps the file. Each message type is
+        then decoded in one step straight from the memory-map, see __decodeColumns(), and the
+        Message objects are built from those columns.
+
+        When lazy is True only the FMT messages are decoded. Every other message type is decoded the
+        first time it is requested, e.g. by filter(), and is then kept for later requests. Giving a
+        list of types decodes only those message types up front. In both cases self.messages is
+        built lazily, on first attribute access.
+
+        With workers set, the packet scan and the decoding are split across a pool of worker
+        processes. The result is identical to a parse in a single process.
+
+        With a cacheDir, a full parse saves the decoded log there and any later parse of the
+        unchanged file memory-maps the saved columns instead of parsing again, see __loadCache().
+
+        Where the time goes is recorded in self.parseStats, see below, and typeStats(). The progress
+        callback gets a dictionary with the phase, 'scan' or 'decode', the bytes done and the total
+        bytes of that phase, the packets done, the rate in bytes per second and the ETA in seconds of
+        the phase (None until there is a rate). The scan reports every PROGRESS_BYTES bytes, the decode
+        after every message type, or chunk with workers.
+
+        Args:
+            verbose (bool): (Optional) Set to True if you want parsing progress to be printed to terminal, default False.
+            lazy (bool): (Optional) Set to True to decode message types on first request, default False.
+            types (list): (Optional) Message Type Names to decode up front, default None decodes every message type.
+            workers (int): (Optional) Number of worker processes, default None parses in this process.
+            progress (function): (Optional) Called with a progress dictionary, see above, default None. Replaces the
+                                 percentages printed by verbose.
+            profile (bool or cProfile.Profile): (Optional) Set to True to run the parse under cProfile, or give a
+                                                profiler to add this parse to it, default False.
+        Modifies:
+            self.messages: Replaced by a MessageStore of Message objects with their date and time properties.
+            self.msgFormat: Updates the msgFormat dictionnary with additional message formats
+            self.FMT2ID: Updates the FMT2ID dictionary with additional Message Type Name: Mssage Type ID pairs.
+            self.packetOffsets, self.packetTypes, self.packetIndex: See buildIndex().
+            self.parseStats: Reset and filled with {'seconds': wall time of the parse, 'phases': {phase: seconds},
+                             'typeSeconds': {Message Type ID: decode seconds}, 'profile': pstats.Stats or None}.
+                             The phases are cacheLoad, scan, decode, times (UTC time reconstruction), messages,
+                             cacheWrite and frame (dataFrame building). Message types decoded on demand later,
+                             e.g. by filter(), keep adding to phases and typeSeconds.
+        Return: 
+            None
+        '''
+        self.parseStats = {'seconds': None, 'phases': {}, 'typeSeconds': {}, 'profile': None}
+        self.__progress = progress if progress is not None or not verbose else self.__printProgress
+        profiler = None
+        if profile:
+            profiler = profile if isinstance(profile, cProfile.Profile) else cProfile.Profile()
+            profiler.enable()
+        tic = time.perf_counter()
+        try:
+            self.__parse(verbose, lazy, types, workers)
+        finally:
+            self.parseStats['seconds'] = time.perf_counter()-tic
+            if profiler is not None:
+                profiler.disable()
+                self.parseStats['profile'] = pstats.Stats(profiler)
+            self.__progress = None
+        if verbose: print(f'\rParsing: {100.0}%{"":<40}')
+        if verbose:
+            damage = self.damageReport()
+            if damage['skippedBytes']:
+                print(f"Damaged log: skipped {damage['skippedBytes']} bytes in {len(damage['skippedRanges'])} places, {damage['badPackets']} bad packets")
+
+    def __parse(self, verbose, lazy, types, workers):
+        '''Runs parse(), see parse() for the arguments.'''
+        with self.__phase('cacheLoad'):
+            cached = self.__loadCache()
+        if cached:
+            self.__messages = []
+            if types is None and not lazy:
+                self.__buildMessages()
+            return
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                with self.__phase('scan'):
+                    self.__buildIndexParallel(executor, workers)
+                self.__decodeParallel(executor, self.__parseTypeIDs(lazy, types))
+        else:
+            with self.__phase('scan'):
+                self.buildIndex()
+        self.__messages = []
+        msgTypeIDs = [msgTypeID for msgTypeID in self.__parseTypeIDs(lazy, types) if msgTypeID not in self.__columns]
+        totalBytes = sum(len(self.__typeOffsets(msgTypeID))*self.msgFormat[msgTypeID][1] for msgTypeID in msgTypeIDs)
+        decodedBytes = decodedPackets = 0
+        tic = time.perf_counter()
+        for msgTypeID in msgTypeIDs:
+            self.__typeColumns(msgTypeID)
+            decodedBytes += len(self.__typeOffsets(msgTypeID))*self.msgFormat[msgTypeID][1]
+            decodedPackets += len(self.__typeOffsets(msgTypeID))
+            self.__reportProgress('decode', decodedBytes, totalBytes, decodedPackets, tic)
+        if types is None and not lazy:
+            self.__buildMessages()
+            with self.__phase('cacheWrite'):
+                self.__writeCache()
+
+    @contextlib.contextmanager
+    def __phase(self, name):
+        '''Adds the wall time spent in the with block to self.parseStats['phases'][name].'''
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = self.parseStats['phases']
+            phases[name] = phases.get(name, 0.0) + time.perf_counter()-tic
+
+    def __reportProgress(self, phase, done, total, packets, tic):
+        '''Calls the progress callback of the running parse(), if there is one.
+        Args:
+            phase (string): 'scan' or 'decode'.
+            done (int): Bytes of the phase done so far.
+            total (int): Bytes of the whole phase.
+            packets (int): Packets done so far.
+            tic (float): time.perf_counter() at the start of the phase.
+        Modifies:
+            None
+        Return:
+            None
+        '''
+        if self.__progress is None:
+            return
+        seconds = time.perf_counter()-tic
+        rate = done/seconds if seconds > 0 else 0.0
+        self.__progress({'phase': phase, 'bytes': done, 'totalBytes': total, 'packets': packets,
+                         'rate': rate, 'eta': (total-done)/rate if rate else None})
+
+    def __printProgress(self, progress):
+        '''Progress callback of parse(verbose=True).'''
+        percent = round(progress['bytes']/max(progress['totalBytes'], 1)*100, 1)
+        eta = f", {progress['eta']:.1f} s left" if progress['eta'] is not None else ''
+        print(f"\rParsing ({progress['phase']}): {percent}%{eta}{'':<10}", end='')
+
+    class ParseCancelled(Exception):  #ArduPilotLog.ParseCancelled
+        '''Raised inside a parse() that parseAsync() was asked to cancel, at its next progress report.'''
+
+    async def parseAsync(self, lazy=False, types=None, workers=None, executor=None, progress=None):
+        '''Runs parse() in a thread so the asyncio event loop stays responsive, e.g. in a web service.
+        The Python level scanning holds the GIL, for large logs give workers to move the scanning and
+        decoding into worker processes. Do not use the log from other tasks until it finishes.
+
+        Progress is reported with the dictionaries of parse(progress=...), delivered on the event
+        loop. The parse thread waits for each report to be handled, so progress can also be used
+        for backpressure. Cancelling the task stops the parse at its next progress report, see
+        parse(), and raises asyncio.CancelledError once the thread has stopped. Message types
+        decoded before that stay decoded.
+
+        Args:
+            lazy (bool): (Optional) See parse(), default False.
+            types (list): (Optional) See parse(), default None.
+            workers (int): (Optional) See parse(), default None.
+            executor (ThreadPoolExecutor): (Optional) Thread pool to run parse() in, default None uses the event
+                                           loop's default executor. parse() changes this log object, so it can
+                                           not run in a process pool, use workers for that.
+            progress (function): (Optional) Called on the event loop with each progress dictionary, may be a
+                                 coroutine function, default None.
+        Modifies:
+            See parse().
+        Return:
+            None
+        '''
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError('parseAsync() needs a thread pool, parse(workers=...) uses a process pool for the heavy work')
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+
+        async def deliver(update):
+            if progress is not None:
+                result = progress(update)
+                if inspect.isawaitable(result):
+                    await result
+            await asyncio.sleep(0)  #lets a cancel() from the callback reach parseAsync() before the thread goes on
+            return cancelled.is_set()
+
+        def report(update):     #runs in the parse thread
+            if asyncio.run_coroutine_threadsafe(deliver(update), loop).result():
+                raise ArduPilotLog.ParseCancelled()
+
+        future = loop.run_in_executor(executor, functools.partial(self.parse, lazy=lazy, types=types, workers=workers, progress=report))
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            await asyncio.wait({future})    #the thread stops at its next progress report
+            if not future.cancelled():
+                future.exception()  #ParseCancelled, or the error it stopped with, is replaced by the cancel
+            raise
+
+    def __parseTypeIDs(self, lazy, types):
+        '''Returns the Message Type IDs parse() decodes up front.'''
+        if types is not None:
+            return [self.FMT2ID[msgType] for msgType in types if msgType in self.FMT2ID]
+        if lazy:
+            return []
+        return list(self.packetIndex)
+
+    def __typeOffsets(self, msgTypeID):
+        '''Returns the packet offsets of one message type, an empty array if it was never logged.'''
+        offsets = self.packetIndex.get(msgTypeID)
+        return offsets if offsets is not None else np.empty(0, dtype=np.int64)
+
+    def __typeColumns(self, msgTypeID):
+        '''Returns the decoded columns of one message type, decoding the message type on first request.
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID.
+        Modifies:
+            self.__columns: Caches the decoded columns of the message type.
+        Return:
+            (list): One np.ndarray per data field, see __decodeColumns().
+        '''
+        columns = self.__columns.get(msgTypeID)
+        if columns is None:
+            tic = time.perf_counter()
+            textCodes = {}
+            with self.__phase('decode'):
+                columns = self.__decodeColumns(msgTypeID, self.__typeOffsets(msgTypeID), textCodes=textCodes)
+            self.parseStats['typeSeconds'][msgTypeID] = time.perf_counter()-tic
+            self.__columns[msgTypeID] = columns
+            self.__textCodes[msgTypeID] = {indx: (columns[indx], *codes) for indx, codes in textCodes.items()}
+        return columns
+
+    def __typeTextCodes(self, msgTypeID, fields=None, first=0, last=None):
+        '''Returns the category codes of the text fields of a decoded message type, for filter(). The
+        codes from the decode are reused, text columns decoded another way, e.g. in parallel, loaded
+        from the parse cache or attached, are factorized once on first request.
+
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID, decoded, see __typeColumns().
+            fields (list): (Optional) Indices of the data fields, default None for every data field.
+            first (int): (Optional) First message, default 0.
+            last (int): (Optional) Message after the last one, default None for the last message.
+        Modifies:
+            self.__textCodes: Caches the codes of the text columns that had none.
+        Return:
+            (dict): Data field index: (codes, categories) of the text fields in fields.
+        '''
+        columns = self.__columns[msgTypeID]
+        fmt = self.msgFormat[msgTypeID][3]
+        typeCodes = self.__textCodes.setdefault(msgTypeID, {})
+        textCodes = {}
+        for indx in (range(len(fmt)) if fields is None else fields):
+            if self.ARDU_TO_STRUCT[fmt[indx]][2] is not str:
+                continue
+            entry = typeCodes.get(indx)
+            if entry is None or entry[0] is not columns[indx]:  #codes of an older column, e.g. before update()
+                codes, categories = pd.factorize(columns[indx], sort=True)
+                entry = typeCodes[indx] = (columns[indx], self.__compactCodes(codes, len(categories)), np.asarray(categories, dtype=object))
+            textCodes[indx] = (entry[1][first:last], entry[2])
+        return textCodes
+
+    def __packetTimeUS(self, offsets, buffer=None):
+        '''Reads the TimeUS field, the first 8 bytes of the payload, of the packets at the given
+        offsets without decoding the rest of those packets.
+
+        Args:
+            offsets (np.ndarray): Byte offsets of packets that contain a run time.
+            buffer (bytes): (Optional) Block of the file to read from, default None uses the memory-map.
+        Modifies:
+            None
+        Return:
+            (np.ndarray): np.uint64 array of TimeUS values in microseconds.
+        '''
+        timeUS = np.empty(len(offsets), dtype='<u8')
+        if len(offsets) == 0:
+            return timeUS
+        binView = np.frombuffer(self.__buffer(buffer), dtype=np.uint8)
+        byteIndex = np.asarray(offsets)[:,None] + np.arange(3, 11)
+        np.take(binView, byteIndex, out=timeUS.view(np.uint8).reshape(len(offsets), 8))
+        return timeUS
+
+    def __runtimeTypes(self):
+        '''Returns a lookup table, indexed by Message Type ID, that is True for message types whose
+        first data field is the TimeUS run time.'''
+        runtimeTypes = np.zeros(256, dtype=bool)
+        runtimeTypes[[msgTypeID for msgTypeID, fmt in self.msgFormat.items() if fmt[3][:1] == 'Q']] = True
+        return runtimeTypes
+
+    def __gpsAnchors(self, gpsOffsets, buffer=None):
+        '''Decodes the run time and UTC time stamp of GPS messages.
+        Args:
+            gpsOffsets (np.ndarray): Byte offsets of GPS packets.
+            buffer (bytes): (Optional) Block of the file to read from, default None uses the memory-map.
+        Modifies:
+            None
+        Return:
+            (tuple): (np.int64 array of TimeUS run times, datetime64[ns] array of UTC time stamps)
+        '''
+        gpsTypeID = self.FMT2ID['GPS']
+        gpsColumns = self.__decodeColumns(gpsTypeID, gpsOffsets, buffer)
+        gpsHeaders = self.msgFormat[gpsTypeID][4].split(',')
+        GMS = gpsColumns[gpsHeaders.index('GMS')]
+        GWk = gpsColumns[gpsHeaders.index('GWk')]
+        return gpsColumns[0].astype(np.int64), self.__gps2utc(GWk, GMS/1000)  #convert GPS time to UTC
+
+    def __timeState(self, firstGPSOffset=None, gpsAnchor=None):
+        '''Creates the GPS time anchor that __estimateTimes() carries from one block of the file to the next.
+        Args:
+            firstGPSOffset (int): (Optional) File offset of the first GPS packet, default None when the log has no GPS messages.
+            gpsAnchor (tuple): (Optional) (TimeUS, datetime64) of the first GPS message, see __gpsAnchors().
+        Modifies:
+            None
+        Return:
+            (dict): {'firstGPSOffset', 'anchor': (TimeUS, datetime64) of the last GPS message seen,
+                     'lastTime': datetime64 of the last message with a run time, 'bufferOffset': file offset of the block}
+        '''
+        return {'firstGPSOffset': firstGPSOffset, 'anchor': gpsAnchor, 
+                'lastTime': gpsAnchor[1] if gpsAnchor else None, 'bufferOffset': 0}
+
+    def __estimateTimes(self, offsets, types, positions, state, buffer=None):
+        '''Estimates the UTC date and time of messages. The only real world time stamps we get are
+        from the GPS, so the GPS time stamps are laid over the TimeUS run time: each message gets the
+        UTC time of the nearest previous GPS message plus the run time that passed since it.
+        ArduPilot logs data even before it recieves it's first GPS ping, those messages are
+        backfilled from the first GPS message instead. Messages without a run time get the time of
+        the nearest previous message that has one, or before the first GPS message, the nearest
+        following one. All of it is done with whole array operations.
+
+        Args:
+            offsets (np.ndarray): Byte offsets of every packet in buffer, in file order.
+            types (np.ndarray): Message Type ID of every packet in buffer.
+            positions (np.ndarray): Indices into offsets of the messages to time stamp.
+            state (dict): GPS time anchor from the part of the file before buffer, see __timeState().
+            buffer (bytes): (Optional) Block of the file, default None uses the memory-map.
+        Modifies:
+            state: Updated to the last GPS message and last run time in buffer.
+        Return:
+            (np.ndarray): datetime64[ns] UTC time stamp per position, all NaT if the log has no GPS messages.
+        '''
+        if state['firstGPSOffset'] is None:
+            return np.full(len(positions), np.datetime64('NaT'), dtype='datetime64[ns]')
+        isRuntime = self.__runtimeTypes()[types]
+        runtimePositions = np.flatnonzero(isRuntime)
+        gpsPositions = np.flatnonzero(types == self.FMT2ID['GPS'])
+        gpsRunTime, GPS_datum = self.__gpsAnchors(offsets[gpsPositions], buffer)
+        #every message takes its time from the run time at its source position, -1 is the last run time before buffer
+        sources = np.asarray(positions, dtype=np.int64)
+        if len(runtimePositions):
+            sources = np.append(sources, runtimePositions[-1])   #the last run time is carried to the next block
+        nonRuntime = ~isRuntime[sources]
+        if nonRuntime.any():
+            paddedRuntime = np.concatenate(([-1], runtimePositions, [-1]))
+            following = np.searchsorted(runtimePositions, sources)
+            previous, following = paddedRuntime[following], paddedRuntime[following+1]
+            preGPS = offsets[sources]+state['bufferOffset'] < state['firstGPSOffset']
+            sources = np.where(nonRuntime, np.where(preGPS, following, previous), sources)
+        hasSource = sources >= 0
+        runTime = self.__packetTimeUS(offsets[sources[hasSource]], buffer).astype(np.int64)
+        #index -1, no GPS message before the source in buffer, picks the anchor carried from before buffer
+        anchor = np.searchsorted(gpsPositions, sources[hasSource], side='right')-1
+        anchorRunTime = np.append(gpsRunTime, state['anchor'][0])
+        anchorDatum = np.append(GPS_datum, state['anchor'][1])
+        datetimes = np.full(len(sources), state['lastTime'], dtype='datetime64[ns]')
+        datetimes[hasSource] = anchorDatum[anchor] + (runTime - anchorRunTime[anchor]).astype('timedelta64[us]')
+        if len(gpsPositions):
+            state['anchor'] = (gpsRunTime[-1], GPS_datum[-1])
+        if len(runtimePositions):
+            state['lastTime'] = datetimes[-1]
+        return datetimes[:len(positions)]
+
+    def __typeTimestamps(self, msgTypeID):
+        '''Estimates the UTC date and time of every message of one message type, see __estimateTimes().
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID.
+        Modifies:
+            self.__timestamps: Caches the time stamps of the message type.
+        Return:
+            (np.ndarray): datetime64[ns] UTC time stamp per message, all NaT if the log has no GPS messages.
+        '''
+        if msgTypeID in self.__timestamps:
+            return self.__timestamps[msgTypeID]
+        with self.__phase('times'):
+            offsets = self.__typeOffsets(msgTypeID)
+            gpsOffsets = self.__typeOffsets(self.FMT2ID.get('GPS'))[:1]
+            if len(gpsOffsets):
+                gpsRunTime, GPS_datum = self.__gpsAnchors(gpsOffsets)
+                state = self.__timeState(gpsOffsets[0], (gpsRunTime[0], GPS_datum[0]))
+            else:
+                state = self.__timeState()
+            positions = np.searchsorted(self.packetOffsets, offsets) if len(offsets) else np.empty(0, dtype=np.int64)
+            datetimes = self.__estimateTimes(self.packetOffsets, self.packetTypes, positions, state)
+        self.__timestamps[msgTypeID] = datetimes
+        return datetimes
+
+    def __datetimeStrings(self, datetimes):
+        '''Formats datetime64 time stamps as the Date 'YYYY-mm-dd' and UTC 'HH:MM:SS.ffffff' strings
+        without a strftime call per message. NaT time stamps become 'No Data'.
+
+        Args:
+            datetimes (np.ndarray): datetime64[ns] time stamps.
+        Modifies:
+            None
+        Return:
+            (tuple): (dates, times) NumPy string arrays.
+        '''
+        isoStrings = np.datetime_as_string(datetimes, unit='us').astype('U26')   #'YYYY-mm-ddTHH:MM:SS.ffffff'
+        characters = isoStrings.view('U1').reshape(len(isoStrings), 26)
+        dates = characters[:, :10].copy().view('U10').ravel()
+        times = characters[:, 11:].copy().view('U15').ravel()
+        noData = np.isnat(datetimes)
+        if noData.any():
+            dates, times = dates.astype(object), times.astype(object)
+            dates[noData] = times[noData] = 'No Data'
+        return dates, times
+
+    def __buildMessages(self):
+        '''Creates the message store, in file order, over the decoded columns. Every message type
+        that has not been decoded yet is decoded first.
+
+        Args:
+            None
+        Modifies:
+            self.messages: Replaced by a MessageStore with one message per packet.
+        Return:
+            None
+        '''
+        for msgTypeID in self.packetIndex:
+            self.__typeColumns(msgTypeID)
+            self.__typeTimestamps(msgTypeID)
+        with self.__phase('messages'):
+            self.__messages = ArduPilotLog.MessageStore(self.msgFormat, self.packetTypes, self.__columns, self.__timestamps)
+
+    def __buildFrame(self, msgTypeID, columns, datetimes, dateStrings=True, fields=None, categorical=False, textCodes=None):
+        '''Creates the dataFrame returned by filter() from decoded columns.
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID.
+            columns (list): One np.ndarray per data field, see __decodeColumns().
+            datetimes (np.ndarray): datetime64[ns] UTC time stamp of each message.
+            dateStrings (bool): (Optional) Date and UTC string columns if True, else a datetime_UTC column, default True.
+            fields (list): (Optional) Indices of the data fields in columns, default None when columns holds every data field.
+            categorical (bool): (Optional) Set to True for pandas Categorical string data fields, default False.
+            textCodes (dict): (Optional) Data field index: (codes, categories) of the string data fields, see
+                              __typeTextCodes(), default None factorizes them if categorical.
+        Modifies:
+            None
+        Return:
+            (DataFrame): Date, UTC (or datetime_UTC) and MsgType columns followed by the data fields.
+        '''
+        with self.__phase('frame'):
+            msgType = self.msgFormat[msgTypeID][2]
+            columns = list(columns)
+            fields = list(range(len(columns))) if fields is None else fields
+            if self.msgFormat[msgTypeID][3][0] == 'Q' and 0 in fields:
+                columns[fields.index(0)] = columns[fields.index(0)]*1e-6     #TimeUS is reported in seconds
+            if categorical:     #n, N, Z and a fields hold few distinct values, e.g. PARM names
+                fmt = self.msgFormat[msgTypeID][3]
+                textCodes = textCodes or {}
+                for position, indx in enumerate(fields):
+                    if indx in textCodes:
+                        columns[position] = pd.Categorical.from_codes(*textCodes[indx])
+                    elif self.ARDU_TO_STRUCT[fmt[indx]][2] is str:
+                        columns[position] = pd.Categorical(columns[position])
+            if dateStrings:
+                columnHeaders=["Date", "UTC", "MsgType"]
+                frameData = dict(enumerate([*self.__datetimeStrings(datetimes), [msgType]*len(datetimes)]))
+            else:
+                columnHeaders=["datetime_UTC", "MsgType"]
+                frameData = dict(enumerate([datetimes, [msgType]*len(datetimes)]))
+            frameData.update({indx+len(columnHeaders): column for indx, column in enumerate(columns)})
+            df=pd.DataFrame(data=frameData)
+            headers = self.msgFormat[msgTypeID][4].split(",")
+            df.columns=columnHeaders+[headers[indx] for indx in fields]
+        return df
+
+    def __findFirstGPS(self, blockSize):
+        '''Scans the file, one block at a time, up to the first GPS packet.
+        Args:
+            blockSize (int): Bytes read from the file per step.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages found before the first GPS message.
+        Return:
+            (dict): GPS time anchor of the first GPS message, see __timeState().
+        '''
+        with open(self.fileName,'rb') as binFile:
+            buffer = b''
+            bufferOffset = 0
+            inChain = False
+            while True:
+                block = binFile.read(blockSize)
+                buffer += block
+                offsets, types = array('q'), array('B')
+                resume = self.__scanPackets(buffer, offsets, types, inChain=inChain, endOfFile=len(block) < blockSize)
+                gpsTypeID = self.FMT2ID.get('GPS')
+                if gpsTypeID in types:
+                    gpsOffset = offsets[types.index(gpsTypeID)]
+                    gpsRunTime, GPS_datum = self.__gpsAnchors(np.array([gpsOffset]), buffer)
+                    return self.__timeState(bufferOffset+gpsOffset, (gpsRunTime[0], GPS_datum[0]))
+                if len(block) < blockSize:
+                    return self.__timeState()
+                inChain = self.__chainEnd(offsets, types) == resume
+                buffer = buffer[resume:]
+                bufferOffset += resume
+
+    def __iterBlocks(self, types, blockSize):
+        '''Reads the file one block at a time and decodes the packets of the requested message types
+        in each block. Only the current block and the GPS time anchor are held in memory. Messages
+        without a run time that are logged before the first GPS message take their time from the
+        next message that has one, so those are held back to the next block when they end a block.
+
+        Args:
+            types (list): Message Type Names to decode, None decodes every message type.
+            blockSize (int): Bytes read from the file per step.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages as they are read.
+        Yields:
+            (tuple): (np.ndarray of the Message Type ID of each decoded packet in file order,
+                      {msgTypeID: (columns, datetimes)}) for each block.
+        '''
+        state = self.__findFirstGPS(blockSize)
+        with open(self.fileName,'rb') as binFile:
+            buffer = b''
+            inChain = False
+            while True:
+                block = binFile.read(blockSize)
+                endOfFile = len(block) < blockSize
+                buffer += block
+                offsets, packetTypes = array('q'), array('B')
+                resume = self.__scanPackets(buffer, offsets, packetTypes, inChain=inChain, endOfFile=endOfFile)
+                offsets = np.frombuffer(offsets, dtype=np.int64)
+                packetTypes = np.frombuffer(packetTypes, dtype=np.uint8)
+                inChain = self.__chainEnd(offsets, packetTypes) == resume
+                if not endOfFile and state['firstGPSOffset'] is not None:
+                    runtimePositions = np.flatnonzero(self.__runtimeTypes()[packetTypes])
+                    tailStart = runtimePositions[-1]+1 if len(runtimePositions) else 0
+                    pending = np.flatnonzero(offsets[tailStart:]+state['bufferOffset'] < state['firstGPSOffset'])
+                    if len(pending):    #hold back until the following run time is read, the packets were kept already
+                        resume = offsets[tailStart+pending[0]]
+                        inChain = True
+                        offsets, packetTypes = offsets[:tailStart+pending[0]], packetTypes[:tailStart+pending[0]]
+                wanted = np.zeros(256, dtype=bool)
+                wanted[[msgTypeID for msgType, msgTypeID in self.FMT2ID.items() if types is None or msgType in types]] = True
+                positions = np.flatnonzero(wanted[packetTypes])
+                datetimes = self.__estimateTimes(offsets, packetTypes, positions, state, buffer)
+                typeData = {}
+                for msgTypeID in np.unique(packetTypes[positions]).tolist():
+                    selected = np.flatnonzero(packetTypes[positions] == msgTypeID)
+                    columns = self.__decodeColumns(msgTypeID, offsets[positions[selected]], buffer)
+                    typeData[msgTypeID] = (columns, datetimes[selected])
+                yield packetTypes[positions], typeData
+                if endOfFile:
+                    break
+                buffer = buffer[resume:]
+                state['bufferOffset'] += int(resume)
+
+    def aggregate(self, aggregators, blockSize=None):
+        '''Runs aggregators, see Aggregator, over the log in a single streaming pass, one block of the
+        file at a time, and returns only their results. No messages are kept, so memory use is bounded
+        by blockSize and the aggregators themselves, not the size of the log. parse() is not needed
+        first. Only the message types the aggregators ask for are decoded.
+
+        Args:
+            aggregators (dict): Result name: Aggregator, e.g. {'maxAlt': FieldStats('GPS', 'Alt')}. Use new
+                                aggregators for each call, they keep their state.
+            blockSize (int): (Optional) Bytes read from the file per step, default STREAM_BLOCK.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages as they are read.
+        Return:
+            (dict): Result name: Aggregator.result().
+        '''
+        byType = {}
+        for aggregator in aggregators.values():
+            byType.setdefault(aggregator.msgType, []).append(aggregator)
+        for packetTypes, typeData in self.__iterBlocks(list(byType), blockSize or ArduPilotLog.STREAM_BLOCK):
+            for msgTypeID, (columns, datetimes) in typeData.items():
+                fmt = self.msgFormat[msgTypeID]
+                if fmt[2] not in byType:
+                    continue
+                if fmt[3][0] == 'Q':
+                    columns = [columns[0]*1e-6, *columns[1:]]    #TimeUS is reported in seconds
+                block = {'datetime_UTC': datetimes, **dict(zip(fmt[4].split(','), columns))}
+                for aggregator in byType[fmt[2]]:
+                    aggregator.update(block)
+        return {name: aggregator.result() for name, aggregator in aggregators.items()}
+
+    def iterMessages(self, types=None, blockSize=None):
+        '''Streams the messages of the log in file order without keeping them, so memory use is
+        bounded by blockSize instead of the size of the log. parse() is not needed first.
+
+        Args:
+            types (list): (Optional) Message Type Names to return, default None returns every message type.
+            blockSize (int): (Optional) Bytes read from the file per step, default STREAM_BLOCK.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages as they are read.
+        Yields:
+            (Message): One Message object per packet, the same as the entries of self.messages.
+        '''
+        for packetTypes, typeData in self.__iterBlocks(types, blockSize or ArduPilotLog.STREAM_BLOCK):
+            yield from ArduPilotLog.MessageStore(self.msgFormat, packetTypes, {msgTypeID: columns for msgTypeID, (columns, datetimes) in typeData.items()},
+                                                 {msgTypeID: datetimes for msgTypeID, (columns, datetimes) in typeData.items()})
+
+    def iterFrames(self, msgFilterType, chunksize=100000, blockSize=None, dateStrings=True):
+        '''Streams the messages of one message type as dataFrames of at most chunksize rows. The
+        dataFrames have the same columns as filter() and memory use is bounded by chunksize and
+        blockSize instead of the size of the log. parse() is not needed first.
+
+        Args:
+            msgFilterType (string): The Message Type Name of the messages you want displayed in the dataFrames.
+            chunksize (int): (Optional) Maximum number of rows per dataFrame, default 100000.
+            blockSize (int): (Optional) Bytes read from the file per step, default STREAM_BLOCK.
+            dateStrings (bool): (Optional) See filter(), default True.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages as they are read.
+        Yields:
+            (DataFrame): Consecutive messages of the specified message type, in file order.
+        '''
+        pending = []
+        pendingRows = 0
+        for packetTypes, typeData in self.__iterBlocks([msgFilterType], blockSize or ArduPilotLog.STREAM_BLOCK):
+            msgTypeID = self.FMT2ID.get(msgFilterType)
+            if msgTypeID not in typeData:
+                continue
+            pending.append(typeData[msgTypeID])
+            pendingRows += len(typeData[msgTypeID][1])
+            while pendingRows >= chunksize:
+                columns, datetimes = self.__joinBlocks(pending)
+                yield self.__buildFrame(msgTypeID, [column[:chunksize] for column in columns], datetimes[:chunksize], dateStrings)
+                pending = [([column[chunksize:] for column in columns], datetimes[chunksize:])]
+                pendingRows -= chunksize
+        if pendingRows:
+            yield self.__buildFrame(msgTypeID, *self.__joinBlocks(pending), dateStrings)
+
+    async def iterFramesAsync(self, msgFilterType, chunksize=100000, blockSize=None, dateStrings=True, executor=None):
+        '''The asyncio version of iterFrames(): each dataFrame is read and decoded in a thread, so the
+        event loop stays responsive, e.g. async for df in log.iterFramesAsync('GPS').
+
+        Args:
+            msgFilterType (string): The Message Type Name of the messages you want displayed in the dataFrames.
+            chunksize (int): (Optional) See iterFrames(), default 100000.
+            blockSize (int): (Optional) See iterFrames(), default STREAM_BLOCK.
+            dateStrings (bool): (Optional) See filter(), default True.
+            executor (ThreadPoolExecutor): (Optional) Thread pool to read in, default None uses the event loop's default executor.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages as they are read.
+        Yields:
+            (DataFrame): Consecutive messages of the specified message type, in file order.
+        '''
+        loop = asyncio.get_running_loop()
+        frames = self.iterFrames(msgFilterType, chunksize, blockSize, dateStrings)
+        step = None
+        try:
+            while True:
+                step = loop.run_in_executor(executor, next, frames, None)
+                df = await step
+                if df is None:
+                    return
+                yield df
+        finally:
+            if step is None or step.done():     #a step still running in its thread can not be interrupted
+                frames.close()
+
+    def __joinBlocks(self, blocks):
+        '''Joins (columns, datetimes) tuples of consecutive blocks into one tuple.'''
+        columns = [np.concatenate(fieldColumns) for fieldColumns in zip(*(block[0] for block in blocks))]
+        return columns, np.concatenate([block[1] for block in blocks])
+
+    def iterIndex(self, start=0, blockSize=None):
+        '''Walks the packet headers of the memory-mapped file one block of bytes at a time and yields
+        the packet index of each block, see buildIndex(), without building or keeping the index of the
+        whole file. Meant for random access tools that only need the index up to some packet.
+
+        Args:
+            start (int): (Optional) Byte offset to start at, default 0. Away from the start of the file,
+                         the first packet header that lines up with the packets after it is used.
+            blockSize (int): (Optional) Bytes scanned per step, default STREAM_BLOCK.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with the FMT messages found, every FMT message in the
+                                         file if start is not 0.
+        Yields:
+            (tuple): (np.int64 array of packet offsets, np.uint8 array of Message Type IDs) of the packets
+                     in each block, in file order.
+        '''
+        binMap = self.__buffer()
+        if binMap is None:
+            return
+        blockSize = blockSize or ArduPilotLog.STREAM_BLOCK
+        pos = start
+        if start > 0:
+            self.__findAllFormats()
+            pos = self.__syncPosition(binMap, start, len(binMap))
+        inChain = False
+        while pos < len(binMap):
+            offsets, types = array('q'), array('B')
+            stop = min(pos+blockSize, len(binMap))
+            nextPos = self.__scanPackets(binMap, offsets, types, pos, stop, inChain=inChain)
+            yield np.frombuffer(offsets, dtype=np.int64), np.frombuffer(types, dtype=np.uint8)
+            if nextPos < stop:  #end of the file, or a cut off final packet
+                break
+            inChain = self.__chainEnd(offsets, types) == nextPos
+            pos = nextPos
+
+    def readPacket(self, offset):
+        '''Decodes the single packet at a byte offset straight from the memory-map.
+        Args:
+            offset (int): Byte offset of the packet header, e.g. from iterIndex(), packetOffsets or seekTime().
+        Modifies:
+            None
+        Return:
+            (dict): Offset, MsgTypeID, MsgType, Length (bytes in the packet), Bytes (the raw packet) and
+                    Fields ({column header: value}, TimeUS in microseconds, as logged).
+        '''
+        binMap = self.__buffer()
+        if binMap is None or offset < 0 or binMap[offset:offset+2] != self.packetHeader or offset+3 > len(binMap):
+            raise ValueError(f'no packet header at byte {offset}')
+        msgTypeID = binMap[offset+2]
+        fmt = self.msgFormat.get(msgTypeID)
+        if fmt is None:
+            raise ValueError(f'unknown Message Type ID {msgTypeID} at byte {offset}')
+        if offset+fmt[1] > len(binMap):
+            raise ValueError(f'{fmt[2]} packet at byte {offset} is cut off by the end of the file')
+        msgData = self.__decodePacket(msgTypeID, binMap[offset+3:offset+fmt[1]])
+        return {'Offset': offset, 'MsgTypeID': msgTypeID, 'MsgType': fmt[2], 'Length': fmt[1],
+                'Bytes': binMap[offset:offset+fmt[1]], 'Fields': dict(zip(fmt[4].split(','), msgData))}
+
+    def seekTime(self, seconds):
+        '''Finds the first packet logged at or after a run time with a binary search over byte
+        offsets of the memory-mapped file, so it takes the same few reads on a log of any size and
+        needs no packet index. Run times are only roughly in file order across message types, the
+        packet found is the first one whose TimeUS reaches seconds from where the search lands.
+
+        Args:
+            seconds (float): Run time in seconds, the unit of the TimeUS column.
+        Modifies:
+            self.msgFormat, self.FMT2ID: Updated with every FMT message in the file.
+        Return:
+            (int): Byte offset of the packet, None if no packet reaches that run time.
+        '''
+        binMap = self.__buffer()
+        if binMap is None:
+            return None
+        self.__findAllFormats()
+        target = round(seconds*1e6)
+        low, high = 0, len(binMap)  #packets with a run time before low are earlier, the first one at or after high is not
+        while high-low > ArduPilotLog.GATHER_CHUNK:
+            found = self.__nextRunTime((low+high)//2, high)
+            if found is None or found[1] >= target:
+                high = (low+high)//2
+            else:
+                low = found[0]+1
+        runtimeTypes = self.__runtimeTypes()
+        pos = self.__syncPosition(binMap, low, len(binMap)) if low > 0 else 0
+        inChain = False
+        while pos < len(binMap):
+            offsets, types = array('q'), array('B')
+            stop = min(pos+ArduPilotLog.GATHER_CHUNK, len(binMap))
+            nextPos = self.__scanPackets(binMap, offsets, types, pos, stop, inChain=inChain)
+            inChain = self.__chainEnd(offsets, types) == nextPos
+            offsets = np.frombuffer(offsets, dtype=np.int64)[runtimeTypes[np.frombuffer(types, dtype=np.uint8)]]
+            reached = np.flatnonzero(self.__packetTimeUS(offsets).astype(np.int64) >= target)
+            if len(reached):
+                return int(offsets[reached[0]])
+            if nextPos < stop:
+                break
+            pos = nextPos
+        return None
+
+    def __nextRunTime(self, start, stop):
+        '''Returns (offset, TimeUS) of the first packet with a run time that starts at or after start
+        and before stop, None if there is none.'''
+        binMap = self.__buffer()
+        runtimeTypes = self.__runtimeTypes()
+        pos = self.__syncPosition(binMap, start, stop) if start > 0 else 0
+        inChain = False
+        while pos < stop:
+            offsets, types = array('q'), array('B')
+            blockStop = min(pos+4096, stop)    #the first packet with a run time is usually in the first few
+            nextPos = self.__scanPackets(binMap, offsets, types, pos, blockStop, inChain=inChain)
+            inChain = self.__chainEnd(offsets, types) == nextPos
+            for offset, msgTypeID in zip(offsets, types):
+                if runtimeTypes[msgTypeID]:
+                    return offset, int(self.__packetTimeUS(np.array([offset]))[0])
+            if nextPos < blockStop:
+                return None
+            pos = nextPos
+        return None
+
+    def __findAllFormats(self):
+        '''Registers every FMT message in the file once, see __findFormats(), so packets anywhere in the file can be decoded.'''
+        if not self.__allFormats and self.__buffer() is not None:
+            self.__findFormats(self.__binMap)
+            self.__allFormats = True
+
+    def update(self):
+        '''Parses the packets appended to a log that is still being written, for example a telemetry
+        log of a vehicle in flight, without rereading the rest of the file. Scanning picks up at the end
+        of the last indexed packet, so a packet that was only partly written last time is read again
+        in full. Message types that were already decoded, and their time stamps, are extended with the
+        new messages only, the GPS time anchor is carried over from the last GPS message before them.
+        The log is parsed lazily first if it has not been parsed yet.
+
+        Args:
+            None
+        Modifies:
+            self.fileSize, self.packetOffsets, self.packetTypes, self.packetIndex: Extended with the new packets.
+            self.messages: Extended with the new messages if it was filled by parse().
+            self.msgFormat, self.FMT2ID: Updated with the new FMT messages.
+        Return:
+            (int): Number of new packets.
+        '''
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+            return len(self.packetOffsets)
+        resume = 0
+        if len(self.packetOffsets):
+            resume = int(self.packetOffsets[-1]) + self.msgFormat[int(self.packetTypes[-1])][1]
+        self.__closeFile()
+        self.__mapFile()
+        offsets, types = array('q'), array('B')
+        if self.__binMap is not None:   #resume is the end of the last kept packet, the packet chain carries on from it
+            self.__scanPackets(self.__binMap, offsets, types, resume, inChain=len(self.packetOffsets) > 0)
+        if not offsets:
+            return 0
+        newOffsets = np.frombuffer(offsets, dtype=np.int64).copy()
+        newTypes = np.frombuffer(types, dtype=np.uint8).copy()
+        gpsTypeID = self.FMT2ID.get('GPS')
+        oldGPSOffsets = self.__typeOffsets(gpsTypeID)
+        self.packetOffsets = np.concatenate((self.packetOffsets, newOffsets))
+        self.packetTypes = np.concatenate((self.packetTypes, newTypes))
+        typeIDs = np.unique(newTypes).tolist()
+        for msgTypeID in typeIDs:
+            self.packetIndex[msgTypeID] = np.concatenate((self.__typeOffsets(msgTypeID), newOffsets[newTypes == msgTypeID]))
+        for msgTypeID in typeIDs:
+            if msgTypeID in self.__columns:
+                columns = self.__decodeColumns(msgTypeID, newOffsets[newTypes == msgTypeID])
+                self.__columns[msgTypeID] = [np.concatenate(fieldColumns) for fieldColumns in zip(self.__columns[msgTypeID], columns)]
+                self.__textCodes.pop(msgTypeID, None)
+            elif self.__messages:   #message type first logged in the new packets
+                self.__typeColumns(msgTypeID)
+            if msgTypeID in self.__timeIndex:
+                self.__timeIndex[msgTypeID] = np.concatenate((self.__timeIndex[msgTypeID], self.__packetTimeUS(newOffsets[newTypes == msgTypeID])))
+        if len(oldGPSOffsets) == 0:
+            #the time stamps of every message hang on the first GPS message, time stamp again on request
+            self.__timestamps.clear()
+            if self.__messages:
+                self.__buildMessages()
+            return len(newOffsets)
+        gpsRunTime, GPS_datum = self.__gpsAnchors(oldGPSOffsets[-1:])
+        oldRuntime = np.flatnonzero(self.__runtimeTypes()[self.packetTypes[:-len(newOffsets)]])
+        lastRunTime = self.__packetTimeUS(self.packetOffsets[oldRuntime[-1:]]).astype(np.int64)
+        state = self.__timeState(int(oldGPSOffsets[0]), (gpsRunTime[0], GPS_datum[0]))
+        state['lastTime'] = GPS_datum[0] + (lastRunTime[0]-gpsRunTime[0]).astype('timedelta64[us]')
+        for msgTypeID in typeIDs:
+            if msgTypeID in self.__timestamps or self.__messages:
+                datetimes = self.__estimateTimes(newOffsets, newTypes, np.flatnonzero(newTypes == msgTypeID), dict(state))
+                if msgTypeID in self.__timestamps:
+                    datetimes = np.concatenate((self.__timestamps[msgTypeID], datetimes))
+                self.__timestamps[msgTypeID] = datetimes
+        if self.__messages:
+            self.__messages.extend(newTypes)
+        return len(newOffsets)
+
+    def follow(self, msgFilterType, pollInterval=1.0, idleTimeout=None, dateStrings=True):
+        '''Follows a log that is still being written and yields the new messages of one message type
+        as they are appended, see update(). Each refresh only costs as much as the new data.
+
+        Args:
+            msgFilterType (string): The Message Type Name of the messages you want displayed in the dataFrames.
+            pollInterval (float): (Optional) Seconds to wait between checks for new data, default 1.0.
+            idleTimeout (float): (Optional) Stop after this many seconds without new data, default None follows forever.
+            dateStrings (bool): (Optional) See filter(), default True.
+        Modifies:
+            See update().
+        Yields:
+            (DataFrame): The messages of the specified message type that are new since the previous dataFrame,
+                         the first dataFrame holds every message logged so far.
+        '''
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        consumed = 0
+        idleSince = time.monotonic()
+        while True:
+            msgTypeID = self.FMT2ID.get(msgFilterType)
+            numMessages = len(self.__typeOffsets(msgTypeID))
+            if numMessages > consumed:
+                columns = self.__typeColumns(msgTypeID)
+                datetimes = self.__typeTimestamps(msgTypeID)
+                yield self.__buildFrame(msgTypeID, [column[consumed:] for column in columns], datetimes[consumed:], dateStrings)
+                consumed = numMessages
+            if self.update():
+                idleSince = time.monotonic()
+            elif idleTimeout is not None and time.monotonic()-idleSince >= idleTimeout:
+                return
+            else:
+                time.sleep(pollInterval)
+
+    def filter(self, msgFilterType: str, csv: bool = False, dateStrings: bool = True, start=None, end=None, columns=None, categorical: bool = True) -> pd.DataFrame:
+        '''Creates a dataframe consisting of only the specified message type. The column 
+        headers of the dataframe will be defined by the column headers found in the FMT
+        message. If csv is specified, the dataFrame will be exported and saved as a .csv.
+        CSV is saved to same directory as .bin file. With start and/or end only the messages in
+        that time window are decoded, found by binary search over the run time or UTC time stamps
+        of the message type, so a query costs in proportion to the window, not the log. With columns
+        only the bytes of the requested data fields are read out of each packet and decoded.
+        String data fields, e.g. PARM names and MSG text, are pandas Categorical columns.
+
+        Args:
+            msgFilterType (string): The Message Type Name of the messages you want displayed
+                                    in the dataFrame.
+            csv (bool): (Optional) Set to True if you want the resulting dataFrame to be exported 
+                        and saved as a .csv, default False.
+            dateStrings (bool): (Optional) Set to False to get a single datetime64[ns] datetime_UTC column
+                                instead of the Date and UTC string columns, default True.
+            start (float or datetime): (Optional) First time to include. A number is a run time in seconds, the unit
+                                       of the TimeUS column, anything else, a datetime, pd.Timestamp, np.datetime64 or
+                                       ISO string, is a UTC time, which needs GPS messages in the log. Default None starts
+                                       at the first message.
+            end (float or datetime): (Optional) Last time to include, the same as start. Default None ends at the last message.
+            columns (list): (Optional) Column headers of the data fields to return, in that order, default None returns every data field.
+                            An empty list returns only the Date and UTC (or datetime_UTC) and MsgType columns.
+            categorical (bool): (Optional) Set to False for object string data fields instead of Categorical ones, default True.
+        Modifies:
+            None
+        Returns:
+            (DataFrame): A dataFrame consisting of messages beloning only to the specified message type.
+                         Each row is an indivitual message. 
+        '''
+        msgTypeID = self.FMT2ID.get(msgFilterType)
+        if msgTypeID is None:
+            return pd.DataFrame()
+        fields = None
+        if columns is not None:
+            headers = self.msgFormat[msgTypeID][4].split(",")
+            missing = [column for column in columns if column not in headers]
+            if missing:
+                raise KeyError(f'{msgFilterType} has no column {", ".join(missing)}')
+            repeated = [column for indx, column in enumerate(columns) if column in columns[:indx]]
+            if repeated:
+                raise ValueError(f'{msgFilterType} column {", ".join(dict.fromkeys(repeated))} is listed more than once')
+            fields = [headers.index(column) for column in columns]
+        if start is None and end is None and fields is None:
+            typeColumns = self.__typeColumns(msgTypeID)
+            df=self.__buildFrame(msgTypeID, typeColumns, self.__typeTimestamps(msgTypeID), dateStrings, categorical=categorical,
+                                 textCodes=self.__typeTextCodes(msgTypeID) if categorical else None)
+        else:
+            first = self.__timeBound(msgTypeID, start, 'left') if start is not None else 0
+            last = self.__timeBound(msgTypeID, end, 'right') if end is not None else len(self.__typeOffsets(msgTypeID))
+            last = max(first, last)
+            typeColumns = self.__columns.get(msgTypeID)
+            if typeColumns is None:
+                textCodes = {}
+                typeColumns = self.__decodeColumns(msgTypeID, self.__typeOffsets(msgTypeID)[first:last], fields=fields, textCodes=textCodes)
+            else:
+                textCodes = self.__typeTextCodes(msgTypeID, fields, first, last) if categorical else None
+                typeColumns = [typeColumns[indx][first:last] for indx in (fields if fields is not None else range(len(typeColumns)))]
+            df=self.__buildFrame(msgTypeID, typeColumns, self.__typeTimestamps(msgTypeID)[first:last], dateStrings, fields, categorical, textCodes)
+        if csv:
+            filename=f"{self.fileName[0:-4]}_{msgFilterType}.csv"
+            df.to_csv(filename,index=False)
+            print(f'CSV saved to {filename}.')
+        return df
+
+    def __typeTimeUS(self, msgTypeID):
+        '''Returns the TimeUS run time of every message of one message type, in microseconds. This
+        is the decoded TimeUS column if the message type is decoded, otherwise only the TimeUS field
+        of each packet is read and kept as the time index of the message type.'''
+        columns = self.__columns.get(msgTypeID)
+        if columns is not None:
+            return columns[0]
+        if msgTypeID not in self.__timeIndex:
+            self.__timeIndex[msgTypeID] = self.__packetTimeUS(self.__typeOffsets(msgTypeID))
+        return self.__timeIndex[msgTypeID]
+
+    def __timeBound(self, msgTypeID, bound, side):
+        '''Finds where a time bound falls in the messages of one message type with a binary search.
+        Messages of one message type are logged in time order, so their run times and UTC time stamps are sorted.
+
+        Args:
+            msgTypeID (int): Integer representation of the Message Type ID.
+            bound (float or datetime): Run time in seconds, or UTC time, see filter().
+            side (string): 'left' for a start bound, 'right' for an end bound, both include messages at the bound.
+        Modifies:
+            self.__timeIndex, self.__timestamps: Cache the run times and time stamps of the message type.
+        Return:
+            (int): Index of the first message after a start bound, or one past the last message before an end bound.
+        '''
+        if isinstance(bound, (int, float, np.integer, np.floating)):
+            if self.msgFormat[msgTypeID][3][0] != 'Q':
+                raise ValueError(f'{self.msgFormat[msgTypeID][2]} messages have no TimeUS run time, use UTC bounds')
+            return int(np.searchsorted(self.__typeTimeUS(msgTypeID), np.uint64(max(round(bound*1e6), 0)), side=side))
+        if len(self.__typeOffsets(self.FMT2ID.get('GPS'))) == 0:   #every time stamp is NaT
+            raise ValueError('the log has no GPS messages to time stamp messages in UTC, use run time bounds')
+        bound = pd.Timestamp(bound)
+        if bound.tzinfo is not None:
+            bound = bound.tz_convert('UTC').tz_localize(None)
+        return int(np.searchsorted(self.__typeTimestamps(msgTypeID), bound.to_datetime64().astype('datetime64[ns]'), side=side))
+
+    def align(self, typesAndColumns, rate=None, on=None, method='previous', tolerance=None, start=None, end=None, dateStrings=False):
+        '''Joins message types logged at different rates into one dataFrame on their TimeUS run time.
+        With rate, every message type is resampled to a fixed time grid, otherwise the other message
+        types are joined as of the messages of the on message type. Each row takes, per message type,
+        the message found by a binary search of its run times: the last one at or before the row
+        ('previous'), the closest one ('nearest', ties go to the earlier one), or the two either side of it, interpolated
+        ('linear', text fields use 'previous'). It works on the decoded columns, message types that
+        are not decoded yet only have the requested data fields decoded, see filter(columns=...).
+        The log is parsed lazily first if it has not been parsed yet.
+
+        Args:
+            typesAndColumns (dict or list): Message Type Name: list of column headers to join, None joins every
+                                            data field. A list of Message Type Names joins every data field of each.
+            rate (float): (Optional) Rows per second of a fixed time grid from the first to the last message of the
+                          message types, default None joins on the messages of the on message type.
+            on (string): (Optional) Message Type Name whose messages are the rows, default None uses the first
+                         message type of typesAndColumns. Can not be combined with rate.
+            method (string): (Optional) 'previous', 'nearest' or 'linear', see above, default 'previous'.
+            tolerance (float): (Optional) Seconds. A message further than this from the row, or for 'linear' two
+                               messages further apart than this, leaves the row empty (NaN), default None.
+            start (float): (Optional) Run time in seconds, the unit of the TimeUS column, of the first row, default None.
+            end (float): (Optional) Run time in seconds of the last row, default None.
+            dateStrings (bool): (Optional) Set to True for Date and UTC string columns instead of the datetime64[ns]
+                                datetime_UTC column, default False.
+        Modifies:
+            None
+        Returns:
+            (DataFrame): datetime_UTC (or Date and UTC) and TimeUS (seconds) of each row, followed by one
+                         'MsgType.Column' column per requested column, e.g. 'GPS.Alt'.
+        '''
+        if method not in ('previous', 'nearest', 'linear'):
+            raise ValueError(f"method must be 'previous', 'nearest' or 'linear', not {method!r}")
+        if rate is not None and on is not None:
+            raise ValueError('give either rate or on, not both')
+        if not isinstance(typesAndColumns, dict):
+            typesAndColumns = dict.fromkeys(typesAndColumns)
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        requests = []   #(msgTypeID, msgType, column headers, field indices)
+        for msgType, columns in typesAndColumns.items():
+            msgTypeID = self.FMT2ID.get(msgType)
+            if msgTypeID is None:
+                raise KeyError(f'{msgType} is not in the log')
+            if self.msgFormat[msgTypeID][3][0] != 'Q':
+                raise ValueError(f'{msgType} messages have no TimeUS run time to align on')
+            headers = self.msgFormat[msgTypeID][4].split(',')
+            columns = headers[1:] if columns is None else list(columns)
+            missing = [column for column in columns if column not in headers]
+            if missing:
+                raise KeyError(f'{msgType} has no column {", ".join(missing)}')
+            requests.append((msgTypeID, msgType, columns, [headers.index(column) for column in columns]))
+        if on is not None and on not in typesAndColumns:
+            raise KeyError(f'on={on} must be one of the message types to align')
+        #run times of the rows, in microseconds
+        if rate is None:
+            onTypeID = self.FMT2ID[on if on is not None else requests[0][1]]
+            first = self.__timeBound(onTypeID, start, 'left') if start is not None else 0
+            last = self.__timeBound(onTypeID, end, 'right') if end is not None else len(self.__typeOffsets(onTypeID))
+            onRows = slice(first, max(first, last))
+            rowTimeUS = self.__typeTimeUS(onTypeID)[onRows].astype(np.int64)
+        else:
+            spans = [self.__typeTimeUS(msgTypeID)[[0, -1]].astype(np.int64) for msgTypeID, *_ in requests if len(self.__typeOffsets(msgTypeID))]
+            firstUS = min((span[0] for span in spans), default=0) if start is None else round(start*1e6)
+            lastUS = max((span[1] for span in spans), default=-1) if end is None else round(end*1e6)
+            rowTimeUS = np.round(np.arange(0, max(lastUS-firstUS, -1)+1, 1e6/rate)).astype(np.int64)+firstUS
+        frameData = {}
+        for msgTypeID, msgType, columns, fields in requests:
+            timeUS = self.__typeTimeUS(msgTypeID).astype(np.int64)
+            typeColumns = self.__columns.get(msgTypeID)
+            if typeColumns is not None:
+                typeColumns = [typeColumns[indx] for indx in fields]
+            else:
+                typeColumns = self.__decodeColumns(msgTypeID, self.__typeOffsets(msgTypeID), fields=fields)
+            typeColumns = [column*1e-6 if indx == 0 else column for column, indx in zip(typeColumns, fields)]   #TimeUS is reported in seconds
+            if rate is None and msgTypeID == onTypeID:   #the rows are these messages
+                frameData.update({f'{msgType}.{column}': values[onRows] for column, values in zip(columns, typeColumns)})
+                continue
+            frameData.update({f'{msgType}.{column}': values for column, values in
+                              zip(columns, self.__alignColumns(timeUS, typeColumns, rowTimeUS, method, tolerance))})
+        if rate is None:
+            datetimes = self.__typeTimestamps(onTypeID)[onRows]
+        else:   #the UTC time of a row is its run time laid over the GPS anchor of the most frequent message type
+            refTypeID = max((msgTypeID for msgTypeID, *_ in requests), key=lambda msgTypeID: len(self.__typeOffsets(msgTypeID)))
+            refTimeUS = self.__typeTimeUS(refTypeID).astype(np.int64)
+            datetimes = np.full(len(rowTimeUS), np.datetime64('NaT'), dtype='datetime64[ns]')
+            if len(refTimeUS):
+                anchors = self.__typeTimestamps(refTypeID) - refTimeUS.astype('timedelta64[us]')
+                ref = np.maximum(np.searchsorted(refTimeUS, rowTimeUS, side='right')-1, 0)   #rows before the first message are backfilled
+                datetimes = anchors[ref] + rowTimeUS.astype('timedelta64[us]')
+        if dateStrings:
+            timeColumns = dict(zip(['Date', 'UTC'], self.__datetimeStrings(datetimes)))
+        else:
+            timeColumns = {'datetime_UTC': datetimes}
+        return pd.DataFrame({**timeColumns, 'TimeUS': rowTimeUS*1e-6, **frameData})
+
+    def __alignColumns(self, timeUS, columns, rowTimeUS, method, tolerance):
+        '''Resamples the columns of one message type to the run times of the rows of align().
+        Args:
+            timeUS (np.ndarray): np.int64 run time of each message, in microseconds.
+            columns (list): np.ndarray per data field, one value per message.
+            rowTimeUS (np.ndarray): np.int64 run time of each row, in microseconds.
+            method (string): 'previous', 'nearest' or 'linear', see align().
+            tolerance (float): Seconds, see align(). None for no limit.
+        Modifies:
+            None
+        Return:
+            (list): np.ndarray per data field, one value per row. Empty rows are NaN, or None in text fields.
+        '''
+        if len(timeUS) == 0:
+            return [np.full(len(rowTimeUS), np.nan) for column in columns]
+        previous = np.searchsorted(timeUS, rowTimeUS, side='right')-1
+        following = np.minimum(previous+1, len(timeUS)-1)
+        safePrevious = np.maximum(previous, 0)
+        if method == 'nearest':
+            toPrevious = np.where(previous >= 0, rowTimeUS-timeUS[safePrevious], np.iinfo(np.int64).max)
+            toFollowing = np.where(timeUS[following] >= rowTimeUS, timeUS[following]-rowTimeUS, np.iinfo(np.int64).max)
+            source = np.where(toFollowing < toPrevious, following, safePrevious)
+            valid = np.minimum(toPrevious, toFollowing) <= (tolerance*1e6 if tolerance is not None else np.inf)
+        else:
+            source = safePrevious
+            valid = previous >= 0
+            if tolerance is not None:
+                valid &= rowTimeUS-timeUS[safePrevious] <= tolerance*1e6
+        if method == 'linear':
+            exact = valid & (timeUS[safePrevious] == rowTimeUS)
+            between = (previous >= 0) & (timeUS[following] > rowTimeUS)
+            if tolerance is not None:
+                between &= timeUS[following]-timeUS[safePrevious] <= tolerance*1e6
+        aligned = []
+        for column in columns:
+            if method == 'linear' and column.dtype.kind in 'biuf':
+                values = np.full(len(rowTimeUS), np.nan)
+                values[exact] = column[safePrevious[exact]]
+                weight = (rowTimeUS[between]-timeUS[safePrevious[between]])/(timeUS[following[between]]-timeUS[safePrevious[between]])
+                values[between] = column[safePrevious[between]]*(1-weight) + column[following[between]]*weight
+            else:
+                text = column.dtype.kind in 'OSU'   #object arrays, or fixed width strings from the parse cache and attach()
+                values = column[source].astype(object) if text else column[source]
+                if not valid.all():
+                    values = values if text else values.astype(np.float64)
+                    values[~valid] = None if text else np.nan
+            aligned.append(values)
+        return aligned
+
+    def all(self, csv=False, layout='wide'):
+        '''Creates a dataframe of all messages in the log, in file order. Returns dataframe. Saves
+        dataFrame as .csv if csv is set True. CSV is saved to same directory as .bin file. Every
+        layout is built from whole message type columns, not one message at a time.
+
+        Layouts:
+            'wide': One row per message. Date, UTC and MsgType followed by the data fields, named by
+                    the FMT column headers for the first fields and numbered after that.
+            'types': Dictionary of Message Type Name: the dataFrame filter(categorical=False) returns for it,
+                     string data fields as plain strings, indexed by the position of each message in the log
+                     so the types can be merged back in order.
+            'long': Tidy layout with one row per data field of each message: datetime_UTC, MsgType and
+                    Field (categoricals), Value (float) and Text (the value of string fields, None otherwise).
+
+        Args:
+            csv (bool): (Optional) Set to True if you want the resulting dataFrame to be exported 
+                        and saved as a .csv, default False. The 'types' layout saves one .csv per message type.
+            layout (string): (Optional) 'wide', 'types' or 'long', default 'wide'.
+        Modifies:
+            None
+        Returns:
+            (DataFrame): A dataFrame consisting of all messages, or a dictionary of dataFrames for the 'types' layout.
+        '''
+        if layout not in ('wide', 'types', 'long'):
+            raise ValueError(f"layout must be 'wide', 'types' or 'long', not {layout!r}")
+        typeIDs = list(dict.fromkeys(self.packetTypes.tolist())) if self.packetTypes is not None else []     #in order of first message
+        positions = {msgTypeID: np.searchsorted(self.packetOffsets, self.__typeOffsets(msgTypeID)) for msgTypeID in typeIDs}
+        if layout == 'types':
+            frames = {}
+            for msgTypeID in typeIDs:
+                df = self.__buildFrame(msgTypeID, self.__typeColumns(msgTypeID), self.__typeTimestamps(msgTypeID))
+                df.index = positions[msgTypeID]
+                frames[self.msgFormat[msgTypeID][2]] = df
+                if csv:
+                    filename=f"{self.fileName[0:-4]}_{self.msgFormat[msgTypeID][2]}.csv"
+                    df.to_csv(filename,index=False)
+                    print(f'CSV saved to {filename}.')
+            return frames
+        df = self.__longFrame(typeIDs, positions) if layout == 'long' else self.__wideFrame(typeIDs, positions)
+        if csv:
+            filename=self.fileName[0:-4]+"_ALL.csv"
+            df.to_csv(filename,index=False)
+            print(f'CSV saved to {filename}.')
+        return df
+
+    def __scaledColumns(self, msgTypeID):
+        '''Returns the decoded columns of one message type with TimeUS in seconds, the way they are reported.'''
+        columns = list(self.__typeColumns(msgTypeID))
+        if self.msgFormat[msgTypeID][3][0] == 'Q':
+            columns[0] = columns[0]*1e-6     #TimeUS is reported in seconds
+        return columns
+
+    def __wideFrame(self, typeIDs, positions):
+        '''Creates the 'wide' layout of all(). Each data field column is filled one message type at a time.
+        Args:
+            typeIDs (list): Message Type IDs in the log.
+            positions (dict): {msgTypeID: position of each message of that type in the log}.
+        Modifies:
+            None
+        Return:
+            (DataFrame): See all().
+        '''
+        numMessages = len(self.packetTypes) if self.packetTypes is not None else 0
+        datetimes = np.full(numMessages, np.datetime64('NaT'), dtype='datetime64[ns]')
+        msgTypes = np.empty(numMessages, dtype=object)
+        fields = []
+        for msgTypeID in typeIDs:
+            datetimes[positions[msgTypeID]] = self.__typeTimestamps(msgTypeID)
+            msgTypes[positions[msgTypeID]] = self.msgFormat[msgTypeID][2]
+            for indx, column in enumerate(self.__scaledColumns(msgTypeID)):
+                if indx == len(fields):
+                    fields.append(np.full(numMessages, None, dtype=object))
+                fields[indx][positions[msgTypeID]] = column
+        dates, times = self.__datetimeStrings(datetimes)
+        fmtHeaders = self.msgFormat[self.FMT2ID['FMT']][4].split(",")
+        columnHeaders = ['Date','UTC','MsgType'] + fmtHeaders + list(range(3+len(fmtHeaders), 3+len(fields)))
+        df = pd.DataFrame(dict(enumerate([dates, times, msgTypes, *fields])))
+        df.columns = columnHeaders[:len(df.columns)]
+        return df.infer_objects()  #purely numeric columns become numeric, missing fields NaN
+
+    def __longFrame(self, typeIDs, positions):
+        '''Creates the 'long' layout of all(). Each message type is laid out as a block of
+        messages x data fields, and the blocks are written straight to their rows in file order.
+
+        Args:
+            typeIDs (list): Message Type IDs in the log.
+            positions (dict): {msgTypeID: position of each message of that type in the log}.
+        Modifies:
+            None
+        Return:
+            (DataFrame): See all().
+        '''
+        fieldCounts = np.zeros(256, dtype=np.int64)
+        for msgTypeID in typeIDs:
+            fieldCounts[msgTypeID] = len(self.msgFormat[msgTypeID][3])
+        messageFields = fieldCounts[self.packetTypes] if typeIDs else np.empty(0, dtype=np.int64)
+        firstRows = np.cumsum(messageFields)-messageFields    #first row of every message
+        numRows = int(messageFields.sum())
+        datetimes = np.empty(numRows, dtype='datetime64[ns]')
+        typeCodes = np.empty(numRows, dtype=np.int16)
+        fieldCodes = np.empty(numRows, dtype=np.int32)
+        values = np.full(numRows, np.nan)
+        texts = np.full(numRows, None, dtype=object)
+        fieldNames = {}
+        for typeCode, msgTypeID in enumerate(typeIDs):
+            headers = self.msgFormat[msgTypeID][4].split(',')
+            numFields = fieldCounts[msgTypeID]
+            rows = firstRows[positions[msgTypeID]][:,None] + np.arange(numFields)     #messages x data fields
+            datetimes[rows] = self.__typeTimestamps(msgTypeID)[:,None]
+            typeCodes[rows] = typeCode
+            fieldCodes[rows] = [fieldNames.setdefault(header, len(fieldNames)) for header in headers[:numFields]]
+            for indx, column in enumerate(self.__scaledColumns(msgTypeID)):
+                if column.dtype.kind in 'OSU':  #text fields are object arrays, or fixed width strings from the parse cache and attach()
+                    texts[rows[:,indx]] = column
+                else:
+                    values[rows[:,indx]] = column
+        return pd.DataFrame({'datetime_UTC': datetimes,
+                             'MsgType': pd.Categorical.from_codes(typeCodes, [self.msgFormat[msgTypeID][2] for msgTypeID in typeIDs]),
+                             'Field': pd.Categorical.from_codes(fieldCodes, list(fieldNames)),
+                             'Value': values, 'Text': texts})
+
+    def export(self, fileFormat='parquet', types=None, outputDir=None, compression=None, chunksize=100000, dateStrings=False):
+        '''Writes the log to disk with one table per message type, streaming each message type in
+        chunks of at most chunksize messages, so the whole log is never held in memory. Message types
+        that have not been decoded yet are decoded one chunk at a time and not kept. The tables have
+        the same columns as filter(). The log is parsed lazily first if it has not been parsed yet.
+
+        Formats:
+            'parquet': <name>_<TYPE>.parquet per message type, needs pyarrow. compression: 'snappy' (default), 'zstd', 'gzip', 'lz4', 'brotli' or 'none'.
+            'arrow': <name>_<TYPE>.arrow Arrow IPC file per message type, needs pyarrow. compression: None (default), 'lz4' or 'zstd'.
+            'hdf5': <name>.h5 with one table per message type, keyed by Message Type Name, needs PyTables. compression: None (default), 'zlib', 'blosc', 'bzip2' or 'lzo'.
+            'csv': <name>_<TYPE>.csv per message type. compression: None (default), 'gzip', 'bz2' or 'xz', which adds .gz, .bz2 or .xz to the file name.
+
+        Args:
+            fileFormat (string): (Optional) 'parquet', 'arrow', 'hdf5' or 'csv', default 'parquet'.
+            types (list): (Optional) Message Type Names to export, default None exports every message type in the log.
+            outputDir (string): (Optional) Directory to write to, default None writes next to the .bin file.
+            compression (string): (Optional) Compression codec, see Formats.
+            chunksize (int): (Optional) Messages converted and written per step, default 100000.
+            dateStrings (bool): (Optional) See filter(), default False keeps a datetime64 datetime_UTC column.
+        Modifies:
+            None
+        Return:
+            (list): Filepaths written.
+        '''
+        if fileFormat not in ('parquet', 'arrow', 'hdf5', 'csv'):
+            raise ValueError(f"fileFormat must be 'parquet', 'arrow', 'hdf5' or 'csv', not {fileFormat!r}")
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        outputDir = os.path.dirname(os.path.abspath(self.fileName)) if outputDir is None else outputDir
+        os.makedirs(outputDir, exist_ok=True)
+        baseName = os.path.join(outputDir, os.path.splitext(os.path.basename(self.fileName))[0])
+        msgTypes = [msgType for msgType in (types if types is not None else self.getMessageTypes()) if len(self.__typeOffsets(self.FMT2ID.get(msgType)))]
+        if fileFormat == 'hdf5':
+            try:
+                hdfStore = pd.HDFStore(f'{baseName}.h5', mode='w', complevel=9 if compression else None, complib=compression)
+            except ImportError as e:
+                raise ImportError("export(fileFormat='hdf5') needs PyTables, pip install tables") from e
+            with hdfStore:
+                for msgType in msgTypes:
+                    msgTypeID = self.FMT2ID[msgType]
+                    stringSizes = {header: int(self.ARDU_TO_STRUCT[i][0][:-1]) for i, header in 
+                                   zip(self.msgFormat[msgTypeID][3], self.msgFormat[msgTypeID][4].split(',')) if self.ARDU_TO_STRUCT[i][2] is str}
+                    stringSizes.update({'MsgType': 4, 'Date': 10, 'UTC': 15} if dateStrings else {'MsgType': 4})
+                    for df in self.__exportChunks(msgTypeID, chunksize, dateStrings):
+                        hdfStore.append(msgType, df, index=False, min_itemsize=stringSizes)
+            return [f'{baseName}.h5']
+        fileNames = []
+        for msgType in msgTypes:
+            chunks = self.__exportChunks(self.FMT2ID[msgType], chunksize, dateStrings)
+            if fileFormat == 'csv':
+                fileNames.append(self.__exportCSV(f'{baseName}_{msgType}.csv', chunks, compression))
+            else:
+                fileNames.append(self.__exportArrow(f'{baseName}_{msgType}.{fileFormat}', chunks, fileFormat, compression))
+        return fileNames
+
+    def __exportChunks(self, msgTypeID, chunksize, dateStrings):
+        '''Yields the filter() dataFrame of one message type in chunks of at most chunksize messages.'''
+        offsets = self.__typeOffsets(msgTypeID)
+        datetimes = self.__typeTimestamps(msgTypeID)
+        columns = self.__columns.get(msgTypeID)
+        for start in range(0, len(offsets), chunksize):
+            if columns is None:
+                chunkColumns = self.__decodeColumns(msgTypeID, offsets[start:start+chunksize])
+            else:
+                chunkColumns = [column[start:start+chunksize] for column in columns]
+            df = self.__buildFrame(msgTypeID, chunkColumns, datetimes[start:start+chunksize], dateStrings)
+            df.index += start
+            yield df
+
+    def __exportCSV(self, fileName, chunks, compression):
+        '''Writes dataFrame chunks to one .csv file, see export().'''
+        openers = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+        if compression not in openers:
+            raise ValueError(f"csv compression must be None, 'gzip', 'bz2' or 'xz', not {compression!r}")
+        fileName += {None: '', 'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}[compression]
+        with openers[compression](fileName, 'wt', newline='') as csvFile:
+            for indx, df in enumerate(chunks):
+                df.to_csv(csvFile, index=False, header=(indx == 0))
+        return fileName
+
+    def __exportArrow(self, fileName, chunks, fileFormat, compression):
+        '''Writes dataFrame chunks to one Parquet or Arrow IPC file, see export().'''
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(f"export(fileFormat='{fileFormat}') needs pyarrow, pip install pyarrow") from e
+        writer = None
+        try:
+            for df in chunks:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    schema = table.schema   #later chunks are cast to the types of the first chunk
+                    if fileFormat == 'parquet':
+                        writer = pq.ParquetWriter(fileName, schema, compression=compression or 'snappy')
+                    else:
+                        writer = pa.ipc.new_file(fileName, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+                writer.write_table(table.cast(schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        return fileName
+
+    def getMessageTypes(self):
+        '''Returns a list of all Message Type Names what are present in the log.
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            (list): List of Message Type Names present in the log
+        '''
+        return list(self.FMT2ID.keys())
+
+    def typeStats(self):
+        '''Reports how much of the log each message type takes up and how long it took to decode,
+        largest first. Read from the packet index, so nothing is decoded.
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            (DataFrame): One row per message type in the log with the MsgType, Packets, Bytes and
+                         DecodeSeconds columns. DecodeSeconds is NaN for message types that were not
+                         decoded in this process, e.g. not requested yet or decoded by parse(workers=...).
+        '''
+        rows = [{'MsgType': self.msgFormat[msgTypeID][2], 'Packets': len(offsets),
+                 'Bytes': len(offsets)*self.msgFormat[msgTypeID][1],
+                 'DecodeSeconds': self.parseStats['typeSeconds'].get(msgTypeID, np.nan)}
+                for msgTypeID, offsets in self.packetIndex.items()]
+        df = pd.DataFrame(rows, columns=['MsgType', 'Packets', 'Bytes', 'DecodeSeconds'])
+        return df.sort_values('Bytes', ascending=False, ignore_index=True)
+
+    def damageReport(self):
+        '''Reports the parts of the file that are not in the packet index, for example where an SD card
+        write was lost, the log was cut off by a brownout or a header was corrupted. Every byte between
+        the end of one indexed packet and the start of the next was skipped, and every packet header
+        inside those bytes is a bad packet. The log is parsed lazily first if it has not been parsed yet.
+
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            (dict): skippedBytes (int) total bytes skipped,
+                    skippedRanges (list) (offset, length) of each run of skipped bytes,
+                    badPackets (int) number of rejected packets,
+                    badOffsets (list) byte offset of each rejected packet header.
+        '''
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        packetLengths = np.zeros(256, dtype=np.int64)
+        for msgTypeID, fmt in self.msgFormat.items():
+            packetLengths[msgTypeID] = fmt[1]
+        gapStarts = np.concatenate(([0], self.packetOffsets+packetLengths[self.packetTypes]))
+        gapEnds = np.concatenate((self.packetOffsets, [self.fileSize]))
+        gaps = np.flatnonzero(gapEnds > gapStarts)
+        skippedRanges = [(int(gapStarts[i]), int(gapEnds[i]-gapStarts[i])) for i in gaps]
+        badOffsets = []
+        if skippedRanges:
+            binMap = self.__buffer()
+            for start, length in skippedRanges:
+                pos = binMap.find(self.packetHeader, start, start+length)
+                while pos != -1:
+                    badOffsets.append(pos)
+                    pos = binMap.find(self.packetHeader, pos+1, start+length)
+        return {'skippedBytes': sum(length for start, length in skippedRanges), 'skippedRanges': skippedRanges,
+                'badPackets': len(badOffsets), 'badOffsets': badOffsets}
+
+    def summary(self, workers=None):
+        '''Takes inventory of the log from the packet headers alone: which message types are really
+        logged, how many packets of each, the TimeUS span and rate of each, and the time of the first
+        GPS fix. Only the packet index is built, see buildIndex(), plus the TimeUS of the first and
+        last packet of each message type and the Status of the GPS packets, so it costs a fraction of
+        parse() and nothing is kept decoded. Unlike getMessageTypes(), message types that have a
+        FMT message but no packets are left out.
+
+        Args:
+            workers (int): (Optional) Number of worker processes to build the packet index with, default None
+                           scans in this process. Ignored if the log is already indexed.
+        Modifies:
+            self.packetOffsets, self.packetTypes, self.packetIndex: See buildIndex(), if not built yet.
+        Return:
+            (dict): File, FileSize (bytes), Messages, MessageTypes, Duration (seconds of run time), FirstGPS (UTC
+                    datetime64 of the first GPS message with a 3D fix, Status >= 3, None without a fix) and Types, a dataFrame with one row
+                    per message type: MsgType, Packets, Bytes, FirstTimeUS and LastTimeUS (seconds, NaN for
+                    message types without TimeUS) and Rate (messages per second over that span).
+        '''
+        if self.packetOffsets is None:
+            if workers is not None and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    self.__buildIndexParallel(executor, workers)
+            else:
+                self.buildIndex()
+        runtimeTypes = self.__runtimeTypes()
+        rows = []
+        for msgTypeID, offsets in sorted(self.packetIndex.items()):
+            row = {'MsgType': self.msgFormat[msgTypeID][2], 'Packets': len(offsets), 'Bytes': len(offsets)*self.msgFormat[msgTypeID][1],
+                   'FirstTimeUS': np.nan, 'LastTimeUS': np.nan, 'Rate': np.nan}
+            if runtimeTypes[msgTypeID]:
+                row['FirstTimeUS'], row['LastTimeUS'] = self.__packetTimeUS(offsets[[0, -1]])*1e-6
+                if row['LastTimeUS'] > row['FirstTimeUS']:
+                    row['Rate'] = (len(offsets)-1)/(row['LastTimeUS']-row['FirstTimeUS'])
+            rows.append(row)
+        types = pd.DataFrame(rows, columns=['MsgType', 'Packets', 'Bytes', 'FirstTimeUS', 'LastTimeUS', 'Rate'])
+        summary = {'File': self.fileName, 'FileSize': self.fileSize, 'Messages': len(self.packetOffsets),
+                   'MessageTypes': len(self.packetIndex), 'Duration': None, 'FirstGPS': None, 'Types': types}
+        runtimePositions = np.flatnonzero(runtimeTypes[self.packetTypes])
+        if len(runtimePositions):
+            runTime = self.__packetTimeUS(self.packetOffsets[runtimePositions[[0, -1]]]).astype(np.int64)
+            summary['Duration'] = (runTime[1]-runTime[0])*1e-6
+        gpsTypeID = self.FMT2ID.get('GPS')
+        gpsOffsets = self.__typeOffsets(gpsTypeID)
+        if len(gpsOffsets):
+            gpsHeaders = self.msgFormat[gpsTypeID][4].split(',')
+            if 'Status' in gpsHeaders:  #GPS messages logged before a 3D fix hold no GPS time
+                status = self.__decodeColumns(gpsTypeID, gpsOffsets, fields=[gpsHeaders.index('Status')])[0]
+                gpsOffsets = gpsOffsets[status >= 3]
+            if len(gpsOffsets):
+                summary['FirstGPS'] = self.__gpsAnchors(gpsOffsets[:1])[1][0]
+        return summary
+
+    def flightSummary(self):
+        '''Returns the headline numbers of the log: message counts, the logged time span, takeoffs and
+        landings from STAT isFlying, and max altitude and speed from GPS. Only the STAT and GPS
+        message types are decoded, so this is cheap after parse(lazy=True). The log is parsed
+        lazily first if it has not been parsed yet.
+
+        Args:
+            None
+        Modifies:
+            None
+        Return:
+            (dict): File, Messages, MessageTypes, Start and End (UTC datetime64), Duration (seconds of
+                    run time), Takeoffs, Landings, MaxAlt (meters) and MaxSpd (m/s). Numbers that the
+                    log has no data for are None.
+        '''
+        if self.packetOffsets is None:
+            self.parse(lazy=True)
+        summary = {'File': self.fileName, 'Messages': len(self.packetOffsets), 'MessageTypes': len(self.packetIndex),
+                   'Start': None, 'End': None, 'Duration': None, 'Takeoffs': None, 'Landings': None, 'MaxAlt': None, 'MaxSpd': None}
+        runtimePositions = np.flatnonzero(self.__runtimeTypes()[self.packetTypes])
+        if len(runtimePositions):
+            ends = runtimePositions[[0, -1]]
+            runTime = self.__packetTimeUS(self.packetOffsets[ends]).astype(np.int64)
+            summary['Duration'] = (runTime[1]-runTime[0])*1e-6
+            gpsOffsets = self.__typeOffsets(self.FMT2ID.get('GPS'))[:1]
+            if len(gpsOffsets):
+                gpsRunTime, GPS_datum = self.__gpsAnchors(gpsOffsets)
+                state = self.__timeState(gpsOffsets[0], (gpsRunTime[0], GPS_datum[0]))
+                summary['Start'], summary['End'] = self.__estimateTimes(self.packetOffsets, self.packetTypes, ends, state)
+        if len(self.__typeOffsets(self.FMT2ID.get('STAT'))):
+            statHeaders = self.msgFormat[self.FMT2ID['STAT']][4].split(',')
+            isFlying = self.__typeColumns(self.FMT2ID['STAT'])[statHeaders.index('isFlying')].astype(np.int8)
+            summary['Takeoffs'] = int(np.count_nonzero(np.diff(isFlying) == 1))
+            summary['Landings'] = int(np.count_nonzero(np.diff(isFlying) == -1))
+        if len(self.__typeOffsets(self.FMT2ID.get('GPS'))):
+            gpsHeaders = self.msgFormat[self.FMT2ID['GPS']][4].split(',')
+            gpsColumns = self.__typeColumns(self.FMT2ID['GPS'])
+            summary['MaxAlt'] = float(gpsColumns[gpsHeaders.index('Alt')].max())
+            summary['MaxSpd'] = float(gpsColumns[gpsHeaders.index('Spd')].max())
+        return summary
+
+
+class Aggregator:
+    '''Base class of the reducers ArduPilotLog.aggregate() runs over a log. aggregate() hands each
+    aggregator the messages of its message type one block at a time, in file order, and asks for
+    the result at the end. Subclass it, or use Reducer, for your own reducers. Keep the state small,
+    a few numbers or events, so memory use does not grow with the log.
+
+    Args:
+        msgType (string): Message Type Name of the messages to aggregate.
+    '''
+    def __init__(self, msgType):
+        self.msgType = msgType
+
+    def update(self, block):
+        '''Takes the next block of messages.
+        Args:
+            block (dict): Column header: np.ndarray with one value per message, the same columns as
+                          filter(dateStrings=False), datetime_UTC included.
+        Modifies:
+            The aggregator state.
+        Return:
+            None
+        '''
+        raise NotImplementedError
+
+    def result(self):
+        '''Returns the result over every block so far.'''
+        raise NotImplementedError
+
+
+class FieldStats(Aggregator):
+    '''Minimum, maximum and mean of one data field, NaN values are left out.
+    Args:
+        msgType (string): Message Type Name, e.g. 'GPS'.
+        column (string): Column header of the data field, e.g. 'Alt'.
+    '''
+    def __init__(self, msgType, column):
+        super().__init__(msgType)
+        self.column = column
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, block):
+        values = block[self.column]
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.total += float(values.sum(dtype=np.float64))
+        low, high = values.min().item(), values.max().item()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def result(self):
+        '''Returns {'min', 'max', 'mean', 'count'}, None for min, max and mean without values.'''
+        return {'min': self.min, 'max': self.max, 'mean': self.total/self.count if self.count else None, 'count': self.count}
+
+
+class Edges(Aggregator):
+    '''Finds the messages where a data field changes value, e.g. STAT isFlying for takeoffs and
+    landings, or Armed. The first message is never an edge.
+    Args:
+        msgType (string): Message Type Name, e.g. 'STAT'.
+        column (string): Column header of the data field, e.g. 'isFlying'.
+    '''
+    def __init__(self, msgType, column):
+        super().__init__(msgType)
+        self.column = column
+        self.last = None    #value of the last message of the block before
+        self.edges = []     #(datetime_UTC, TimeUS, From, To) arrays per block
+
+    def update(self, block):
+        values = block[self.column]
+        if len(values) == 0:
+            return
+        previous = np.concatenate(([values[0] if self.last is None else self.last], values[:-1]))
+        changed = np.flatnonzero(values != previous)
+        if len(changed):
+            timeUS = block['TimeUS'][changed] if 'TimeUS' in block else np.full(len(changed), np.nan)
+            self.edges.append((block['datetime_UTC'][changed], timeUS, previous[changed], values[changed]))
+        self.last = values[-1]
+
+    def result(self):
+        '''Returns a dataFrame with one row per change: datetime_UTC, TimeUS, From and To. Rising edges,
+        e.g. takeoffs, are the rows where To > From.'''
+        columns = ['datetime_UTC', 'TimeUS', 'From', 'To']
+        if not self.edges:
+            return pd.DataFrame({column: [] for column in columns})
+        return pd.DataFrame(dict(zip(columns, map(np.concatenate, zip(*self.edges)))))
+
+
+class EventCount(Aggregator):
+    '''Counts messages, or the messages where a data field matches.
+    Args:
+        msgType (string): Message Type Name, e.g. 'ERR'.
+        column (string): (Optional) Column header of the data field to match, default None counts every message.
+        value (object or function): (Optional) Value to match, or a function that takes the np.ndarray of
+                                    the field and returns a bool array, default None.
+    '''
+    def __init__(self, msgType, column=None, value=None):
+        super().__init__(msgType)
+        self.column = column
+        self.value = value
+        self.count = 0
+
+    def update(self, block):
+        if self.column is None:
+            self.count += len(block['datetime_UTC'])
+        elif callable(self.value):
+            self.count += int(np.count_nonzero(self.value(block[self.column])))
+        else:
+            self.count += int(np.count_nonzero(block[self.column] == self.value))
+
+    def result(self):
+        '''Returns the number of messages counted.'''
+        return self.count
+
+
+class Reducer(Aggregator):
+    '''Folds the blocks of one message type with a function, for reducers that need no class of their own.
+    Args:
+        msgType (string): Message Type Name.
+        function (function): Called as function(state, block) for each block, see Aggregator.update(),
+                             returns the new state.
+        initial (object): (Optional) Starting state, default None.
+    '''
+    def __init__(self, msgType, function, initial=None):
+        super().__init__(msgType)
+        self.function = function
+        self.state = initial
+
+    def update(self, block):
+        self.state = self.function(self.state, block)
+
+    def result(self):
+        '''Returns the final state.'''
+        return self.state
+
+
+def _logFiles(source):
+    '''Returns the filepaths of a directory of .bin files, a glob pattern or a list of filepaths, see batchParse().'''
+    if isinstance(source, (list, tuple)):
+        return list(source)
+    if os.path.isdir(source):
+        return sorted(entry.path for entry in os.scandir(source) if entry.is_file() and entry.name.lower().endswith('.bin'))
+    return sorted(glob.glob(source, recursive=True))
+
+
+def _scanLog(fileName):
+    '''Process pool entry point for scanLogs(). Returns ArduPilotLog.summary() of one log without its
+    Types dataFrame, with the Message Type Names in a TypeNames entry and any error in an Error entry.'''
+    try:
+        with ArduPilotLog(fileName) as log:
+            summary = log.summary()
+        summary['TypeNames'] = ','.join(summary.pop('Types')['MsgType'])
+        summary['Error'] = None
+    except Exception as e:
+        summary = {'File': fileName, 'Error': f'{type(e).__name__}: {e}'}
+    return summary
+
+
+def scanLogs(source, workers=None, verbose=False):
+    '''Takes inventory of a whole directory, or glob pattern, of .bin logs from their packet headers,
+    see ArduPilotLog.summary(), with a pool of worker processes. Meant for sorting a fleet of logs by
+    duration and content before deciding which ones to parse.
+
+    Args:
+        source (string or list): Directory of .bin files, glob pattern such as 'logs/**/*.BIN', or list of filepaths.
+        workers (int): (Optional) Number of worker processes, default None uses one per CPU.
+        verbose (bool): (Optional) Set to True to print progress to terminal, default False.
+    Modifies:
+        None
+    Return:
+        (DataFrame): One row per log with the File, FileSize, Messages, MessageTypes, Duration, FirstGPS,
+                     TypeNames (comma separated Message Type Names) and Error columns.
+    '''
+    fileNames = _logFiles(source)
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_scanLog, fileName): fileName for fileName in fileNames}
+        for future in as_completed(futures):
+            try:
+                summaries[futures[future]] = future.result()
+            except BrokenProcessPool:
+                summaries[futures[future]] = {'File': futures[future], 'Error': 'BrokenProcessPool: worker process died'}
+            if verbose: print(f'\rScanned: {len(summaries)}/{len(fileNames)}', end='')
+    if verbose: print()
+    return pd.DataFrame([summaries[fileName] for fileName in fileNames], columns=['File', 'FileSize', 'Messages', 'MessageTypes',
+                        'Duration', 'FirstGPS', 'TypeNames', 'Error'])
+
+
+def _ingestLog(fileName, types, outputDir, cacheDir, fileFormat='csv', compression=None):
+    '''Process pool entry point for batchParse(). Parses one log, exports its message types and returns
+    its flight summary. Any error is caught and returned in the summary so one bad log never stops the batch.
+
+    Args:
+        See batchParse().
+    Modifies:
+        None
+    Return:
+        (dict): ArduPilotLog.flightSummary() plus an Error entry, None if the log was ingested.
+    '''
+    try:
+        with ArduPilotLog(fileName, cacheDir=cacheDir) as log:
+            log.parse(lazy=True)
+            if outputDir is not None:
+                log.export(fileFormat, types=types, outputDir=outputDir, compression=compression, dateStrings=(fileFormat == 'csv'))
+            summary = log.flightSummary()
+        summary['Error'] = None
+    except Exception as e:
+        summary = {'File': fileName, 'Error': f'{type(e).__name__}: {e}'}
+    return summary
+
+
+def batchParse(source, types=None, outputDir=None, workers=None, cacheDir=None, verbose=False, fileFormat='csv', compression=None):
+    '''Parses a whole directory, or glob pattern, of .bin logs with a bounded pool of worker
+    processes and returns a fleet summary with one row per log. Every log is parsed on its own, a
+    log that fails to parse, or even crashes its worker process, only shows up as an Error in its
+    own row.
+
+    Args:
+        source (string or list): Directory of .bin files, glob pattern such as 'logs/**/*.BIN', or list of filepaths.
+        types (list): (Optional) Message Type Names to write for each log, default None writes every message type.
+        outputDir (string): (Optional) Directory to write the exported message types, see ArduPilotLog.export(), and
+                            fleet_summary.csv to, default None only returns the summary.
+        workers (int): (Optional) Number of worker processes, default None uses one per CPU.
+        cacheDir (string): (Optional) Parse cache directory, see ArduPilotLog.
+        verbose (bool): (Optional) Set to True to print progress to terminal, default False.
+        fileFormat (string): (Optional) Export format, see ArduPilotLog.export(), default 'csv'. The csv
+                             export keeps the Date and UTC string columns of filter().
+        compression (string): (Optional) Export compression, see ArduPilotLog.export(), default None.
+    Modifies:
+        None
+    Return:
+        (DataFrame): One row per log, see ArduPilotLog.flightSummary(), plus an Error column.
+    '''
+    fileNames = _logFiles(source)
+    if outputDir is not None:
+        os.makedirs(outputDir, exist_ok=True)
+    summaries = {}
+    crashed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_ingestLog, fileName, types, outputDir, cacheDir, fileFormat, compression): fileName for fileName in fileNames}
+        for future in as_completed(futures):
+            try:
+                summaries[futures[future]] = future.result()
+            except BrokenProcessPool:   #a worker died, every log still running in the pool failed with it
+                crashed.append(futures[future])
+            if verbose: print(f'\rIngested: {len(summaries)+len(crashed)}/{len(fileNames)}', end='')
+    for fileName in crashed:    #retry each on its own so only the log that kills its worker is marked
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                summaries[fileName] = executor.submit(_ingestLog, fileName, types, outputDir, cacheDir, fileFormat, compression).result()
+        except BrokenProcessPool:
+            summaries[fileName] = {'File': fileName, 'Error': 'BrokenProcessPool: worker process died'}
+    if verbose: print()
+    summary = pd.DataFrame([summaries[fileName] for fileName in fileNames], columns=['File', 'Messages', 'MessageTypes', 'Start', 'End',
+                           'Duration', 'Takeoffs', 'Landings', 'MaxAlt', 'MaxSpd', 'Error'])
+    if outputDir is not None:
+        summary.to_csv(os.path.join(outputDir, 'fleet_summary.csv'), index=False)
+    return summary
+
+
+def _sqlTimes(datetimes):
+    '''Converts datetime64 values to the 'YYYY-MM-DD HH:MM:SS.ffffff' text SQLite compares and its date
+    functions return, None for NaT. Takes one value or an array, returns a string or a list of them.'''
+    text = np.datetime_as_string(np.asarray(datetimes, dtype='datetime64[us]'), unit='us')
+    if text.ndim == 0:
+        return None if text == 'NaT' else str(text).replace('T', ' ')
+    text = np.char.replace(text, 'T', ' ').astype(object)
+    text[text == 'NaT'] = None
+    return text.tolist()
+
+
+def _catalogLog(fileName, samples, cacheDir):
+    '''Process pool entry point for LogCatalog.ingest(). Parses one log and returns the rows of every
+    catalog table for it. Any error is caught and returned so one bad log never stops the ingest.
+
+    Args:
+        See LogCatalog.ingest().
+    Modifies:
+        None
+    Return:
+        (dict): log (row of the logs table), types and fields (lists of rows), samples ({Message Type Name:
+                dataFrame}) and Error, None if the log was read.
+    '''
+    try:
+        with ArduPilotLog(fileName, cacheDir=cacheDir) as log:
+            log.parse(lazy=True)
+            flight = log.flightSummary()
+            summary = log.summary()
+            start = flight['Start']
+            if summary['FirstGPS'] is not None and (start is None or summary['FirstGPS']-start > np.timedelta64(int(flight['Duration']*1e6), 'us')):
+                start = summary['FirstGPS']     #the first GPS message has no fix, its time is not UTC
+            row = {'File': os.path.abspath(fileName), 'FileSize': log.fileSize, 'FileMTime': os.path.getmtime(fileName),
+                   'Messages': flight['Messages'], 'MessageTypes': flight['MessageTypes'], 'Start': _sqlTimes(start),
+                   'End': _sqlTimes(flight['End']), 'Duration': flight['Duration'], 'FirstGPS': _sqlTimes(summary['FirstGPS']),
+                   'Takeoffs': flight['Takeoffs'], 'Landings': flight['Landings'], 'MaxAlt': flight['MaxAlt'], 'MaxSpd': flight['MaxSpd']}
+            types, fields, frames = [], [], {}
+            for typeRow in summary['Types'].itertuples(index=False):
+                arrays = log.arrays(typeRow.MsgType)
+                datetimes = arrays.pop('datetime_UTC')
+                if 'TimeUS' in arrays and log.msgFormat[log.FMT2ID[typeRow.MsgType]][3][0] == 'Q':
+                    arrays['TimeUS'] = arrays['TimeUS']*1e-6     #TimeUS is reported in seconds, as in filter()
+                types.append({'MsgType': typeRow.MsgType, 'Packets': typeRow.Packets, 'FirstTimeUS': typeRow.FirstTimeUS,
+                              'LastTimeUS': typeRow.LastTimeUS, 'FirstUTC': _sqlTimes(datetimes[0]), 'LastUTC': _sqlTimes(datetimes[-1])})
+                for column, values in arrays.items():
+                    if values.dtype.kind not in 'biuf':     #no range for text fields
+                        continue
+                    if values.dtype.kind == 'f':
+                        values = values[~np.isnan(values)]
+                    if len(values):
+                        fields.append({'MsgType': typeRow.MsgType, 'Field': column, 'Min': values.min().item(), 'Max': values.max().item()})
+                interval = (samples or {}).get(typeRow.MsgType)
+                if interval is not None:
+                    keep = slice(None)
+                    if 'TimeUS' in arrays:  #first message of every interval of run time
+                        keep = np.unique((arrays['TimeUS']//interval).astype(np.int64), return_index=True)[1]
+                    frame = pd.DataFrame({column: values[keep] for column, values in arrays.items()})
+                    frame.insert(0, 'datetime_UTC', _sqlTimes(datetimes[keep]))
+                    frames[typeRow.MsgType] = frame
+        return {'log': row, 'types': types, 'fields': fields, 'samples': frames, 'Error': None}
+    except Exception as e:
+        return {'log': {'File': os.path.abspath(fileName)}, 'Error': f'{type(e).__name__}: {e}'}
+
+
+class LogCatalog:
+    '''Local SQLite catalog of parsed logs, for questions across a whole fleet archive, e.g. which
+    flights climbed above 120 m, without parsing any log again. ingest() parses each log once and
+    stores its headline numbers, the packets and time span of each message type, the minimum and
+    maximum of every numeric data field and, optionally, downsampled copies of chosen message types.
+    Every query returns a dataFrame with the File column of the .bin log it came from, open it with
+    ArduPilotLog for the full data.
+
+    Tables:
+        logs:               One row per log, logID, File, FileSize, FileMTime, Messages, MessageTypes, Start,
+                            End, FirstGPS, Duration, Takeoffs, Landings, MaxAlt, MaxSpd and Ingested.
+        types:              One row per message type of each log, logID, MsgType, Packets, FirstTimeUS,
+                            LastTimeUS, FirstUTC and LastUTC.
+        fields:             One row per numeric data field of each log, logID, MsgType, Field, Min and Max.
+        samples_<MsgType>:  Downsampled messages, logID, datetime_UTC and the data fields.
+    Times are UTC text, 'YYYY-MM-DD HH:MM:SS.ffffff', comparable with SQLite datetime(), TimeUS is in seconds.
+
+    Args:
+        dbPath (string): Filepath of the SQLite database, created if it does not exist.
+    '''
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS logs (logID INTEGER PRIMARY KEY, File TEXT UNIQUE NOT NULL, FileSize INTEGER, FileMTime REAL,
+            Messages INTEGER, MessageTypes INTEGER, Start TEXT, End TEXT, FirstGPS TEXT, Duration REAL, Takeoffs INTEGER,
+            Landings INTEGER, MaxAlt REAL, MaxSpd REAL, Ingested TEXT);
+        CREATE TABLE IF NOT EXISTS types (logID INTEGER NOT NULL REFERENCES logs(logID), MsgType TEXT NOT NULL, Packets INTEGER,
+            FirstTimeUS REAL, LastTimeUS REAL, FirstUTC TEXT, LastUTC TEXT, PRIMARY KEY (logID, MsgType));
+        CREATE TABLE IF NOT EXISTS fields (logID INTEGER NOT NULL REFERENCES logs(logID), MsgType TEXT NOT NULL, Field TEXT NOT NULL,
+            Min REAL, Max REAL, PRIMARY KEY (logID, MsgType, Field));
+        CREATE INDEX IF NOT EXISTS logs_Start ON logs (Start, End);
+        CREATE INDEX IF NOT EXISTS types_MsgType ON types (MsgType);
+        CREATE INDEX IF NOT EXISTS fields_Max ON fields (MsgType, Field, Max);
+        CREATE INDEX IF NOT EXISTS fields_Min ON fields (MsgType, Field, Min);
+    '''
+    LOG_TIMES = ['Start', 'End', 'FirstGPS', 'Ingested']    # text columns of the logs table returned as datetime64
+
+    def __init__(self, dbPath):
+        self.dbPath = dbPath
+        self.connection = sqlite3.connect(dbPath)
+        self.connection.executescript(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Closes the database connection.'''
+        self.connection.close()
+
+    def ingest(self, source, samples=None, workers=None, cacheDir=None, verbose=False):
+        '''Parses logs with a pool of worker processes and adds them to the catalog. A log already in the
+        catalog with the same size and modification time is skipped, a changed one is replaced.
+
+        Args:
+            source (string or list): Directory of .bin files, glob pattern such as 'logs/**/*.BIN', or list of filepaths.
+            samples (dict): (Optional) Message Type Name: seconds, keeps the first message of every interval of
+                            that many seconds of run time in a samples_<MsgType> table, e.g. {'GPS': 1.0}. Message
+                            types without TimeUS are kept whole. Default None keeps no samples.
+            workers (int): (Optional) Number of worker processes, default None uses one per CPU.
+            cacheDir (string): (Optional) Parse cache directory, see ArduPilotLog.
+            verbose (bool): (Optional) Set to True to print progress to terminal, default False.
+        Modifies:
+            The database.
+        Return:
+            (DataFrame): One row per log, File, Status ('ingested', 'unchanged' or 'failed') and Error.
+        '''
+        fileNames = [os.path.abspath(fileName) for fileName in _logFiles(source)]
+        known = dict(((row[0], (row[1], row[2])) for row in self.connection.execute('SELECT File, FileSize, FileMTime FROM logs')))
+        status = {}
+        for fileName in fileNames:
+            try:
+                if known.get(fileName) == (os.path.getsize(fileName), os.path.getmtime(fileName)):
+                    status[fileName] = ('unchanged', None)
+            except OSError as e:    #missing or unreadable, only this log fails
+                status[fileName] = ('failed', f'{type(e).__name__}: {e}')
+        pending = [fileName for fileName in fileNames if fileName not in status]
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_catalogLog, fileName, samples, cacheDir): fileName for fileName in pending}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        result = {'Error': 'BrokenProcessPool: worker process died'}
+                    if result['Error'] is None:
+                        self.__store(result)
+                    status[futures[future]] = ('failed', result['Error']) if result['Error'] else ('ingested', None)
+                    if verbose: print(f'\rIngested: {len(status)}/{len(fileNames)}', end='')
+        if verbose: print()
+        return pd.DataFrame([(fileName, *status[fileName]) for fileName in fileNames], columns=['File', 'Status', 'Error'])
+
+    def __store(self, result):
+        '''Writes the rows of one log, see _catalogLog(), replacing any earlier rows of the same file, in one transaction.'''
+        with self.connection:
+            self.remove([result['log']['File']], commit=False)
+            row = {**result['log'], 'Ingested': _sqlTimes(np.datetime64('now'))}
+            cursor = self.connection.execute(f'INSERT INTO logs ({", ".join(row)}) VALUES ({", ".join("?"*len(row))})', list(row.values()))
+            logID = cursor.lastrowid
+            self.connection.executemany('INSERT INTO types VALUES (?, ?, ?, ?, ?, ?, ?)', [(logID, *row.values()) for row in result['types']])
+            self.connection.executemany('INSERT INTO fields VALUES (?, ?, ?, ?, ?)', [(logID, *row.values()) for row in result['fields']])
+            for msgType, frame in result['samples'].items():
+                table = self.__samplesTable(msgType, frame)
+                frame = frame.astype(object).where(frame.notna(), None)     #NaN is stored as NULL
+                columns = ', '.join('"'+column+'"' for column in frame.columns)
+                self.connection.executemany(f'INSERT INTO "{table}" (logID, {columns}) VALUES ({", ".join("?"*(len(frame.columns)+1))})',
+                                            [(logID, *values) for values in frame.itertuples(index=False)])
+
+    def __samplesTable(self, msgType, frame):
+        '''Creates the samples table of a message type, or adds the data fields it is missing, e.g.
+        from a log of a newer firmware. Returns the table name.'''
+        table = f'samples_{msgType}'
+        existing = [row[1] for row in self.connection.execute(f'PRAGMA table_info("{table}")')]
+        if not existing:
+            self.connection.execute(f'CREATE TABLE "{table}" (logID INTEGER NOT NULL REFERENCES logs(logID), datetime_UTC TEXT)')
+            self.connection.execute(f'CREATE INDEX "{table}_time" ON "{table}" (datetime_UTC)')
+            self.connection.execute(f'CREATE INDEX "{table}_logID" ON "{table}" (logID)')
+            existing = ['logID', 'datetime_UTC']
+        for column in frame.columns:
+            if column not in existing:
+                sqlType = {'b': 'INTEGER', 'i': 'INTEGER', 'u': 'INTEGER', 'f': 'REAL'}.get(frame[column].dtype.kind, 'TEXT')
+                self.connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {sqlType}')
+        return table
+
+    def remove(self, files, commit=True):
+        '''Removes logs from the catalog.
+        Args:
+            files (list): Filepaths of the .bin logs.
+            commit (bool): (Optional) Set to False to leave the transaction open, default True.
+        Modifies:
+            The database.
+        Return:
+            None
+        '''
+        logIDs = [row[0] for fileName in files for row in self.connection.execute('SELECT logID FROM logs WHERE File = ?', (os.path.abspath(fileName),))]
+        tables = ['types', 'fields'] + [row[0] for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'samples!_%' ESCAPE '!'")]
+        for logID in logIDs:
+            for table in tables:
+                self.connection.execute(f'DELETE FROM "{table}" WHERE logID = ?', (logID,))
+            self.connection.execute('DELETE FROM logs WHERE logID = ?', (logID,))
+        if commit:
+            self.connection.commit()
+
+    def query(self, sql, params=(), parseDates=None):
+        '''Runs any SQL query on the catalog, see the tables in the class description.
+        Args:
+            sql (string): SQL query, with ? placeholders for params.
+            params (tuple): (Optional) Values of the placeholders, default ().
+            parseDates (list): (Optional) Text time columns to return as datetime64, default None.
+        Modifies:
+            None
+        Return:
+            (DataFrame): The rows of the query.
+        '''
+        return pd.read_sql_query(sql, self.connection, params=params, parse_dates=parseDates)
+
+    def logs(self, start=None, end=None, msgType=None, column=None, above=None, below=None):
+        '''Finds logs by time and by the range of a data field, e.g. logs(msgType='GPS', column='Alt',
+        above=120) for the flights that climbed above 120 m. Only the catalog is read.
+
+        Args:
+            start (datetime): (Optional) Only logs that end at or after this UTC time, datetime, pd.Timestamp,
+                              np.datetime64 or ISO string, default None.
+            end (datetime): (Optional) Only logs that start at or before this UTC time, default None.
+            msgType (string): (Optional) Only logs with messages of this Message Type Name, default None.
+            column (string): (Optional) Data field of msgType that above and below apply to, adds its Min and Max columns.
+            above (float): (Optional) Only logs where the maximum of column is greater than this, default None.
+            below (float): (Optional) Only logs where the minimum of column is less than this, default None.
+        Modifies:
+            None
+        Return:
+            (DataFrame): The rows of the logs table that match, in Start order.
+        '''
+        if (above is not None or below is not None) and column is None or column is not None and msgType is None:
+            raise ValueError('above and below need a column, and column needs a msgType')
+        sql, params = 'SELECT logs.*', []
+        joins, where = '', []
+        if msgType is not None:
+            joins += ' JOIN types ON types.logID = logs.logID AND types.MsgType = ?'
+            params.append(msgType)
+        if column is not None:
+            sql += ', fields.Min, fields.Max'
+            joins += ' JOIN fields ON fields.logID = logs.logID AND fields.MsgType = ? AND fields.Field = ?'
+            params += [msgType, column]
+        if above is not None:
+            where.append('fields.Max > ?')
+            params.append(above)
+        if below is not None:
+            where.append('fields.Min < ?')
+            params.append(below)
+        if start is not None:
+            where.append('logs.End >= ?')
+            params.append(_sqlTimes(pd.Timestamp(start).to_datetime64()))
+        if end is not None:
+            where.append('logs.Start <= ?')
+            params.append(_sqlTimes(pd.Timestamp(end).to_datetime64()))
+        sql += ' FROM logs' + joins + (' WHERE ' + ' AND '.join(where) if where else '') + ' ORDER BY logs.Start, logs.File'
+        return self.query(sql, params, self.LOG_TIMES)
+
+    def samples(self, msgType, columns=None, start=None, end=None, ranges=None):
+        '''Returns the downsampled messages of a message type across every log in the catalog, e.g.
+        samples('GPS', start='2024-05-01', ranges={'Lat': (37.0, 37.5), 'Lng': (-122.5, -122.0)}) for the
+        GPS fixes in a region since May.
+
+        Args:
+            msgType (string): Message Type Name, kept with ingest(samples=...).
+            columns (list): (Optional) Column headers of the data fields to return, default None returns every data field.
+            start (datetime): (Optional) First UTC time to include, see logs(), default None.
+            end (datetime): (Optional) Last UTC time to include, default None.
+            ranges (dict): (Optional) Column header: (low, high), only messages with low <= value <= high, default None.
+        Modifies:
+            None
+        Return:
+            (DataFrame): File, datetime_UTC and the data fields, in File and time order. Empty if msgType has no samples.
+        '''
+        table = f'samples_{msgType}'
+        existing = [row[1] for row in self.connection.execute(f'PRAGMA table_info("{table}")')]
+        if not existing:
+            return pd.DataFrame()
+        missing = [column for column in (columns or []) + list(ranges or {}) if column not in existing]
+        if missing:
+            raise KeyError(f'{table} has no column {", ".join(missing)}')
+        selected = ', '.join(f'"{table}"."{column}"' for column in (columns if columns is not None else existing[2:]))
+        where, params = [], []
+        if start is not None:
+            where.append(f'"{table}".datetime_UTC >= ?')
+            params.append(_sqlTimes(pd.Timestamp(start).to_datetime64()))
+        if end is not None:
+            where.append(f'"{table}".datetime_UTC <= ?')
+            params.append(_sqlTimes(pd.Timestamp(end).to_datetime64()))
+        for column, (low, high) in (ranges or {}).items():
+            where.append(f'"{table}"."{column}" BETWEEN ? AND ?')
+            params += [low, high]
+        sql = (f'SELECT logs.File, "{table}".datetime_UTC{", " + selected if selected else ""} FROM "{table}" JOIN logs ON logs.logID = "{table}".logID'
+               + (' WHERE ' + ' AND '.join(where) if where else '') + f' ORDER BY logs.File, "{table}".rowid')
+        return self.query(sql, params, ['datetime_UTC'])
+
+
+def main(argv=None):
+    '''Command line interface. Run without arguments to pick a single log with a file dialog.
+    Args:
+        argv (list): (Optional) Command line arguments, default None uses sys.argv.
+    Modifies:
+        None
+    Return:
+        (int): Exit status.
+    '''
+    parser = argparse.ArgumentParser(prog='ArduPilot_binParser', description='Parse ArduPilot .bin logs.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    batch = commands.add_parser('batch', help='parse a directory or glob of logs with a process pool')
+    batch.add_argument('source', help='directory of .bin files or glob pattern')
+    batch.add_argument('-o', '--output', help='directory for the exported message types and fleet_summary.csv')
+    batch.add_argument('-f', '--format', default='csv', choices=['parquet', 'arrow', 'hdf5', 'csv'], help='export format, default csv')
+    batch.add_argument('-z', '--compression', help='export compression codec, see ArduPilotLog.export()')
+    batch.add_argument('-t', '--types', nargs='+', help='message types to write, default all')
+    batch.add_argument('-j', '--workers', type=int, help='worker processes, default one per CPU')
+    batch.add_argument('--cache', help='parse cache directory')
+    scan = commands.add_parser('summary', help='message inventory, counts and time span of logs, from the packet headers only')
+    scan.add_argument('source', nargs='+', help='.bin files, directories of .bin files or glob patterns')
+    scan.add_argument('-j', '--workers', type=int, help='worker processes, default one per CPU')
+    scan.add_argument('-s', '--sort', default='File', help='column of the fleet table to sort by, default File')
+    scan.add_argument('-o', '--output', help='save the fleet table to this .csv file')
+    catalog = commands.add_parser('catalog', help='add logs to a SQLite catalog and query it, see LogCatalog')
+    catalog.add_argument('database', help='SQLite catalog file, created if it does not exist')
+    catalog.add_argument('source', nargs='*', help='.bin files, directories of .bin files or glob patterns to add')
+    catalog.add_argument('-s', '--samples', nargs='+', default=[], metavar='TYPE=SECONDS', help='keep one message of TYPE every SECONDS, e.g. GPS=1')
+    catalog.add_argument('-q', '--query', help='SQL query to run on the catalog after adding the logs')
+    catalog.add_argument('-j', '--workers', type=int, help='worker processes, default one per CPU')
+    catalog.add_argument('--cache', help='parse cache directory')
+    args = parser.parse_args(argv)
+    if args.command == 'batch':
+        summary = batchParse(args.source, types=args.types, outputDir=args.output, workers=args.workers, cacheDir=args.cache, verbose=True,
+                             fileFormat=args.format, compression=args.compression)
+        print(summary.to_string(index=False))
+        return int(summary['Error'].notna().any())
+    if args.command == 'summary':
+        fileNames = [fileName for source in args.source for fileName in _logFiles(source)]
+        if len(fileNames) == 1:     #one log, list its message types
+            with ArduPilotLog(fileNames[0]) as log:
+                summary = log.summary(workers=args.workers)
+            types = summary.pop('Types')
+            for key, value in summary.items():
+                print(f'{key+":":<14}{value}')
+            print(types.to_string(index=False))
+            return 0
+        summary = scanLogs(fileNames, workers=args.workers, verbose=True)
+        summary = summary.sort_values(args.sort, ascending=args.sort == 'File', kind='stable')
+        print(summary.to_string(index=False))
+        if args.output:
+            summary.to_csv(args.output, index=False)
+        return int(summary['Error'].notna().any())
+    if args.command == 'catalog':
+        samples = {msgType: float(seconds) for msgType, seconds in (sample.split('=') for sample in args.samples)}
+        with LogCatalog(args.database) as logCatalog:
+            status = pd.DataFrame(columns=['Error'])
+            if args.source:
+                status = logCatalog.ingest([fileName for source in args.source for fileName in _logFiles(source)], samples=samples,
+                                           workers=args.workers, cacheDir=args.cache, verbose=True)
+                print(status.to_string(index=False))
+            if args.query:
+                print(logCatalog.query(args.query).to_string(index=False))
+        return int(status['Error'].notna().any())
+    return 0
 
 
 
-if __name__ == '__main__':
+if __name__ == '__main__' and len(sys.argv) > 1:
+    sys.exit(main())
+elif __name__ == '__main__':
     import time         #Only used for testing, should be deleted
     import tkinter as tk   #Needed to stops and annoying gray box from popping up.   
     from tkinter.filedialog import askopenfilename  #user to open file manager
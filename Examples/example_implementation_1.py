@@ -6,28 +6,30 @@ Author:     Alex Zaleski
 
 import pandas as pd
 import matplotlib.pyplot as plt
-from ArduPilot_binParser import ArduPilotLog
+from ArduPilot_binParser import ArduPilotLog, Edges, FieldStats
 
 def printFlightReport(log):
+    '''Prints the takeoffs, landings, max altitude and max speed of the log. The numbers are
+    aggregated in a single streaming pass over the log, no messages are kept.'''
+    report = log.aggregate({'isFlying': Edges('STAT', 'isFlying'), 'Alt': FieldStats('GPS', 'Alt'), 'Spd': FieldStats('GPS', 'Spd')})
     print('\n-------------------------------------------------')
     print('                  FLIGHT REPORT')
     print('-------------------------------------------------')
-    param_STAT = log.filter('STAT')
-    takeoffs = param_STAT.loc[(param_STAT['isFlying'] == 1) & (param_STAT['isFlying'].shift() == 0)] # shift, shifts the values in the column down by one row, so that the value at each row is the value from the previous row.
+    edges = report['isFlying']
+    takeoffs = edges.loc[(edges['From'] == 0) & (edges['To'] == 1)]
     if takeoffs.empty:
        print(f'TAKEOFF:{"":<8}No takeoff recorded')
     else:
         for takeoff in takeoffs.itertuples():
-            print(f'TAKEOFF:{"":<8}{takeoff.Date} @ {takeoff.UTC} UTC.') 
-    lands = param_STAT.loc[(param_STAT['isFlying'] == 0) & (param_STAT['isFlying'].shift() == 1)]
+            print(f'TAKEOFF:{"":<8}{takeoff.datetime_UTC:%Y-%m-%d @ %H:%M:%S.%f} UTC.') 
+    lands = edges.loc[(edges['From'] == 1) & (edges['To'] == 0)]
     if lands.empty:
         print(f'LANDING:{"":<8}No landing recorded')
     else:
         for land in lands.itertuples():
-            print(f'LANDING:{"":<8}{takeoff.Date} @ {takeoff.UTC} UTC.')
-    param_GPS = log.filter('GPS')
-    print(f'Max Altitude:{"":<3}{round(param_GPS["Alt"].max(),2)} meters')
-    print(f'Max Speed:{"":<6}{round(param_GPS["Spd"].max(),2)} m/s')
+            print(f'LANDING:{"":<8}{land.datetime_UTC:%Y-%m-%d @ %H:%M:%S.%f} UTC.')
+    print(f'Max Altitude:{"":<3}{round(report["Alt"]["max"],2)} meters')
+    print(f'Max Speed:{"":<6}{round(report["Spd"]["max"],2)} m/s')
     print('-------------------------------------------------\n')
 
 
@@ -41,9 +43,7 @@ def plot_isFlying_Armed(log):
     Return:
         A pd.DataFrame with the fileds datetime_UTC, isFlying, and Armed as columns
     '''
-    param_STAT = log.filter('STAT')
-    param_STAT = param_STAT[['Date','UTC','isFlying','Armed']]
-    param_STAT['datetime_UTC'] = pd.to_datetime(param_STAT['Date']+' ' +param_STAT['UTC'])
+    param_STAT = log.filter('STAT', dateStrings=False)
     param_STAT = param_STAT[['datetime_UTC', 'isFlying', 'Armed']]
     plt.plot(param_STAT['datetime_UTC'], param_STAT['isFlying'], label='isFlying', marker='o')
     plt.plot(param_STAT['datetime_UTC'], param_STAT['Armed'], label='Armed', marker='x')
@@ -66,9 +66,7 @@ def plot_Alt_Spd(log):
     Return:
         A pd.DataFrame with the fileds datetime_UTC, Alt, and Spd as columns
     '''
-    param_GPS = log.filter('GPS')
-    param_GPS = param_GPS[['Date','UTC','Alt','Spd']]
-    param_GPS['datetime_UTC'] = pd.to_datetime(param_GPS['Date']+' ' +param_GPS['UTC'])
+    param_GPS = log.filter('GPS', dateStrings=False)
     param_GPS = param_GPS[['datetime_UTC', 'Alt', 'Spd']]
     # Plot altitude against left y-axis and speed against right y-axis
     fig, ax1 = plt.subplots()
@@ -3,9 +3,19 @@ Author:     Alex Zaleski
 
 '''
 
+import os
+import sys
+import json
+import asyncio
+import subprocess
+import multiprocessing
+import tempfile
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from ArduPilot_binParser import ArduPilotLog
+from ArduPilot_binParser import ArduPilotLog, batchParse, FieldStats, Edges, EventCount, Reducer, LogCatalog
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tools'))
+from synthBIN_writer import writeSyntheticLog, MESSAGE_FORMATS
 
 class error:
     def __init__ (self, errorMsg):
@@ -14,7 +24,7 @@ class error:
         self.actual=''
         
 
-def Test_Filter_Method(fileName):
+def Test_Filter_Method(fileName, expGPSMessages=756):
     errors = []
     log = ArduPilotLog(fileName)
     log.parse(verbose=False)
@@ -28,7 +38,7 @@ def Test_Filter_Method(fileName):
         errors.append(err)
  #Test good parameter type name
     param_GPS = log.filter("GPS")
-    expResponce = 756
+    expResponce = expGPSMessages
     if param_GPS.shape[0]!=expResponce:
         err=error("Incorrect number of messages filtered")
         err.expected=expResponce
@@ -43,18 +53,18 @@ def Test_Filter_Method(fileName):
     return errors
     
     
-def Test_All_Method(fileName):
+def Test_All_Method(fileName, expMessages=148394, expColumns=19):
     errors = []
     log = ArduPilotLog(fileName)
     log.parse(verbose=False)
     allData = log.all()
-    expResponce = 148394
+    expResponce = expMessages
     if allData.shape[0]!=expResponce:
         err=error("Did not return all messges")
         err.expected=expResponce
         err.actual=allData.shape[0]
         errors.append(err)
-    expResponce = ['Date', 'UTC', 'MsgType', 'Type', 'Length', 'Name', 'Format', 'Columns', 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18]
+    expResponce = ['Date', 'UTC', 'MsgType', 'Type', 'Length', 'Name', 'Format', 'Columns', *range(8, expColumns)]
     if allData.columns.tolist() != expResponce:
         err=error("Column headers are incorrect")
         err.expected=expResponce
@@ -63,6 +73,816 @@ def Test_All_Method(fileName):
     return errors
 
 
+def Test_AllLayouts_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    wide = log.all()
+    frames = log.all(layout='types')
+    actual = pd.concat(frames.values()).sort_index()['MsgType'].tolist()
+    if actual != wide['MsgType'].tolist():
+        err=error("Per message type dataFrames do not merge back into file order")
+        err.expected=len(wide)
+        err.actual=len(actual)
+        errors.append(err)
+    expResponce = log.filter('GPS')
+    actual = frames['GPS'].reset_index(drop=True)
+    if not expResponce.equals(actual):
+        err=error("Per message type dataFrame does not match filter()")
+        err.expected=expResponce.shape
+        err.actual=actual.shape
+        errors.append(err)
+    long = log.all(layout='long')
+    expResponce = sum(len(log.msgFormat[log.FMT2ID[msgType]][3])*len(frame) for msgType, frame in frames.items())
+    if len(long) != expResponce or long['MsgType'].dtype != 'category':
+        err=error("Long layout does not have one categorical row per data field")
+        err.expected=expResponce
+        err.actual=(len(long), long['MsgType'].dtype)
+        errors.append(err)
+    gpsRows = long[(long['MsgType'] == 'GPS') & (long['Field'] == 'Alt')]
+    if gpsRows['Value'].tolist() != log.filter('GPS')['Alt'].tolist():
+        err=error("Long layout values do not match filter()")
+        err.expected=log.filter('GPS')['Alt'].head().tolist()
+        err.actual=gpsRows['Value'].head().tolist()
+        errors.append(err)
+    return errors
+
+
+def Test_BuildIndex_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    expResponce = len(log.messages)
+    if len(log.packetOffsets)!=expResponce:
+        err=error("Packet index does not match the number of parsed messages")
+        err.expected=expResponce
+        err.actual=len(log.packetOffsets)
+        errors.append(err)
+    expResponce = sum(len(offsets) for offsets in log.packetIndex.values())
+    if len(log.packetOffsets)!=expResponce:
+        err=error("Per message type offsets do not add up to the packet index")
+        err.expected=expResponce
+        err.actual=len(log.packetOffsets)
+        errors.append(err)
+    expResponce = log.FMT2ID['GPS']
+    actual = [msg.typeID for msg in log.messages if msg.type == 'GPS']
+    if len(log.packetIndex.get(expResponce, [])) != len(actual):
+        err=error("GPS offsets do not match the number of GPS messages")
+        err.expected=len(actual)
+        err.actual=len(log.packetIndex.get(expResponce, []))
+        errors.append(err)
+    return errors
+
+
+def Test_LazyParse_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    lazyLog = ArduPilotLog(fileName)
+    lazyLog.parse(lazy=True)
+    if 'messages' in lazyLog.parseStats['phases']:
+        err=error("Lazy parse should not build the message list")
+        err.expected=list(log.parseStats['phases'].keys()-{'messages'})
+        err.actual=list(lazyLog.parseStats['phases'])
+        errors.append(err)
+    for msgType in ['GPS','FMT']:
+        expResponce = log.filter(msgType)
+        actual = lazyLog.filter(msgType)
+        if not expResponce.equals(actual):
+            err=error(f"Lazy filter('{msgType}') does not match a full parse")
+            err.expected=expResponce.shape
+            err.actual=actual.shape
+            errors.append(err)
+    expResponce = len(log.messages)
+    if len(lazyLog.messages)!=expResponce or 'messages' not in lazyLog.parseStats['phases']:
+        err=error("The message list of a lazy parse is not built on first access")
+        err.expected=expResponce
+        err.actual=len(lazyLog.messages)
+        errors.append(err)
+    return errors
+
+
+def Test_Streaming_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    streamLog = ArduPilotLog(fileName)
+    expResponce = log.filter('GPS')
+    frames = list(streamLog.iterFrames('GPS', chunksize=100))
+    actual = pd.concat(frames, ignore_index=True)
+    if not expResponce.equals(actual):
+        err=error("Streamed GPS dataFrames do not match filter('GPS')")
+        err.expected=expResponce.shape
+        err.actual=actual.shape
+        errors.append(err)
+    if max(len(frame) for frame in frames) > 100:
+        err=error("Streamed dataFrame is larger than chunksize")
+        err.expected=100
+        err.actual=max(len(frame) for frame in frames)
+        errors.append(err)
+    expResponce = len(log.messages)
+    actual = sum(1 for msg in streamLog.iterMessages())
+    if actual!=expResponce:
+        err=error("iterMessages() did not return all messages")
+        err.expected=expResponce
+        err.actual=actual
+        errors.append(err)
+    return errors
+
+
+def Test_ParallelParse_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    parallelLog = ArduPilotLog(fileName)
+    parallelLog.parse(workers=4)
+    if log.packetOffsets.tolist() != parallelLog.packetOffsets.tolist():
+        err=error("Parallel packet index does not match a serial parse")
+        err.expected=len(log.packetOffsets)
+        err.actual=len(parallelLog.packetOffsets)
+        errors.append(err)
+    for msgType in ['GPS','FMT']:
+        expResponce = log.filter(msgType)
+        actual = parallelLog.filter(msgType)
+        if not expResponce.equals(actual):
+            err=error(f"Parallel filter('{msgType}') does not match a serial parse")
+            err.expected=expResponce.shape
+            err.actual=actual.shape
+            errors.append(err)
+    return errors
+
+
+def Test_ParseCache_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    with tempfile.TemporaryDirectory() as cacheDir:
+        ArduPilotLog(fileName, cacheDir=cacheDir).parse()
+        cachedLog = ArduPilotLog(fileName, cacheDir=cacheDir)
+        cachedLog.parse(lazy=True)
+        if cachedLog.packetOffsets is None or not hasattr(cachedLog.packetOffsets, 'filename'):
+            err=error("Second parse was not loaded from the cache")
+            err.expected='memory-mapped packet index'
+            err.actual=type(cachedLog.packetOffsets)
+            errors.append(err)
+        for msgType in ['GPS','FMT']:
+            expResponce = log.filter(msgType)
+            actual = cachedLog.filter(msgType)
+            if not expResponce.equals(actual):
+                err=error(f"Cached filter('{msgType}') does not match a full parse")
+                err.expected=expResponce.shape
+                err.actual=actual.shape
+                errors.append(err)
+        try:
+            actual = cachedLog.all(layout='long')
+            if not actual.equals(log.all(layout='long')):
+                err=error("Cached all(layout='long') does not match a full parse")
+                err.expected=log.all(layout='long').shape
+                err.actual=actual.shape
+                errors.append(err)
+        except ValueError as e:
+            err=error("Cached all(layout='long') failed on the text fields")
+            err.expected='long dataFrame'
+            err.actual=e
+            errors.append(err)
+        typesAndColumns = {'GPS': ['Alt'], 'MSG': ['Message']}
+        try:
+            actual = cachedLog.align(typesAndColumns, tolerance=0.01)
+            if not actual.equals(log.align(typesAndColumns, tolerance=0.01)):
+                err=error("Cached align() does not match a full parse")
+                err.expected=log.align(typesAndColumns, tolerance=0.01).shape
+                err.actual=actual.shape
+                errors.append(err)
+        except ValueError as e:
+            err=error("Cached align() failed on the text fields")
+            err.expected='aligned dataFrame'
+            err.actual=e
+            errors.append(err)
+    return errors
+
+
+def Test_BatchParse_Method(fileName):
+    errors = []
+    with tempfile.TemporaryDirectory() as outputDir:
+        badFile = os.path.join(outputDir, 'missing.BIN')
+        summary = batchParse([fileName, badFile], types=['GPS'], outputDir=outputDir, workers=2)
+        expected = ArduPilotLog(fileName).flightSummary()
+        if summary['Messages'][0] != expected['Messages'] or summary['Takeoffs'][0] != expected['Takeoffs']:
+            err=error("Fleet summary row does not match flightSummary()")
+            err.expected=expected
+            err.actual=summary.iloc[0].to_dict()
+            errors.append(err)
+        if not pd.isna(summary['Error'][0]) or pd.isna(summary['Error'][1]):
+            err=error("Parse errors were not isolated to the bad log")
+            err.expected=[None, 'FileNotFoundError']
+            err.actual=list(summary['Error'])
+            errors.append(err)
+        gpsFile = os.path.join(outputDir, os.path.splitext(os.path.basename(fileName))[0] + '_GPS.csv')
+        if not os.path.exists(gpsFile) or not os.path.exists(os.path.join(outputDir, 'fleet_summary.csv')):
+            err=error("Per-log CSVs or fleet_summary.csv were not written")
+            err.expected=gpsFile
+            err.actual=os.listdir(outputDir)
+            errors.append(err)
+    return errors
+
+
+def Test_DamagedLog_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    with open(fileName, 'rb') as f:
+        data = f.read()
+    garbage = b'\xa3\x95\xfe' + bytes(range(40))     #unknown Message Type ID followed by junk
+    middle = int(log.packetOffsets[len(log.packetOffsets)//2])
+    with tempfile.TemporaryDirectory() as tempDir:
+        damagedFile = os.path.join(tempDir, 'damaged.BIN')
+        with open(damagedFile, 'wb') as f:
+            f.write(data[:middle] + garbage + data[middle:-5])     #the last packet is cut off too
+        damagedLog = ArduPilotLog(damagedFile)
+        damagedLog.parse(lazy=True)
+        if len(damagedLog.packetOffsets) != len(log.packetOffsets)-1:
+            err=error("Damaged log did not keep every undamaged packet")
+            err.expected=len(log.packetOffsets)-1
+            err.actual=len(damagedLog.packetOffsets)
+            errors.append(err)
+        damage = damagedLog.damageReport()
+        lastPacketLength = log.fileSize-int(log.packetOffsets[-1])
+        expResponce = [(middle, len(garbage)), (damagedLog.fileSize-lastPacketLength+5, lastPacketLength-5)]
+        if damage['skippedRanges'] != expResponce or damage['badPackets'] != 2:
+            err=error("Incorrect damage report")
+            err.expected=expResponce
+            err.actual=damage
+            errors.append(err)
+        damagedLog.close()
+        #junk after every 20th packet, each scan that resumes part way must keep the same packets as a serial scan
+        rng = np.random.default_rng(0)
+        cuts = log.packetOffsets[50::20].tolist()
+        pieces = [data[start:stop] + rng.integers(0, 256, int(rng.integers(1, 30)), dtype=np.uint8).tobytes()
+                  for start, stop in zip([0]+cuts, cuts)]
+        with open(damagedFile, 'wb') as f:
+            f.write(b''.join(pieces) + data[cuts[-1]:])
+        damagedLog = ArduPilotLog(damagedFile)
+        damagedLog.parse(lazy=True)
+        expResponce = damagedLog.packetOffsets.tolist()
+        for workers in [2, 3, 5]:
+            parallelLog = ArduPilotLog(damagedFile)
+            parallelLog.parse(lazy=True, workers=workers)
+            if parallelLog.packetOffsets.tolist() != expResponce:
+                err=error(f"Damaged log parse(workers={workers}) does not match a serial parse")
+                err.expected=len(expResponce)
+                err.actual=len(parallelLog.packetOffsets)
+                errors.append(err)
+        for blockSize in [4096, 10000]:
+            actual = np.concatenate([offsets for offsets, types in ArduPilotLog(damagedFile).iterIndex(blockSize=blockSize)]).tolist()
+            if actual != expResponce:
+                err=error(f"Damaged log iterIndex(blockSize={blockSize}) does not match a serial parse")
+                err.expected=len(expResponce)
+                err.actual=len(actual)
+                errors.append(err)
+            actual = sum(1 for msg in ArduPilotLog(damagedFile).iterMessages(blockSize=blockSize))
+            if actual != len(expResponce):
+                err=error(f"Damaged log iterMessages(blockSize={blockSize}) does not match a serial parse")
+                err.expected=len(expResponce)
+                err.actual=actual
+                errors.append(err)
+        damagedLog.close()
+    return errors
+
+
+def Test_Update_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    with open(fileName, 'rb') as f:
+        data = f.read()
+    with tempfile.TemporaryDirectory() as tempDir:
+        growingFile = os.path.join(tempDir, 'growing.BIN')
+        cuts = [len(data)//7+1, len(data)//3+2, len(data)//2+3, len(data)]     #cut through packets, not between them
+        with open(growingFile, 'wb') as f:
+            f.write(data[:cuts[0]])
+        growingLog = ArduPilotLog(growingFile)
+        growingLog.parse(lazy=True)
+        growingLog.filter('GPS')
+        for start, stop in zip(cuts[:-1], cuts[1:]):
+            with open(growingFile, 'ab') as f:
+                f.write(data[start:stop])
+            growingLog.update()
+        for msgType in log.getMessageTypes():
+            expResponce = log.filter(msgType)
+            actual = growingLog.filter(msgType)
+            if not expResponce.equals(actual):
+                err=error(f"filter('{msgType}') after update() does not match a parse of the whole file")
+                err.expected=expResponce.shape
+                err.actual=actual.shape
+                errors.append(err)
+        growingLog.close()
+    return errors
+
+
+def Test_MessageStore_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(verbose=False)
+    expResponce = [(msg.type, msg.date, msg.timeUTC, msg.data) for msg in ArduPilotLog(fileName).iterMessages()]
+    actual = [(msg.type, msg.date, msg.timeUTC, msg.data) for msg in log.messages]
+    if actual != expResponce:
+        err=error("Iterating the message store does not return every message in file order")
+        err.expected=len(expResponce)
+        err.actual=len(actual)
+        errors.append(err)
+    indexed = [log.messages[0], log.messages[-1], *log.messages[10:13]]
+    actual = [(msg.type, msg.date, msg.timeUTC, msg.data) for msg in indexed]
+    if actual != [expResponce[0], expResponce[-1], *expResponce[10:13]]:
+        err=error("Indexing the message store returned the wrong messages")
+        err.expected=[msg[0] for msg in [expResponce[0], expResponce[-1], *expResponce[10:13]]]
+        err.actual=[msg[0] for msg in actual]
+        errors.append(err)
+    return errors
+
+
+def Test_Export_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    with tempfile.TemporaryDirectory() as outputDir:
+        for compression in [None, 'gzip']:
+            fileNames = log.export('csv', types=['GPS', 'FMT'], outputDir=outputDir, compression=compression, chunksize=100)
+            for msgType, exportFile in zip(['GPS', 'FMT'], fileNames):
+                expResponce = log.filter(msgType, dateStrings=False)
+                actual = pd.read_csv(exportFile, parse_dates=['datetime_UTC'])
+                if expResponce.shape != actual.shape or not np.allclose(expResponce['TimeUS' if msgType == 'GPS' else 'Type'], actual.iloc[:,2]):
+                    err=error(f"Exported {msgType} .csv ({compression}) does not match filter()")
+                    err.expected=expResponce.shape
+                    err.actual=actual.shape
+                    errors.append(err)
+    return errors
+
+
+def Test_TimeWindow_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    gps = log.filter('GPS', dateStrings=False)
+    start, end = gps['TimeUS'][len(gps)//4], gps['TimeUS'][len(gps)//2]
+    windowLog = ArduPilotLog(fileName)
+    windowLog.parse(lazy=True)
+    expResponce = gps[(gps['TimeUS'] >= start) & (gps['TimeUS'] <= end)].reset_index(drop=True)
+    actual = windowLog.filter('GPS', dateStrings=False, start=start, end=end)
+    if not expResponce.equals(actual):
+        err=error("TimeUS window does not match slicing the whole message type")
+        err.expected=expResponce.shape
+        err.actual=actual.shape
+        errors.append(err)
+    start, end = gps['datetime_UTC'][len(gps)//4], gps['datetime_UTC'][len(gps)//2]
+    expResponce = gps[(gps['datetime_UTC'] >= start) & (gps['datetime_UTC'] <= end)].reset_index(drop=True)
+    actual = windowLog.filter('GPS', dateStrings=False, start=start, end=str(end))
+    if not expResponce.equals(actual):
+        err=error("UTC window does not match slicing the whole message type")
+        err.expected=expResponce.shape
+        err.actual=actual.shape
+        errors.append(err)
+    with tempfile.TemporaryDirectory() as tempDir:
+        noGPSFile = os.path.join(tempDir, 'noGPS.BIN')
+        writeSyntheticLog(noGPSFile, seconds=10, rates={'IMU': 100, 'STAT': 10})
+        with ArduPilotLog(noGPSFile) as noGPSLog:
+            noGPSLog.parse(lazy=True)
+            for bounds in [{'start': start}, {'end': end}]:
+                try:
+                    actual = noGPSLog.filter('IMU', **bounds)
+                    err=error(f"UTC {next(iter(bounds))} bound on a log without GPS did not raise ValueError")
+                    err.expected='ValueError'
+                    err.actual=actual.shape
+                    errors.append(err)
+                except ValueError:
+                    pass
+    return errors
+
+
+def Test_ColumnProjection_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    expResponce = log.filter('GPS')[['Date', 'UTC', 'MsgType', 'Alt', 'TimeUS', 'Lat']]
+    projectedLog = ArduPilotLog(fileName)
+    projectedLog.parse(lazy=True)
+    actual = projectedLog.filter('GPS', columns=['Alt', 'TimeUS', 'Lat'])
+    if not expResponce.equals(actual):
+        err=error("Projected columns do not match the same columns of a full filter()")
+        err.expected=expResponce.columns.tolist()
+        err.actual=actual.columns.tolist()
+        errors.append(err)
+    try:
+        projectedLog.filter('GPS', columns=['NotAColumn'])
+        err=error("Unknown column did not raise KeyError")
+        err.expected='KeyError'
+        err.actual='no error'
+        errors.append(err)
+    except KeyError:
+        pass
+    expResponce = log.filter('GPS')[['Date', 'UTC', 'MsgType']]
+    actual = projectedLog.filter('GPS', columns=[])
+    if not expResponce.equals(actual):
+        err=error("An empty column list does not return only the time and MsgType columns")
+        err.expected=expResponce.columns.tolist()
+        err.actual=actual.columns.tolist()
+        errors.append(err)
+    try:
+        projectedLog.filter('GPS', columns=['Alt', 'Alt'])
+        err=error("Repeated column did not raise ValueError")
+        err.expected='ValueError'
+        err.actual='no error'
+        errors.append(err)
+    except ValueError:
+        pass
+    return errors
+
+
+def Test_ParseStats_Method(fileName):
+    errors = []
+    progress = []
+    log = ArduPilotLog(fileName)
+    log.parse(progress=progress.append, profile=True)
+    phases = [update['phase'] for update in progress]
+    if not progress or phases[0] != 'scan' or progress[-1]['phase'] != 'decode' or progress[-1]['bytes'] != progress[-1]['totalBytes']:
+        err=error("Progress did not run from the scan to the end of the decode")
+        err.expected="scan ... decode 100%"
+        err.actual=progress[:1]+progress[-1:]
+        errors.append(err)
+    expResponce = {'scan', 'decode', 'times', 'messages'}
+    if not expResponce <= set(log.parseStats['phases']):
+        err=error("Missing parse phase timings")
+        err.expected=expResponce
+        err.actual=set(log.parseStats['phases'])
+        errors.append(err)
+    if log.parseStats['profile'] is None:
+        err=error("profile=True did not record a profile")
+        err.expected='pstats.Stats'
+        err.actual=None
+        errors.append(err)
+    stats = log.typeStats()
+    expResponce = len(log.packetOffsets)
+    if stats['Packets'].sum() != expResponce or stats['DecodeSeconds'].isna().any():
+        err=error("typeStats() does not count every packet and decode time")
+        err.expected=expResponce
+        err.actual=stats['Packets'].sum()
+        errors.append(err)
+    return errors
+
+
+def Test_Summary_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    summary = log.summary()
+    if log.typeStats()['DecodeSeconds'].notna().any():
+        err=error("summary() decoded message types")
+        err.expected='nothing decoded'
+        err.actual=log.typeStats()
+        errors.append(err)
+    parsedLog = ArduPilotLog(fileName)
+    parsedLog.parse(lazy=True)
+    types = summary['Types'].set_index('MsgType')
+    for msgType in ['GPS', 'IMU', 'STAT']:
+        expResponce = parsedLog.filter(msgType)['TimeUS']
+        actual = types.loc[msgType]
+        if actual['Packets'] != len(expResponce) or actual['FirstTimeUS'] != expResponce.iloc[0] or actual['LastTimeUS'] != expResponce.iloc[-1]:
+            err=error(f"Wrong {msgType} count or time span")
+            err.expected=(len(expResponce), expResponce.iloc[0], expResponce.iloc[-1])
+            err.actual=(actual['Packets'], actual['FirstTimeUS'], actual['LastTimeUS'])
+            errors.append(err)
+    expResponce = parsedLog.flightSummary()
+    if summary['Duration'] != expResponce['Duration'] or summary['Messages'] != expResponce['Messages']:
+        err=error("summary() disagrees with flightSummary()")
+        err.expected=(expResponce['Duration'], expResponce['Messages'])
+        err.actual=(summary['Duration'], summary['Messages'])
+        errors.append(err)
+    with tempfile.TemporaryDirectory() as tempDir:
+        noFixFile = os.path.join(tempDir, 'nofix.BIN')
+        for fixDelay, expFix in [(3.0, True), (60.0, False)]:
+            writeSyntheticLog(noFixFile, seconds=20, seed=5, fixDelay=fixDelay)
+            gps = ArduPilotLog(noFixFile)
+            gps.parse(lazy=True)
+            gps = gps.filter('GPS', columns=['Status', 'GWk', 'GMS'])
+            fixes = gps[gps['Status'] >= 3]
+            expResponce = None
+            if expFix:
+                expResponce = (pd.Timestamp('1980-01-06') + pd.Timedelta(weeks=int(fixes['GWk'].iloc[0])) +
+                               pd.Timedelta(milliseconds=int(fixes['GMS'].iloc[0])) - pd.Timedelta(seconds=18)).to_datetime64()
+            actual = ArduPilotLog(noFixFile).summary()['FirstGPS']
+            if (gps['Status'].iloc[0] >= 3) or (actual is None) != (expResponce is None) or (expFix and actual != expResponce):
+                err=error("FirstGPS is not the time of the first GPS fix")
+                err.expected=expResponce
+                err.actual=actual
+                errors.append(err)
+    return errors
+
+
+def Test_Align_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    aligned = log.align({'IMU': ['AccZ'], 'GPS': ['Alt', 'Spd']})
+    param_IMU = log.filter('IMU', dateStrings=False)
+    param_GPS = log.filter('GPS', dateStrings=False)
+    expResponce = pd.merge_asof(param_IMU[['TimeUS']], param_GPS[['TimeUS', 'Alt', 'Spd']].rename(columns={'TimeUS': 'GPSTimeUS'}),
+                                left_on='TimeUS', right_on='GPSTimeUS', direction='backward')
+    for column in ['Alt', 'Spd']:
+        if not np.allclose(aligned[f'GPS.{column}'], expResponce[column], equal_nan=True):
+            err=error(f"As-of join of GPS.{column} does not match pandas.merge_asof()")
+            err.expected=expResponce[column].head().tolist()
+            err.actual=aligned[f'GPS.{column}'].head().tolist()
+            errors.append(err)
+    if not (aligned['datetime_UTC'].values == param_IMU['datetime_UTC'].values).all():
+        err=error("Joined rows do not keep the time stamps of the on message type")
+        err.expected=param_IMU['datetime_UTC'].head().tolist()
+        err.actual=aligned['datetime_UTC'].head().tolist()
+        errors.append(err)
+    grid = log.align({'GPS': ['Alt'], 'STAT': ['isFlying']}, rate=2, start=10, end=20, method='linear')
+    expResponce = np.arange(10, 20.5, 0.5)
+    if len(grid) != len(expResponce) or not np.allclose(grid['TimeUS'], expResponce):
+        err=error("Resampled grid has the wrong run times")
+        err.expected=expResponce.tolist()
+        err.actual=grid['TimeUS'].tolist()
+        errors.append(err)
+    try:
+        actual = ArduPilotLog(fileName).align({'IMU': ['AccZ'], 'GPS': ['Alt', 'Spd']})
+        if not actual.equals(aligned):
+            err=error("align() on a log that was not parsed yet does not match a parsed log")
+            err.expected=aligned.shape
+            err.actual=actual.shape
+            errors.append(err)
+    except KeyError as e:
+        err=error("align() did not parse the log first")
+        err.expected='aligned dataFrame'
+        err.actual=e
+        errors.append(err)
+    return errors
+
+
+def Test_Aggregate_Method(fileName):
+    errors = []
+    results = ArduPilotLog(fileName).aggregate({'Alt': FieldStats('GPS', 'Alt'), 'isFlying': Edges('STAT', 'isFlying'),
+                                                'fixes': EventCount('GPS', 'Status', 3), 'IMU': Reducer('IMU', lambda count, block: count+len(block['TimeUS']), 0)},
+                                               blockSize=65536)
+    log = ArduPilotLog(fileName)
+    log.parse(lazy=True)
+    param_GPS = log.filter('GPS')
+    expResponce = {'min': param_GPS['Alt'].min(), 'max': param_GPS['Alt'].max(), 'count': len(param_GPS)}
+    actual = {key: results['Alt'][key] for key in expResponce}
+    if expResponce != actual or not np.isclose(results['Alt']['mean'], param_GPS['Alt'].mean()):
+        err=error("FieldStats does not match the filtered GPS Alt column")
+        err.expected=expResponce
+        err.actual=results['Alt']
+        errors.append(err)
+    param_STAT = log.filter('STAT', dateStrings=False)
+    expResponce = param_STAT.loc[param_STAT['isFlying'] != param_STAT['isFlying'].shift()].iloc[1:]
+    if expResponce['datetime_UTC'].tolist() != results['isFlying']['datetime_UTC'].tolist() or expResponce['isFlying'].tolist() != results['isFlying']['To'].tolist():
+        err=error("Edges does not find the isFlying changes")
+        err.expected=expResponce[['datetime_UTC', 'isFlying']]
+        err.actual=results['isFlying']
+        errors.append(err)
+    expResponce = (int((param_GPS['Status'] == 3).sum()), len(log.filter('IMU')))
+    if expResponce != (results['fixes'], results['IMU']):
+        err=error("Wrong EventCount or Reducer result")
+        err.expected=expResponce
+        err.actual=(results['fixes'], results['IMU'])
+        errors.append(err)
+    return errors
+
+
+def Test_RandomAccess_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.buildIndex()
+    viewLog = ArduPilotLog(fileName)
+    offsets = np.concatenate([blockOffsets for blockOffsets, blockTypes in viewLog.iterIndex(blockSize=4096)])
+    if not np.array_equal(offsets, log.packetOffsets):
+        err=error("iterIndex() does not walk the same packets as buildIndex()")
+        err.expected=len(log.packetOffsets)
+        err.actual=len(offsets)
+        errors.append(err)
+    param_GPS = log.filter('GPS')
+    packet = viewLog.readPacket(int(log.packetIndex[log.FMT2ID['GPS']][10]))
+    expResponce = param_GPS.iloc[10]
+    if packet['MsgType'] != 'GPS' or packet['Fields']['Alt'] != expResponce['Alt'] or packet['Fields']['TimeUS']*1e-6 != expResponce['TimeUS']:
+        err=error("readPacket() does not decode the 11th GPS message")
+        err.expected=expResponce[['TimeUS', 'Alt']].tolist()
+        err.actual=packet['Fields']
+        errors.append(err)
+    seconds = param_GPS['TimeUS'].iloc[len(param_GPS)//2]
+    offset = ArduPilotLog(fileName).seekTime(seconds)
+    runtimeOffsets = np.concatenate([log.packetIndex[log.FMT2ID[msgType]] for msgType in ['GPS', 'IMU', 'ATT', 'STAT'] if msgType in log.FMT2ID])
+    runTimes = pd.concat([log.filter(msgType, columns=['TimeUS'])['TimeUS'] for msgType in ['GPS', 'IMU', 'ATT', 'STAT'] if msgType in log.FMT2ID]).to_numpy()
+    expResponce = int(runtimeOffsets[runTimes >= seconds].min())
+    if offset != expResponce:
+        err=error("seekTime() does not find the first packet at the run time")
+        err.expected=expResponce
+        err.actual=offset
+        errors.append(err)
+    return errors
+
+
+def Test_ParseAsync_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse()
+    asyncLog = ArduPilotLog(fileName)
+    progress = []
+    asyncio.run(asyncLog.parseAsync(progress=progress.append))
+    if not asyncLog.filter('GPS').equals(log.filter('GPS')) or not progress:
+        err=error("parseAsync() does not parse the same as parse() or reports no progress")
+        err.expected=log.filter('GPS').shape
+        err.actual=(asyncLog.filter('GPS').shape, len(progress))
+        errors.append(err)
+    async def cancelled():
+        cancelLog = ArduPilotLog(fileName)
+        task = asyncio.create_task(cancelLog.parseAsync(progress=lambda update: task.cancel()))
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+    if not asyncio.run(cancelled()):
+        err=error("Cancelling parseAsync() did not stop the parse")
+        err.expected='CancelledError'
+        err.actual='parse finished'
+        errors.append(err)
+    async def frames():
+        return [df async for df in ArduPilotLog(fileName).iterFramesAsync('GPS', chunksize=100)]
+    expResponce = log.filter('GPS')
+    actual = pd.concat(asyncio.run(frames()), ignore_index=True)
+    if not expResponce.equals(actual):
+        err=error("iterFramesAsync() chunks do not join up to filter()")
+        err.expected=expResponce.shape
+        err.actual=actual.shape
+        errors.append(err)
+    return errors
+
+
+def attachedFilter(descriptor, msgType, results):
+    with ArduPilotLog.attach(descriptor) as log:
+        results.put(log.filter(msgType))
+
+
+def Test_SharedMemory_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse()
+    descriptor = log.publish(types=['GPS', 'MSG'])
+    try:
+        attached = ArduPilotLog.attach(descriptor)
+        for msgType in ['GPS', 'MSG', 'IMU']:     #IMU is not published and is decoded from the file
+            if not attached.filter(msgType).equals(log.filter(msgType)):
+                err=error(f"attach() does not return the same {msgType} messages as the published log")
+                err.expected=log.filter(msgType).shape
+                err.actual=attached.filter(msgType).shape
+                errors.append(err)
+        if attached.arrays('GPS')['TimeUS'].flags.writeable:
+            err=error("Attached arrays are writable")
+            err.expected=False
+            err.actual=True
+            errors.append(err)
+        #update() maps the file again, the published block and the attached arrays must stay
+        if log.update() != 0 or attached.update() != 0 or attached.packetOffsets is None:
+            err=error("update() with no new packets changed the published or attached log")
+            err.expected=(0, 0)
+            err.actual=type(attached.packetOffsets)
+            errors.append(err)
+        try:
+            with ArduPilotLog.attach(descriptor) as reattached:
+                if not reattached.filter('GPS').equals(log.filter('GPS')):
+                    err=error("attach() after update() does not return the published messages")
+                    err.expected=log.filter('GPS').shape
+                    err.actual=reattached.filter('GPS').shape
+                    errors.append(err)
+        except FileNotFoundError:
+            err=error("update() freed the published shared memory block")
+            err.expected='attached'
+            err.actual='FileNotFoundError'
+            errors.append(err)
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        process = context.Process(target=attachedFilter, args=(descriptor, 'GPS', results))
+        process.start()
+        actual = results.get()
+        process.join()
+        if not actual.equals(log.filter('GPS')):
+            err=error("attach() in another process does not return the published messages")
+            err.expected=log.filter('GPS').shape
+            err.actual=actual.shape
+            errors.append(err)
+        attached.close()
+        if attached.packetOffsets is not None or attached.packetIndex:
+            err=error("close() did not release the arrays of the attached log")
+            err.expected='no arrays'
+            err.actual=type(attached.packetOffsets)
+            errors.append(err)
+        code = (f"import sys, json; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); from ArduPilot_binParser import ArduPilotLog; "
+                "log = ArduPilotLog.attach(json.loads(sys.stdin.read())); log.filter('GPS'); log.close()")
+        result = subprocess.run([sys.executable, '-c', code], input=json.dumps(descriptor), capture_output=True, text=True)
+        if result.returncode or result.stderr:
+            err=error("Attaching and closing in another process failed or warned")
+            err.expected='exit code 0, no output'
+            err.actual=(result.returncode, result.stderr)
+            errors.append(err)
+    finally:
+        log.unpublish()
+    try:
+        ArduPilotLog.attach(descriptor)
+        err=error("The shared memory block is still there after unpublish()")
+        err.expected='FileNotFoundError'
+        err.actual='attached'
+        errors.append(err)
+    except FileNotFoundError:
+        pass
+    return errors
+
+
+def Test_Categorical_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse()
+    for msgType, header in [('MSG', 'Message'), ('PARM', 'Name'), ('FMT', 'Columns')]:
+        df = log.filter(msgType)
+        objects = log.filter(msgType, categorical=False)
+        if not isinstance(df[header].dtype, pd.CategoricalDtype) or isinstance(objects[header].dtype, pd.CategoricalDtype):
+            err=error(f"{msgType}.{header} is not Categorical in filter() or is Categorical with categorical=False")
+            err.expected=('category', 'str')
+            err.actual=(df[header].dtype, objects[header].dtype)
+            errors.append(err)
+        elif df[header].tolist() != objects[header].tolist() or any('\x00' in value for value in objects[header]):
+            err=error(f"{msgType}.{header} values differ between Categorical and object columns or hold NUL padding")
+            err.expected=objects[header].head(3).tolist()
+            err.actual=df[header].head(3).tolist()
+            errors.append(err)
+    full = log.filter('MSG')
+    window = log.filter('MSG', start=full['TimeUS'].iloc[1], end=full['TimeUS'].iloc[-2])
+    with tempfile.TemporaryDirectory() as cacheDir:
+        ArduPilotLog(fileName, cacheDir=cacheDir).parse()
+        cachedLog = ArduPilotLog(fileName, cacheDir=cacheDir)
+        cachedLog.parse(lazy=True)
+        cached = cachedLog.filter('MSG')
+    if not window.equals(full.iloc[1:-1].reset_index(drop=True)) or not cached.equals(full):
+        err=error("Categorical MSG.Message differs between the whole log, a time window and the parse cache")
+        err.expected=list(full['Message'].cat.categories[:3])
+        err.actual=(list(window['Message'].cat.categories[:3]), list(cached['Message'].cat.categories[:3]))
+        errors.append(err)
+    return errors
+
+
+def Test_Catalog_Method(fileName):
+    errors = []
+    log = ArduPilotLog(fileName)
+    log.parse()
+    gps = log.filter('GPS')
+    with tempfile.TemporaryDirectory() as tempDir:
+        with LogCatalog(os.path.join(tempDir, 'catalog.db')) as catalog:
+            status = catalog.ingest([fileName], samples={'GPS': 1.0}, workers=1)
+            again = catalog.ingest([fileName], workers=1)
+            if status['Status'].tolist() != ['ingested'] or again['Status'].tolist() != ['unchanged']:
+                err=error("ingest() did not add the log once and skip it the second time")
+                err.expected=['ingested', 'unchanged']
+                err.actual=status['Status'].tolist()+again['Status'].tolist()
+                errors.append(err)
+            found = catalog.logs(msgType='GPS', column='Alt', above=gps['Alt'].max()-1)
+            missed = catalog.logs(msgType='GPS', column='Alt', above=gps['Alt'].max()+1)
+            if found['File'].tolist() != [os.path.abspath(fileName)] or len(missed) or found['Max'].iloc[0] != gps['Alt'].max():
+                err=error("logs() does not find the log by its maximum GPS altitude")
+                err.expected=(os.path.abspath(fileName), gps['Alt'].max(), 0)
+                err.actual=(found['File'].tolist(), found['Max'].tolist(), len(missed))
+                errors.append(err)
+            samples = catalog.samples('GPS', columns=['TimeUS', 'Alt'])
+            expSamples = len(np.unique((gps['TimeUS']//1.0).to_numpy()))
+            if len(samples) != expSamples or not samples['Alt'].isin(gps['Alt']).all():
+                err=error("samples() does not return one GPS message per second of the log")
+                err.expected=expSamples
+                err.actual=len(samples)
+                errors.append(err)
+            types = catalog.query('SELECT MsgType, Packets FROM types')
+            if dict(zip(types['MsgType'], types['Packets'])).get('GPS') != len(gps):
+                err=error("The types table does not count the GPS messages of the log")
+                err.expected=len(gps)
+                err.actual=dict(zip(types['MsgType'], types['Packets'])).get('GPS')
+                errors.append(err)
+            #a missing file only fails its own row, a log whose first GPS messages have no fix starts at UTC all the same
+            delayedFile = os.path.join(tempDir, 'delayed.BIN')
+            writeSyntheticLog(delayedFile, seconds=30, seed=4, fixDelay=3)
+            status = catalog.ingest([delayedFile, os.path.join(tempDir, 'missing.BIN')], workers=1)
+            if status['Status'].tolist() != ['ingested', 'failed'] or not str(status['Error'][1]).startswith('FileNotFoundError'):
+                err=error("ingest() did not isolate the missing log")
+                err.expected=['ingested', 'failed']
+                err.actual=status[['Status', 'Error']].values.tolist()
+                errors.append(err)
+            firstGPS = ArduPilotLog(delayedFile).summary()['FirstGPS']
+            found = catalog.logs(start=firstGPS, end=firstGPS)['File'].tolist()
+            early = catalog.logs(end=firstGPS-np.timedelta64(1, 'D'))['File'].tolist()
+            if os.path.abspath(delayedFile) not in found or os.path.abspath(delayedFile) in early:
+                err=error("logs(start=..., end=...) does not window a log whose first GPS messages have no fix")
+                err.expected=firstGPS
+                err.actual=catalog.logs()[['File', 'Start', 'End']].values.tolist()
+                errors.append(err)
+    return errors
+
+
 def printErrors(errors):
     if errors:
         print('-FAIL-')
@@ -73,13 +893,86 @@ def printErrors(errors):
 
 
 if __name__=='__main__':
-    testFile = ".\\ExampleBinFiles\\00000004.BIN"
+    testFile = os.path.join(".", "ExampleBinFiles", "00000004.BIN")
+    expected = {'expGPSMessages': 756, 'expMessages': 148394, 'expColumns': 19}
+    if not os.path.exists(testFile):    #the example log is not in the repo, test on a synthetic log instead
+        testFile = os.path.join(tempfile.mkdtemp(), "synthetic.BIN")
+        counts = writeSyntheticLog(testFile, seconds=120, seed=4)
+        expected = {'expGPSMessages': counts['GPS'], 'expMessages': sum(counts.values()),
+                    'expColumns': 3+max(len(arduFormat) for msgTypeID, arduFormat, columns in MESSAGE_FORMATS.values())}
+        print(f"Example log not found, testing on {testFile}")
     
     print("ArduPilotLog.filter(): ", end='', flush=True)
-    errors = Test_Filter_Method(testFile)
+    errors = Test_Filter_Method(testFile, expected['expGPSMessages'])
     printErrors(errors)
     print("ArduPilotLog.all(): ", end='', flush=True)
-    errors = Test_All_Method(testFile)
+    errors = Test_All_Method(testFile, expected['expMessages'], expected['expColumns'])
+    printErrors(errors)
+    print("ArduPilotLog.all(layout=...): ", end='', flush=True)
+    errors = Test_AllLayouts_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.buildIndex(): ", end='', flush=True)
+    errors = Test_BuildIndex_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.parse(lazy=True): ", end='', flush=True)
+    errors = Test_LazyParse_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.iterFrames(): ", end='', flush=True)
+    errors = Test_Streaming_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.parse(workers=4): ", end='', flush=True)
+    errors = Test_ParallelParse_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog(cacheDir=...): ", end='', flush=True)
+    errors = Test_ParseCache_Method(testFile)
+    printErrors(errors)
+    print("batchParse(): ", end='', flush=True)
+    errors = Test_BatchParse_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.damageReport(): ", end='', flush=True)
+    errors = Test_DamagedLog_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.update(): ", end='', flush=True)
+    errors = Test_Update_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.messages: ", end='', flush=True)
+    errors = Test_MessageStore_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.export(): ", end='', flush=True)
+    errors = Test_Export_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.filter(start=..., end=...): ", end='', flush=True)
+    errors = Test_TimeWindow_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.filter(columns=...): ", end='', flush=True)
+    errors = Test_ColumnProjection_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.parseStats: ", end='', flush=True)
+    errors = Test_ParseStats_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.summary(): ", end='', flush=True)
+    errors = Test_Summary_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.align(): ", end='', flush=True)
+    errors = Test_Align_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.aggregate(): ", end='', flush=True)
+    errors = Test_Aggregate_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.iterIndex()/readPacket()/seekTime(): ", end='', flush=True)
+    errors = Test_RandomAccess_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.parseAsync(): ", end='', flush=True)
+    errors = Test_ParseAsync_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.publish()/attach(): ", end='', flush=True)
+    errors = Test_SharedMemory_Method(testFile)
+    printErrors(errors)
+    print("ArduPilotLog.filter(categorical=...): ", end='', flush=True)
+    errors = Test_Categorical_Method(testFile)
+    printErrors(errors)
+    print("LogCatalog: ", end='', flush=True)
+    errors = Test_Catalog_Method(testFile)
     printErrors(errors)
     
     
@@ -0,0 +1,143 @@
+'''
+Description:
+    Benchmarks ArduPilotLog on a synthetic log, see synthBIN_writer.py, or on a
+    given .bin file. Every case runs in a fresh process so the peak memory of one
+    case does not hide in another, and reports:
+        Seconds:    wall time of the case.
+        MB/s:       size of the .bin file over Seconds.
+        Msgs/s:     packets in the log over Seconds.
+        PeakRSS_MB: peak resident memory of the process running the case.
+        FirstFrame: seconds until the first dataFrame was available, for cases that return dataFrames.
+    Save the table with --csv and compare it between versions to catch performance regressions.
+
+Usage:
+    python ./benchmark.py --size 100MB
+    python ./benchmark.py --log ./ExampleBinFiles/00000004.BIN --workers 4 --csv results.csv
+'''
+
+import os
+import sys
+import time
+import tempfile
+import shutil
+import argparse
+import multiprocessing
+import pandas as pd
+try:
+    import resource     # peak memory on Linux and macOS
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ArduPilot_binParser import ArduPilotLog
+from synthBIN_writer import writeSyntheticLog, parseSize
+
+CASES = ['parse', 'parse(lazy)', 'parse(workers)', 'filter', 'filter(columns)', 'iterFrames', 'all', 'export(csv)', 'export(parquet)']
+
+
+def peakRSS():
+    '''Returns the peak resident memory of this process in MB, None where it can not be measured.'''
+    if resource is not None:
+        maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxRSS/1024**2 if sys.platform == 'darwin' else maxRSS/1024     #bytes on macOS, KB on Linux
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset/1024**2
+    except (ImportError, AttributeError):
+        return None
+
+
+def runCase(case, fileName, workers, msgType, results):
+    '''Runs one benchmark case and puts (seconds, packets, first frame seconds, peak RSS) on the results queue.'''
+    outputDir = tempfile.mkdtemp()
+    firstFrame = None
+    tic = time.perf_counter()
+    log = ArduPilotLog(fileName)
+    if case == 'parse':
+        log.parse()
+    elif case == 'parse(lazy)':
+        log.parse(lazy=True)
+    elif case == 'parse(workers)':
+        log.parse(lazy=True, workers=workers)
+    elif case in ('filter', 'filter(columns)'):
+        log.parse(lazy=True)
+        headers = log.msgFormat[log.FMT2ID[msgType]][4].split(',')
+        log.filter(msgType, columns=headers[:2] if case == 'filter(columns)' else None)
+        firstFrame = time.perf_counter()-tic
+    elif case == 'iterFrames':
+        for df in log.iterFrames(msgType):
+            if firstFrame is None:
+                firstFrame = time.perf_counter()-tic
+    elif case == 'all':
+        log.parse(lazy=True)
+        log.all()
+        firstFrame = time.perf_counter()-tic
+    elif case == 'export(csv)':
+        log.export('csv', outputDir=outputDir)
+    elif case == 'export(parquet)':
+        log.export('parquet', outputDir=outputDir)
+    seconds = time.perf_counter()-tic
+    packets = len(log.packetOffsets) if log.packetOffsets is not None else None
+    log.close()
+    shutil.rmtree(outputDir, ignore_errors=True)
+    results.put((seconds, packets, firstFrame, peakRSS()))
+
+
+def benchmark(fileName, cases=None, workers=4, msgType='IMU'):
+    '''Runs the benchmark cases on one .bin file, each in a new process.
+    Args:
+        fileName (string): Filepath to the .bin file.
+        cases (list): (Optional) Cases to run, default None runs every case in CASES.
+        workers (int): (Optional) Worker processes for the parse(workers) case, default 4.
+        msgType (string): (Optional) Message Type Name for the filter and iterFrames cases, default 'IMU'.
+    Modifies:
+        None
+    Return:
+        (DataFrame): One row per case, see the module description.
+    '''
+    fileSize = os.path.getsize(fileName)
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for case in (CASES if cases is None else cases):
+        results = context.Queue()
+        process = context.Process(target=runCase, args=(case, fileName, workers, msgType, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:   #the error is printed by the case process
+            print(f'{case}: failed with exit code {process.exitcode}')
+            continue
+        seconds, packets, firstFrame, peakMB = results.get()
+        if not packets:     #streaming cases do not keep a packet index, count the packets once
+            packets = rows[0]['Packets'] if rows else None
+        rows.append({'Case': case, 'Seconds': round(seconds, 3), 'MB/s': round(fileSize/1e6/seconds, 1),
+                     'Msgs/s': round(packets/seconds) if packets else None, 'PeakRSS_MB': round(peakMB, 1) if peakMB else None,
+                     'FirstFrame': round(firstFrame, 3) if firstFrame is not None else None, 'Packets': packets})
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark ArduPilotLog parsing modes.')
+    parser.add_argument('--log', help='.bin file to benchmark, default writes a synthetic log')
+    parser.add_argument('--size', default='50MB', help='size of the synthetic log, default 50MB')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the synthetic log, default 0')
+    parser.add_argument('--cases', nargs='+', choices=CASES, help='cases to run, default all')
+    parser.add_argument('--workers', type=int, default=4, help='worker processes for parse(workers), default 4')
+    parser.add_argument('--type', default='IMU', help='message type for filter and iterFrames, default IMU')
+    parser.add_argument('--csv', help='save the results to this .csv file')
+    args = parser.parse_args()
+    fileName = args.log
+    if fileName is None:
+        fileName = os.path.join(tempfile.mkdtemp(), 'synthetic.BIN')
+        print(f'Writing {args.size} synthetic log to {fileName}')
+        writeSyntheticLog(fileName, sizeBytes=parseSize(args.size), seed=args.seed)
+    cases = args.cases
+    if cases is None:
+        try:
+            import pyarrow
+        except ImportError:
+            cases = [case for case in CASES if case != 'export(parquet)']
+    results = benchmark(fileName, cases, args.workers, args.type)
+    print(f'{fileName}: {os.path.getsize(fileName)/1e6:.1f} MB')
+    print(results.to_string(index=False))
+    if args.csv:
+        results.to_csv(args.csv, index=False)
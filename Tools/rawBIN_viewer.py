@@ -4,46 +4,185 @@ Creation: 14 Aug 2020
 Modified: 16 Dec 2023
 
 Description:
-    This will allow you to select a .bin file and
-    see its content in binary (hex) form.
-    The user can input any byte number and see the data starting from 
-    that byte number. If the user enters nothing then the next 1024 
-    bytes will be displayed. Use 'q' to quit program. 
-    Note: There is no error checking implemented on user input.
-
-Usage: 
-    ./rawBIN_viewer.py
+    This will allow you to select a .bin file and inspect its content packet by
+    packet. The file is memory-mapped, never read into memory as a whole, and the
+    packet index of ArduPilotLog is only built as far as the packets you ask for,
+    so multi-GB logs open instantly. Each packet is shown as hex next to its
+    decoded data fields, and a gap of skipped bytes in front of a packet, e.g.
+    from a damaged SD card, is reported.
+
+    Commands:
+        <ENTER>         next packet, or the next 1024 bytes after a byte command
+        p N             packet N of the log, counting from 0
+        t TYPE N        message N of message type TYPE, e.g. 't GPS 10'
+        s SECONDS       first packet logged at or after run time SECONDS (TimeUS)
+        b OFFSET        raw bytes starting at byte OFFSET
+        q               quit
+
+Usage:
+    python ./rawBIN_viewer.py
+    python ./rawBIN_viewer.py 00000004.BIN
 '''
 
-import tkinter as tk   #Needed to stops and annoying gray box from popping up.   
-from tkinter.filedialog import askopenfilename  #user to open file manager
-tk.Tk().withdraw()     #Stops and annoying gray box from popping up.
+import os
+import sys
+import numpy as np
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ArduPilot_binParser import ArduPilotLog
+
+BYTE_STEP = 1024    # bytes shown per byte command
+HEX_WIDTH = 16      # bytes per line of hex
+
+
+class PacketViewer:
+    def __init__(self, fileName):
+        '''Random access to the packets of a .bin file. The packet index is extended one block at a
+        time, only until it reaches the packet asked for.
+
+        Args:
+            fileName (string): Filepath to the .bin file.
+        Modifies:
+            Initializes viewer properties
+        Return:
+            None
+        '''
+        self.log = ArduPilotLog(fileName)
+        self.offsets = array('q')   # byte offset of every packet indexed so far, in file order
+        self.types = array('B')     # Message Type ID of every packet indexed so far
+        self.blocks = self.log.iterIndex()
+        self.complete = False       # True once the whole file is indexed
+        self.typeCounts = {}        # {msgTypeID: [packet numbers]} of the message types asked for, see typePacket()
+        self.typeScanned = {}       # {msgTypeID: packets already searched for that message type}
+
+    def __indexMore(self):
+        '''Indexes the next block of the file. Returns False at the end of the file.'''
+        if self.complete:
+            return False
+        try:
+            offsets, types = next(self.blocks)
+        except StopIteration:
+            self.complete = True
+            return False
+        self.offsets.frombytes(offsets.tobytes())
+        self.types.frombytes(types.tobytes())
+        return True
+
+    def packet(self, number):
+        '''Returns the byte offset of packet number, indexing as far as needed. Raises IndexError past the last packet.'''
+        while len(self.offsets) <= number:
+            if not self.__indexMore():
+                raise IndexError(f'the log has {len(self.offsets)} packets')
+        return self.offsets[number]
+
+    def typePacket(self, msgType, number):
+        '''Returns the packet number of message number of one message type, indexing as far as needed.
+        Raises IndexError past the last message of that type.'''
+        while True:
+            msgTypeID = self.log.FMT2ID.get(msgType)
+            if msgTypeID is not None:
+                found = self.typeCounts.setdefault(msgTypeID, [])
+                scanned = self.typeScanned.get(msgTypeID, 0)
+                types = np.frombuffer(self.types, dtype=np.uint8)[scanned:]
+                found.extend((np.flatnonzero(types == msgTypeID)+scanned).tolist())
+                self.typeScanned[msgTypeID] = len(self.types)
+                if len(found) > number:
+                    return found[number]
+            if not self.__indexMore():
+                raise IndexError(f'the log has {len(self.typeCounts.get(msgTypeID, []))} {msgType} messages')
+
+    def packetNumber(self, offset):
+        '''Returns the packet number of the packet at a byte offset, None if the index does not reach it yet.'''
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        number = int(np.searchsorted(offsets, offset))
+        return number if number < len(offsets) and offsets[number] == offset else None
 
-#load .bin file data
-File = open(askopenfilename() ,'rb') #open file manager
-#get total number of bytes in file
-File.seek(0,2) #move curser to end of file
-fileSize=File.tell()  #Get the number of bytes in file
-File.seek(0)   #move curser back to begining of file
-print(f'\nFile: {(File.name).split("/")[-1]}')
-print("Total file size: "+str(fileSize)+ " bytes\n")
+    def nextPacket(self, offset):
+        '''Returns the byte offset of the first packet after the packet at a byte offset, without the
+        index of the packets before it. Raises IndexError after the last packet.'''
+        for offsets, types in self.log.iterIndex(start=offset+1, blockSize=4096):
+            if len(offsets):
+                return int(offsets[0])
+        raise IndexError(f'no packet after byte {offset}')
 
-#read entile file into one variable so we can access parts of the data
-binFile=File.read()
+    def showPacket(self, offset, number=None):
+        '''Prints one packet as hex next to its decoded data fields.'''
+        packet = self.log.readPacket(offset)
+        title = f'Packet {number}' if number is not None else 'Packet'
+        print(f"{title} @ byte {offset}: {packet['MsgType']} (Message Type ID {packet['MsgTypeID']}, {packet['Length']} bytes)")
+        if number:   #bytes between the end of the packet before and this one were skipped by the parser
+            previous = self.offsets[number-1]
+            gap = offset-previous-self.log.msgFormat[self.types[number-1]][1]
+            if gap > 0:
+                print(f'  {gap} bytes skipped before this packet, from byte {offset-gap}')
+        rawBytes = packet['Bytes']
+        hexLines = [f'{offset+i:>10}  ' + ' '.join(f'{byte:02x}' for byte in rawBytes[i:i+HEX_WIDTH]) for i in range(0, len(rawBytes), HEX_WIDTH)]
+        fieldLines = [f'{name} = {value}' for name, value in packet['Fields'].items()]
+        for indx in range(max(len(hexLines), len(fieldLines))):
+            hexLine = hexLines[indx] if indx < len(hexLines) else ''
+            fieldLine = fieldLines[indx] if indx < len(fieldLines) else ''
+            print(f'{hexLine:<{12+3*HEX_WIDTH}}  {fieldLine}')
 
-start = 0
-step = 1024
-stop = 0
-inpt = ''
-while inpt!= 'q':
-    inpt = input(":")
-    if inpt == '': start = stop  # if user wants next 1024 bytes
-    if inpt.isdigit(): start = int(inpt)  # user specified start index
-    if inpt != 'q':
-        stop = start + step
-        print("Viewing range: [" + str(start) + ":" + str(stop)+"]")
-        print(binFile[start:stop])   #change range to view differnt parts of the .bin file
+    def showBytes(self, start):
+        '''Prints BYTE_STEP raw bytes starting at byte start as hex.'''
+        with open(self.log.fileName, 'rb') as binFile:
+            binFile.seek(start)
+            rawBytes = binFile.read(BYTE_STEP)
+        print(f'Viewing range: [{start}:{start+len(rawBytes)}]')
+        for i in range(0, len(rawBytes), HEX_WIDTH):
+            print(f'{start+i:>10}  ' + ' '.join(f'{byte:02x}' for byte in rawBytes[i:i+HEX_WIDTH]))
 
 
+def main(fileName):
+    viewer = PacketViewer(fileName)
+    print(f'\nFile: {os.path.basename(fileName)}')
+    print(f'Total file size: {os.path.getsize(fileName)} bytes\n')
+    mode, number, offset, start = 'packet', -1, None, 0     #number is None for a packet found by seekTime() outside the index
+    inpt = ''
+    while inpt != 'q':
+        inpt = input(':').strip()
+        words = inpt.split()
+        try:
+            if inpt == '' and mode == 'bytes':
+                start += BYTE_STEP
+                viewer.showBytes(start)
+            elif inpt == '' and number is None:
+                offset = viewer.nextPacket(offset)
+                number = viewer.packetNumber(offset)
+                viewer.showPacket(offset, number)
+            elif inpt == '':
+                number += 1
+                viewer.showPacket(viewer.packet(number), number)
+            elif words[0] == 'p' and len(words) == 2:
+                mode, number = 'packet', int(words[1])
+                viewer.showPacket(viewer.packet(number), number)
+            elif words[0] == 't' and len(words) == 3:
+                mode, number = 'packet', viewer.typePacket(words[1], int(words[2]))
+                viewer.showPacket(viewer.packet(number), number)
+            elif words[0] == 's' and len(words) == 2:
+                found = viewer.log.seekTime(float(words[1]))
+                if found is None:
+                    print(f'No packet is logged at or after {words[1]} s')
+                    continue
+                mode, offset = 'packet', found
+                number = viewer.packetNumber(offset)
+                viewer.showPacket(offset, number)
+            elif words[0] == 'b' and len(words) == 2 or inpt.isdigit():
+                mode, start = 'bytes', int(words[-1])
+                viewer.showBytes(start)
+            elif inpt != 'q':
+                print(__doc__[__doc__.index('Commands:'):__doc__.index('Usage:')].rstrip())
+        except (IndexError, ValueError) as e:
+            print(e)
 
 
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        file = sys.argv[1]
+    else:
+        import tkinter as tk   #Needed to stops and annoying gray box from popping up.
+        from tkinter.filedialog import askopenfilename  #user to open file manager
+        tk.Tk().withdraw()     #Stops and annoying gray box from popping up.
+        file = askopenfilename()    #open file manager
+    main(file)
@@ -0,0 +1,187 @@
+'''
+Description:
+    Writes synthetic ArduPilot .bin logs for testing and benchmarking ArduPilotLog.
+    A log starts with the FMT messages of every message type it uses, followed by
+    UNIT and PARM messages and then a simulated flight: IMU, ATT, STAT, GPS and MSG
+    packets at configurable rates, with a takeoff and a landing, and a GPS fix that
+    is only found a few seconds into the log. The same arguments and seed always
+    write the same bytes. Damaged logs can be written too, with corrupted packets
+    and a cut off final packet, like SD card logs after a brownout.
+
+Usage:
+    python ./synthBIN_writer.py synthetic.BIN --size 100MB
+    python ./synthBIN_writer.py damaged.BIN --seconds 300 --corrupt 0.001 --truncate 7
+ - OR -
+    from synthBIN_writer import writeSyntheticLog
+'''
+
+import struct           # packs the message data
+import random           # deterministic data and corruption
+import argparse         # command line interface
+import math
+import os
+
+PACKET_HEADER = b'\xa3\x95'
+#Message Type Name: (Message Type ID, ardupilot format, column headers), the same layouts ArduPilot logs
+MESSAGE_FORMATS = {
+    'FMT':  (128, 'BBnNZ', 'Type,Length,Name,Format,Columns'),
+    'UNIT': (129, 'bZ', 'Id,Label'),
+    'PARM': (130, 'QNff', 'TimeUS,Name,Value,Default'),
+    'GPS':  (131, 'QBBIHBcLLeffffB', 'TimeUS,I,Status,GMS,GWk,NSats,HDop,Lat,Lng,Alt,Spd,GCrs,VZ,Yaw,U'),
+    'IMU':  (132, 'QBffffffIIfBBHH', 'TimeUS,I,GyrX,GyrY,GyrZ,AccX,AccY,AccZ,EG,EA,T,GH,AH,GHz,AHz'),
+    'ATT':  (133, 'QccccCCffB', 'TimeUS,DesRoll,Roll,DesPitch,Pitch,DesYaw,Yaw,ErrRP,ErrYaw,AEKF'),
+    'STAT': (134, 'QBfBBBBBB', 'TimeUS,isFlying,isFlyProb,Armed,Safety,Crash,Still,Stage,Hit'),
+    'MSG':  (135, 'QZ', 'TimeUS,Message'),
+}
+DEFAULT_RATES = {'IMU': 100, 'ATT': 25, 'STAT': 10, 'GPS': 5, 'MSG': 0.2}   # messages per second of flight
+ARDU_TO_STRUCT = {'a': '64s', 'b': 'b', 'B': 'B', 'h': 'h', 'H': 'H', 'i': 'i', 'I': 'I', 'f': 'f', 'n': '4s', 'N': '16s',
+                  'Z': '64s', 'c': 'h', 'C': 'H', 'e': 'i', 'E': 'I', 'L': 'i', 'd': 'd', 'M': 'b', 'q': 'q', 'Q': 'Q'}
+BOOT_US = 5000000       # run time of the first flight message, ArduPilot logs a few seconds after boot
+GPS_WEEK = 2290         # GPS week and week milliseconds of the first GPS fix
+GPS_START_MS = 300000000
+
+
+def packetStruct(msgType):
+    '''Returns the struct that packs the message data of one message type.'''
+    return struct.Struct('<'+''.join(ARDU_TO_STRUCT[i] for i in MESSAGE_FORMATS[msgType][1]))
+
+
+def fmtPacket(msgType):
+    '''Returns the FMT packet that defines one message type.'''
+    msgTypeID, arduFormat, columns = MESSAGE_FORMATS[msgType]
+    return PACKET_HEADER + bytes([MESSAGE_FORMATS['FMT'][0]]) + packetStruct('FMT').pack(
+        msgTypeID, packetStruct(msgType).size+3, msgType.encode(), arduFormat.encode(), columns.encode())
+
+
+def flightSeconds(sizeBytes, rates):
+    '''Returns the number of seconds of flight that make a log of about sizeBytes bytes.'''
+    bytesPerSecond = sum((packetStruct(msgType).size+3)*rate for msgType, rate in rates.items())
+    return max(math.ceil(sizeBytes/bytesPerSecond), 1)
+
+
+def messageValues(msgType, runTime, t, seconds, gpsDelay, rng, fixDelay=0.0):
+    '''Returns the data fields of one message, t seconds into a flight of the given length.'''
+    flying = 0.2*seconds <= t < 0.8*seconds
+    if msgType == 'IMU':
+        accZ = -9.81 + (rng.gauss(0, 0.3) if flying else rng.gauss(0, 0.02))
+        return (runTime, 0, rng.gauss(0, 0.05), rng.gauss(0, 0.05), rng.gauss(0, 0.05), rng.gauss(0, 0.2), rng.gauss(0, 0.2),
+                accZ, 0, 0, 25.0+t*0.01, 1, 1, 1000, 1000)
+    if msgType == 'ATT':
+        roll, pitch = rng.randint(-1500, 1500) if flying else 0, rng.randint(-1500, 1500) if flying else 0
+        return (runTime, roll, roll+rng.randint(-50, 50), pitch, pitch+rng.randint(-50, 50), 9000, 9000+rng.randint(-100, 100),
+                rng.random()*0.1, rng.random()*0.1, 1)
+    if msgType == 'STAT':
+        return (runTime, int(flying), 1.0 if flying else 0.0, int(0.1*seconds <= t < 0.9*seconds), 0, 0, int(not flying), 3, 0)
+    if msgType == 'GPS' and t < gpsDelay+fixDelay:    #no fix yet, ArduPilot logs no GPS time or position
+        return (runTime, 0, 1, 0, 0, 0, 9999, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0)
+    if msgType == 'GPS':
+        climb = min(max(t-0.2*seconds, 0), max(0.8*seconds-t, 0), 60.0)     #climbs 1 m/s for up to a minute
+        return (runTime, 0, 3, GPS_START_MS+int((t-gpsDelay)*1000), GPS_WEEK, 12, 80, 371000000+int(t*100), -1220000000+int(t*50),
+                10000+int(climb*100), 5.0 if flying else 0.0, 90.0, -1.0 if flying else 0.0, 90.0, 1)
+    if msgType == 'MSG':
+        return (runTime, f'Event at {t:.1f} s'.encode())
+    raise ValueError(f'no data for message type {msgType}')
+
+
+def writeSyntheticLog(fileName, seconds=60, sizeBytes=None, rates=None, seed=0, gpsDelay=2.0, corruptRate=0.0, truncate=0, fixDelay=0.0):
+    '''Writes a synthetic .bin log. Packets are written one second of flight at a time, so logs of
+    several gigabytes can be written without holding them in memory.
+
+    Args:
+        fileName (string): Filepath to write the .bin file to.
+        seconds (float): (Optional) Seconds of flight to write, default 60. Ignored if sizeBytes is given.
+        sizeBytes (int): (Optional) Write enough seconds of flight for a log of about this many bytes, default None.
+        rates (dict): (Optional) Message Type Name: messages per second, default DEFAULT_RATES.
+        seed (int): (Optional) Random seed of the data and corruption, default 0.
+        gpsDelay (float): (Optional) Seconds of flight before the first GPS fix, default 2.0.
+        corruptRate (float): (Optional) Fraction of the flight packets to damage, by breaking the packet
+                             header, writing an unknown Message Type ID or writing junk in front of it, default 0.0.
+        truncate (int): (Optional) Bytes to cut off the end of the log, default 0.
+        fixDelay (float): (Optional) Seconds of GPS messages without a 3D fix, Status 1 and no GPS time,
+                          before the fix, default 0.0.
+    Modifies:
+        None
+    Return:
+        (dict): Message Type Name: number of undamaged packets written, truncated packets are not counted.
+                A parser can still lose an undamaged packet that is squeezed between two damaged ones.
+    '''
+    rates = DEFAULT_RATES if rates is None else rates
+    if sizeBytes is not None:
+        seconds = flightSeconds(sizeBytes, rates)
+    rng = random.Random(seed)
+    structs = {msgType: packetStruct(msgType) for msgType in MESSAGE_FORMATS}
+    headers = {msgType: PACKET_HEADER + bytes([MESSAGE_FORMATS[msgType][0]]) for msgType in MESSAGE_FORMATS}
+    counts = dict.fromkeys(MESSAGE_FORMATS, 0)
+    packetEnds = []     #(file offset, Message Type Name) of the last packets, to uncount truncated ones
+    with open(fileName, 'wb') as binFile:
+        block = bytearray()
+        for msgType in MESSAGE_FORMATS:
+            block += fmtPacket(msgType)
+        counts['FMT'] = len(MESSAGE_FORMATS)
+        block += headers['UNIT'] + structs['UNIT'].pack(0, b'meters')
+        for indx in range(10):
+            block += headers['PARM'] + structs['PARM'].pack(1000+indx, f'PARAM_{indx}'.encode(), float(indx), 0.0)
+        counts['UNIT'], counts['PARM'] = 1, 10
+        binFile.write(block)
+        written = len(block)
+        block = bytearray()
+        for second in range(math.ceil(seconds)):
+            schedule = []
+            for msgType, rate in rates.items():
+                for k in range(math.ceil(second*rate), math.ceil(min(second+1, seconds)*rate)):
+                    t = k/rate
+                    if msgType != 'GPS' or t >= gpsDelay:
+                        schedule.append((t, msgType))
+            schedule.sort()
+            for t, msgType in schedule:
+                runTime = BOOT_US + int(t*1e6) + rng.randint(0, 50)
+                packet = headers[msgType] + structs[msgType].pack(*messageValues(msgType, runTime, t, seconds, gpsDelay, rng, fixDelay))
+                if corruptRate and rng.random() < corruptRate:
+                    damage = rng.randrange(3)
+                    if damage == 0:     #broken packet header
+                        packet = bytes([packet[0] ^ 0xff]) + packet[1:]
+                    elif damage == 1:   #unknown Message Type ID
+                        packet = packet[:2] + b'\xfe' + packet[3:]
+                    else:               #junk in front of an intact packet
+                        packet = bytes(rng.randrange(256) for i in range(rng.randint(1, 40))) + packet
+                        counts[msgType] += 1
+                        packetEnds.append((written+len(block)+len(packet), msgType))
+                else:
+                    counts[msgType] += 1
+                    packetEnds.append((written+len(block)+len(packet), msgType))
+                block += packet
+            binFile.write(block)
+            written += len(block)
+            block = bytearray()
+            packetEnds = packetEnds[-256:]
+    if truncate:
+        os.truncate(fileName, max(written-truncate, 0))
+        for end, msgType in packetEnds:
+            if end > written-truncate:
+                counts[msgType] -= 1
+    return counts
+
+
+def parseSize(size):
+    '''Converts a size such as 500KB, 100MB or 2GB to bytes.'''
+    units = {'KB': 1024, 'MB': 1024**2, 'GB': 1024**3}
+    size = size.strip().upper()
+    for unit, multiplier in units.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)])*multiplier)
+    return int(size)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic ArduPilot .bin log.')
+    parser.add_argument('fileName', help='.bin file to write')
+    parser.add_argument('--seconds', type=float, default=60, help='seconds of flight, default 60')
+    parser.add_argument('--size', help='approximate log size instead of --seconds, such as 100MB or 2GB')
+    parser.add_argument('--seed', type=int, default=0, help='random seed, default 0')
+    parser.add_argument('--corrupt', type=float, default=0.0, help='fraction of packets to damage, default 0')
+    parser.add_argument('--truncate', type=int, default=0, help='bytes to cut off the end, default 0')
+    parser.add_argument('--fix-delay', type=float, default=0.0, help='seconds of GPS messages without a fix, default 0')
+    args = parser.parse_args()
+    counts = writeSyntheticLog(args.fileName, seconds=args.seconds, sizeBytes=parseSize(args.size) if args.size else None,
+                               seed=args.seed, corruptRate=args.corrupt, truncate=args.truncate, fixDelay=args.fix_delay)
+    print(f'{args.fileName}: {sum(counts.values())} packets', counts)